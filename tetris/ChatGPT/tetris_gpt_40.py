@@ -43,11 +43,11 @@ def create_grid():
 
 # Aktueller Block
 class Piece:
-    def __init__(self, x, y, shape):
+    def __init__(self, x, y, shape, rng=random):
         self.x = x
         self.y = y
         self.shape = shape
-        self.color = random.choice(COLORS)
+        self.color = rng.choice(COLORS)
         self.rotation = 0
 
     def rotated_shape(self):
@@ -109,12 +109,13 @@ def clear_rows(grid):
     return new_grid
 
 # Hauptspiel
-def main():
+def main(seed=None):
+    rng = random.Random(seed)
     grid = create_grid()
     clock = pygame.time.Clock()
     fall_time = 0
     fall_speed = 0.5
-    current_piece = Piece(3, 0, random.choice(SHAPES))
+    current_piece = Piece(3, 0, rng.choice(SHAPES), rng)
     run = True
 
     while run:
@@ -127,7 +128,7 @@ def main():
             if not valid_space(current_piece, grid):
                 current_piece.y -= 1
                 lock_piece(current_piece, grid)
-                current_piece = Piece(3, 0, random.choice(SHAPES))
+                current_piece = Piece(3, 0, rng.choice(SHAPES), rng)
                 if not valid_space(current_piece, grid):
                     print("GAME OVER")
                     run = False
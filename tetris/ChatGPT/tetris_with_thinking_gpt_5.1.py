@@ -107,8 +107,8 @@ def is_valid_position(grid, piece):
     return True
 
 
-def get_new_piece():
-    shape_key = random.choice(list(SHAPES.keys()))
+def get_new_piece(rng=random):
+    shape_key = rng.choice(list(SHAPES.keys()))
     return Piece(shape_key)
 
 
@@ -191,7 +191,8 @@ def draw_window(surface, grid, score, level):
     pygame.display.update()
 
 
-def main():
+def main(seed=None):
+    rng = random.Random(seed)
     pygame.init()
     pygame.display.setCaption = pygame.display.set_caption("Tetris")
     pygame.display.set_caption("Tetris")
@@ -201,7 +202,7 @@ def main():
     locked = {}
     grid = create_grid(locked)
 
-    current_piece = get_new_piece()
+    current_piece = get_new_piece(rng)
     next_drop_time = 0
     score = 0
     level = 1
@@ -240,7 +241,7 @@ def main():
                         if lines:
                             score += (100 * lines) * level
                         grid = create_grid(locked)
-                        current_piece = get_new_piece()
+                        current_piece = get_new_piece(rng)
                         if not is_valid_position(grid, current_piece):
                             # Game Over
                             running = False
@@ -261,7 +262,7 @@ def main():
                     level = 1 + score // 1000
                     fall_speed = max(100, 500 - (level - 1) * 30)
                 grid = create_grid(locked)
-                current_piece = get_new_piece()
+                current_piece = get_new_piece(rng)
                 if not is_valid_position(grid, current_piece):
                     running = False
 
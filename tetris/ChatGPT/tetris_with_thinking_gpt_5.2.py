@@ -1,6 +1,11 @@
 # tetris.py
+import os
 import sys
 import random
+import struct
+from collections import deque, namedtuple
+from functools import lru_cache
+
 import pygame
 
 # -------------------- Config --------------------
@@ -11,12 +16,20 @@ TOP_MARGIN = 40
 WIDTH = COLS * CELL + SIDE_PANEL
 HEIGHT = ROWS * CELL + TOP_MARGIN
 FPS = 60
+PREVIEW = 7
+
+# Gravity is measured in rows per frame (1/FPS s); 20G drops a piece to the
+# floor within a single frame.
+MAX_GRAVITY = float(ROWS)
+SOFT_DROP_GRAVITY = 1.0 / 3.0
+LOCK_DELAY = 0.35
 
 BG = (15, 16, 18)
 GRID_BG = (20, 22, 26)
 GRID_LINE = (35, 38, 45)
 TEXT = (230, 230, 230)
 SUBTEXT = (170, 170, 170)
+GARBAGE_COLOR = (110, 110, 120)
 
 # Tetromino colors
 COLORS = {
@@ -75,14 +88,73 @@ SHAPES = {
     ],
 }
 
+# Very small "wall-kick" set (not full SRS, but feels decent), tried in order
+KICKS = [(0, 0), (-1, 0), (1, 0), (-2, 0), (2, 0), (0, -1)]
+
+# Scoring: (single, double, triple, tetris) * level
+LINE_SCORES = {1: 100, 2: 300, 3: 500, 4: 800}
+# Versus: garbage lines sent to the opponent per (double, triple, tetris)
+GARBAGE_LINES = {2: 1, 3: 2, 4: 4}
+
+# Cell codes: 0 empty, 1 + kind index, 8 garbage. Snapshots store each board
+# row as one int of CELL_BITS-bit codes (see row_code) and save files use
+# the same codes; CELL_COLORS turns them back into colours.
+KINDS = list(SHAPES)
+CELL_BITS = 4
+CELL_CODES = {COLORS[kind]: i + 1 for i, kind in enumerate(KINDS)}
+CELL_CODES[GARBAGE_COLOR] = len(KINDS) + 1
+CELL_COLORS = {code: color for color, code in CELL_CODES.items()}
+
+# Zobrist keys: one random 64-bit key per board cell, per (kind, rot, x, y)
+# of the falling piece and per (preview slot, kind) for the first 64 slots.
+# A fixed seed keeps the hashes stable across runs and processes.
+_zobrist = random.Random(0x7E7215)
+CELL_KEYS = [[_zobrist.getrandbits(64) for _ in range(COLS)] for _ in range(ROWS)]
+PIECE_KEYS = {
+    (kind, rot, x, y): _zobrist.getrandbits(64)
+    for kind in SHAPES for rot in range(4) for x in range(-3, COLS + 1) for y in range(-ROWS, ROWS + 1)
+}
+QUEUE_KEYS = [{kind: _zobrist.getrandbits(64) for kind in SHAPES} for _ in range(64)]
+
 
 # -------------------- Helpers --------------------
-def new_bag():
+def new_bag(rng):
     bag = list(SHAPES.keys())
-    random.shuffle(bag)
+    rng.shuffle(bag)
     return bag
 
 
+def dealt_bag(seed, index):
+    """Bag number `index` (from 0) of the game with `seed`.
+
+    Every bag is shuffled by its own RNG, so any bag can be dealt without
+    drawing the ones before it.
+    """
+    return new_bag(random.Random(f"{seed}:{index}"))
+
+
+def row_code(row):
+    """A board row as one int, CELL_BITS bits per cell from column 0 up."""
+    code = 0
+    for x, cell in enumerate(row):
+        if cell is not None:
+            code |= CELL_CODES[cell] << CELL_BITS * x
+    return code
+
+
+@lru_cache(maxsize=4096)
+def row_cells(code):
+    """The colours of a ``row_code`` row, None where it is empty."""
+    mask = (1 << CELL_BITS) - 1
+    return tuple(CELL_COLORS.get(code >> CELL_BITS * x & mask) for x in range(COLS))
+
+
+@lru_cache(maxsize=256)
+def board_cells(rows):
+    """``row_cells`` of every row; rewinds and rollbacks restore the same few boards."""
+    return tuple(map(row_cells, rows))
+
+
 def clamp(v, a, b):
     return max(a, min(b, v))
 
@@ -107,21 +179,55 @@ class Piece:
         return [(px + bx, py + by) for (bx, by) in SHAPES[self.kind][r]]
 
 
+# Immutable copy of a game's state. The board is the game's tuple of row
+# codes, shared by every snapshot until the board changes; the column
+# bitmasks come along so a restore needs no rebuild, and the rest is small
+# scalars.
+Snapshot = namedtuple(
+    "Snapshot",
+    "board columns board_hash queue_hash seed bag queue preview current next_kind "
+    "score lines level pieces fixed_gravity gravity_acc lock_delay paused game_over "
+    "move_repeat_timer move_repeat_dir soft_drop last_drop_cells garbage_sent "
+    "bags_drawn",
+)
+
+
 class Tetris:
-    def __init__(self):
+    def __init__(self, gravity=None, seed=None, preview=PREVIEW, source=None):
         self.grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
-        self.bag = new_bag()
-        self.queue = []
+        # Per-column occupancy bitmasks (bit y set => cell (x, y) filled),
+        # with a sentinel bit at ROWS standing in for the floor.
+        self.columns = [1 << ROWS for _ in range(COLS)]
+        # The rows as row_code ints; replaced, never edited, so snapshots can share it
+        self.rows = (0,) * ROWS
+        # Zobrist hash of the occupied cells, kept up to date on lock and clear
+        self.board_hash = 0
+        # The seed fixes the piece sequence (see dealt_bag); self.rng is left
+        # to callers, e.g. to pick the seed of the next game
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        # An iterator of kinds (e.g. from tools/randomizer.py) deals instead of
+        # the bags when given. Saves cannot rebuild it, and a restore keeps
+        # the queue it restores but deals on from wherever the source is.
+        self.source = source
+        self.bag = dealt_bag(self.seed, 0) if source is None else []
+        self.bags_drawn = 1 if source is None else 0  # with the seed, the whole dealing state
+        self.preview = preview
+        self.queue = deque()
         self._refill_queue()
         self.current = self._next_piece()
         self.next_piece = self._next_piece()
+        self._hash_queue()
         self.game_over = False
 
         self.score = 0
         self.lines = 0
         self.level = 1
+        self.pieces = 0  # pieces locked so far
 
-        self.drop_timer = 0.0
+        # Fixed rows-per-frame gravity (e.g. 20 for 20G); None follows the level curve
+        self.fixed_gravity = gravity
+        self.gravity_acc = 0.0
         self.lock_delay = 0.0
         self.paused = False
 
@@ -133,18 +239,34 @@ class Tetris:
         # hard drop scoring
         self.last_drop_cells = 0
 
+        # versus: total garbage lines this game has sent (see GARBAGE_LINES)
+        self.garbage_sent = 0
+
+        # change listeners, called as fn(game, event) with event one of
+        # "move" (the falling piece moved), "lock" (a piece locked; lines may
+        # have cleared and the next piece spawned), "garbage" or "restore"
+        self.listeners = []
+
         if self._collides(self.current):
             self.game_over = True
 
+    def _notify(self, event):
+        for fn in self.listeners:
+            fn(self, event)
+
     def _refill_queue(self):
-        while len(self.queue) < 7:
+        while len(self.queue) < self.preview:
+            if self.source is not None:
+                self.queue.append(next(self.source))
+                continue
             if not self.bag:
-                self.bag = new_bag()
+                self.bag = dealt_bag(self.seed, self.bags_drawn)
+                self.bags_drawn += 1
             self.queue.append(self.bag.pop())
 
     def _next_piece(self):
         self._refill_queue()
-        return Piece(self.queue.pop(0))
+        return Piece(self.queue.popleft())
 
     def _collides(self, piece, rot=None, x=None, y=None):
         for bx, by in piece.blocks(rot=rot, x=x, y=y):
@@ -157,47 +279,172 @@ class Tetris:
         return False
 
     def _merge_piece(self, piece):
+        rows = list(self.rows)
+        code = CELL_CODES[piece.color]
         for bx, by in piece.blocks():
             if by < 0:
                 self.game_over = True
-                return
+                break
             self.grid[by][bx] = piece.color
+            self.columns[bx] |= 1 << by
+            self.board_hash ^= CELL_KEYS[by][bx]
+            rows[by] |= code << CELL_BITS * bx
+        self.rows = tuple(rows)
 
     def _clear_lines(self):
-        new_rows = []
-        cleared = 0
-        for row in self.grid:
-            if all(cell is not None for cell in row):
-                cleared += 1
+        kept = []
+        full = []
+        for y, row in enumerate(self.grid):
+            if None in row:
+                kept.append(y)
             else:
-                new_rows.append(row)
-        while len(new_rows) < ROWS:
-            new_rows.insert(0, [None for _ in range(COLS)])
+                full.append(y)
+        cleared = len(full)
+        if not cleared:
+            return 0
+        new_rows = [[None] * COLS for _ in range(cleared)] + [self.grid[y] for y in kept]
+        self._rehash_clear(new_rows)
         self.grid = new_rows
+        self.rows = (0,) * cleared + tuple(self.rows[y] for y in kept)
+        # drop the full rows from the columns, topmost first so the indices
+        # of the ones below still hold
+        columns = self.columns
+        for y in full:
+            above = (1 << y) - 1
+            columns = [(c & ~(above | 1 << y)) | (c & above) << 1 for c in columns]
+        self.columns = columns
         return cleared
 
+    def _rehash_clear(self, new_rows):
+        """Update board_hash for a clear: only cleared rows and rows that moved down change."""
+        h = self.board_hash
+        shift = 0
+        for y in range(ROWS - 1, -1, -1):
+            row = self.grid[y]
+            if new_rows[y + shift] is not row:
+                # cleared row: every cell leaves the board
+                for x in range(COLS):
+                    h ^= CELL_KEYS[y][x]
+                shift += 1
+            elif shift:
+                old, new = CELL_KEYS[y], CELL_KEYS[y + shift]
+                for x, cell in enumerate(row):
+                    if cell is not None:
+                        h ^= old[x] ^ new[x]
+        self.board_hash = h
+
+    def _rebuild_hash(self):
+        """Recompute board_hash and the queue hash from scratch (after editing the state directly)."""
+        h = 0
+        for y, row in enumerate(self.grid):
+            for x, cell in enumerate(row):
+                if cell is not None:
+                    h ^= CELL_KEYS[y][x]
+        self.board_hash = h
+        self._hash_queue()
+
+    def _hash_queue(self):
+        """Hash of next_piece and the preview queue, refreshed whenever a piece spawns."""
+        h = QUEUE_KEYS[0][self.next_piece.kind]
+        for keys, kind in zip(QUEUE_KEYS[1:], self.queue):
+            h ^= keys[kind]
+        self.queue_hash = h
+
+    def state_hash(self, queue=True):
+        """64-bit Zobrist key of the board and falling piece, and by default the upcoming pieces.
+
+        Equal states give equal keys in any process; cell colours, score and
+        timers are not part of it. This engine has no hold piece.
+        """
+        cur = self.current
+        h = self.board_hash ^ PIECE_KEYS[cur.kind, cur.rot, cur.x, cur.y]
+        return h ^ self.queue_hash if queue else h
+
+    def snapshot(self):
+        """Immutable copy of the state, cheap enough to take every frame."""
+        cur = self.current
+        return Snapshot(
+            self.rows, tuple(self.columns), self.board_hash, self.queue_hash,
+            self.seed, tuple(self.bag), tuple(self.queue), self.preview,
+            (cur.kind, cur.x, cur.y, cur.rot), self.next_piece.kind,
+            self.score, self.lines, self.level, self.pieces, self.fixed_gravity, self.gravity_acc,
+            self.lock_delay, self.paused, self.game_over,
+            self.move_repeat_timer, self.move_repeat_dir, self.soft_drop, self.last_drop_cells,
+            self.garbage_sent, self.bags_drawn,
+        )
+
+    def restore(self, snap):
+        """Put the game back to `snap`; the snapshot itself stays usable."""
+        self.grid = [list(row) for row in board_cells(snap.board)]
+        self.rows = snap.board
+        self.columns = list(snap.columns)
+        self.board_hash, self.queue_hash = snap.board_hash, snap.queue_hash
+        self.seed = snap.seed
+        self.bag = list(snap.bag)
+        self.queue = deque(snap.queue)
+        self.preview = snap.preview
+        kind, x, y, rot = snap.current
+        self.current = Piece(kind)
+        self.current.x, self.current.y, self.current.rot = x, y, rot
+        self.next_piece = Piece(snap.next_kind)
+        (self.score, self.lines, self.level, self.pieces, self.fixed_gravity, self.gravity_acc,
+         self.lock_delay, self.paused, self.game_over, self.move_repeat_timer, self.move_repeat_dir,
+         self.soft_drop, self.last_drop_cells, self.garbage_sent, self.bags_drawn) = snap[10:]
+        if self.listeners:
+            self._notify("restore")
+
+    def _rebuild_columns(self):
+        """Recompute the column bitmasks and row codes from the grid, after editing it directly."""
+        self.rows = tuple(map(row_code, self.grid))
+        columns = [1 << ROWS for _ in range(COLS)]
+        for y, row in enumerate(self.grid):
+            bit = 1 << y
+            for x, cell in enumerate(row):
+                if cell is not None:
+                    columns[x] |= bit
+        self.columns = columns
+
+    def drop_distance(self, piece=None):
+        """Rows the piece can fall before resting, from the column bitmasks.
+
+        Each block looks up the first filled cell below it with one shift and
+        a lowest-set-bit query, so the cost does not depend on the distance.
+        """
+        piece = self.current if piece is None else piece
+        dist = ROWS
+        for bx, by in piece.blocks():
+            s = by + 1
+            m = self.columns[bx] >> s if s >= 0 else self.columns[bx] << -s
+            d = (m & -m).bit_length() - 1
+            if d < dist:
+                dist = d
+        return dist
+
     def _update_level(self):
         self.level = 1 + self.lines // 10
 
     def drop_interval(self):
         # Simple speed curve: higher level => smaller interval
-        # Clamp to avoid going too fast
         base = 0.75
-        interval = base * (0.87 ** (self.level - 1))
-        return clamp(interval, 0.05, 0.75)
+        return base * (0.87 ** (self.level - 1))
+
+    def gravity(self):
+        """Fall speed in rows per frame, capped at 20G."""
+        if self.fixed_gravity is not None:
+            return clamp(self.fixed_gravity, 0.0, MAX_GRAVITY)
+        return clamp(1.0 / (self.drop_interval() * FPS), 0.0, MAX_GRAVITY)
 
     def rotate(self):
         if self.game_over or self.paused:
             return
         new_rot = (self.current.rot + 1) % 4
-
-        # Very small "wall-kick" set (not full SRS, but feels decent)
-        kicks = [(0, 0), (-1, 0), (1, 0), (-2, 0), (2, 0), (0, -1)]
-        for kx, ky in kicks:
+        for kx, ky in KICKS:
             nx, ny = self.current.x + kx, self.current.y + ky
             if not self._collides(self.current, rot=new_rot, x=nx, y=ny):
                 self.current.rot = new_rot
                 self.current.x, self.current.y = nx, ny
+                if self.listeners:
+                    self._notify("move")
                 return
 
     def move(self, dx):
@@ -206,21 +453,24 @@ class Tetris:
         nx = self.current.x + dx
         if not self._collides(self.current, x=nx, y=self.current.y):
             self.current.x = nx
+            if self.listeners:
+                self._notify("move")
 
     def step_down(self):
         """Try move down by 1. Returns True if moved, False if blocked."""
         ny = self.current.y + 1
         if not self._collides(self.current, x=self.current.x, y=ny):
             self.current.y = ny
+            if self.listeners:
+                self._notify("move")
             return True
         return False
 
     def hard_drop(self):
         if self.game_over or self.paused:
             return
-        dropped = 0
-        while self.step_down():
-            dropped += 1
+        dropped = self.drop_distance()
+        self.current.y += dropped
         # scoring: 2 points per hard drop cell (classic-ish)
         self.score += 2 * dropped
         self._lock_piece()
@@ -231,22 +481,46 @@ class Tetris:
 
     def _lock_piece(self):
         self._merge_piece(self.current)
+        self.pieces += 1
         cleared = self._clear_lines()
 
         if cleared:
-            # Scoring: (single, double, triple, tetris) * level
-            line_scores = {1: 100, 2: 300, 3: 500, 4: 800}
-            self.score += line_scores.get(cleared, 0) * self.level
+            self.score += LINE_SCORES.get(cleared, 0) * self.level
             self.lines += cleared
             self._update_level()
+            self.garbage_sent += GARBAGE_LINES.get(cleared, 0)
 
         # Next pieces
         self.current = self.next_piece
         self.next_piece = self._next_piece()
+        self._hash_queue()
 
         self.lock_delay = 0.0
         if self._collides(self.current):
             self.game_over = True
+        if self.listeners:
+            self._notify("lock")
+
+    def add_garbage(self, lines, hole):
+        """Push `lines` rows in from the bottom, full except for column `hole`.
+
+        Blocks pushed off the top end the game. The falling piece is lifted
+        out of the way if the new rows reach it.
+        """
+        if lines <= 0 or self.game_over:
+            return
+        lines = min(lines, ROWS)
+        if any(cell is not None for row in self.grid[:lines] for cell in row):
+            self.game_over = True
+        row = [GARBAGE_COLOR] * COLS
+        row[hole] = None
+        self.grid = self.grid[lines:] + [list(row) for _ in range(lines)]
+        self._rebuild_columns()
+        self._rebuild_hash()
+        while self._collides(self.current) and self.current.y > -ROWS:
+            self.current.y -= 1
+        if self.listeners:
+            self._notify("garbage")
 
     def update(self, dt):
         if self.game_over or self.paused:
@@ -263,32 +537,254 @@ class Tetris:
                     self.move_repeat_timer -= repeat
                     self.move(self.move_repeat_dir)
 
-        # Falling / dropping
-        interval = self.drop_interval()
+        # Falling / dropping: whole rows owed this update fall in one step,
+        # limited by the drop distance instead of testing each row.
+        gravity = self.gravity()
         if self.soft_drop:
-            interval = min(interval, 0.05)
-
-        self.drop_timer += dt
-        while self.drop_timer >= interval:
-            self.drop_timer -= interval
-            moved = self.step_down()
-            if not moved:
-                # lock delay: allow a short time to rotate/move before locking
-                self.lock_delay += interval
-                if self.lock_delay >= 0.35:
-                    self._lock_piece()
-                    break
-            else:
-                self.lock_delay = 0.0
+            gravity = max(gravity, SOFT_DROP_GRAVITY)
+
+        self.gravity_acc += gravity * dt * FPS
+        rows = int(self.gravity_acc)
+        if rows == 0:
+            return
+        self.gravity_acc -= rows
+
+        fall = min(rows, self.drop_distance())
+        if fall:
+            self.current.y += fall
+            self.lock_delay = 0.0
+            if self.listeners:
+                self._notify("move")
+        if fall < rows:
+            # lock delay: allow a short time to rotate/move before locking;
+            # every blocked row counts as one gravity interval spent resting
+            self.lock_delay += (rows - fall) / (gravity * FPS)
+            if self.lock_delay >= LOCK_DELAY:
+                self._lock_piece()
+                self.gravity_acc = 0.0
 
     def ghost_y(self):
-        py = self.current.y
-        while not self._collides(self.current, x=self.current.x, y=py + 1):
-            py += 1
-        return py
+        return self.current.y + self.drop_distance()
+
+
+# -------------------- Input --------------------
+def key_down(game, key):
+    if key == pygame.K_p:
+        game.paused = not game.paused
+
+    if not game.game_over and not game.paused:
+        if key == pygame.K_LEFT:
+            game.move(-1)
+            game.move_repeat_dir = -1
+            game.move_repeat_timer = 0.0
+        elif key == pygame.K_RIGHT:
+            game.move(1)
+            game.move_repeat_dir = 1
+            game.move_repeat_timer = 0.0
+        elif key == pygame.K_UP:
+            game.rotate()
+        elif key == pygame.K_DOWN:
+            game.soft_drop = True
+        elif key == pygame.K_SPACE:
+            game.hard_drop()
+
+
+def key_up(game, key):
+    if key == pygame.K_LEFT and game.move_repeat_dir == -1:
+        game.move_repeat_dir = 0
+        game.move_repeat_timer = 0.0
+    elif key == pygame.K_RIGHT and game.move_repeat_dir == 1:
+        game.move_repeat_dir = 0
+        game.move_repeat_timer = 0.0
+    elif key == pygame.K_DOWN:
+        game.soft_drop = False
+
+
+def advance(game, dt):
+    if not game.paused and not game.game_over:
+        # give soft drop some extra "manual" feel:
+        if game.soft_drop:
+            game.soft_drop_step()
+        game.update(dt)
+
+
+class History:
+    """Ring buffer of the last `size` snapshots, for undo and rewind."""
+
+    def __init__(self, size=256):
+        self.snaps = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self.snaps)
+
+    def push(self, game):
+        self.snaps.append(game.snapshot())
+
+    def clear(self):
+        self.snaps.clear()
+
+    def rewind(self, game, steps=1):
+        """Drop the newest `steps` snapshots and restore the one before them.
+
+        Returns False, leaving the game alone, if the buffer does not reach
+        that far back.
+        """
+        if steps >= len(self.snaps):
+            return False
+        for _ in range(steps):
+            self.snaps.pop()
+        game.restore(self.snaps[-1])
+        return True
+
+
+# -------------------- Save files --------------------
+# Layout (little endian): b"TSV", version, varints (seed, bags drawn, cards
+# left in the bag, score, lines, level, pieces, last drop cells, preview,
+# garbage sent), flags, repeat dir, current (kind, x, y, rot), next kind,
+# timers as f64 (gravity_acc, lock_delay, move_repeat_timer, then
+# fixed_gravity when the flag says so), queue length and kinds, stored row
+# count and the bottom rows at 4 bits per cell (0 empty, 1 + kind index, 8
+# garbage). The bag in hand is dealt again from the seed and its index
+# (see dealt_bag). With the default preview a save takes about 55 bytes
+# plus 5 per stored row.
+# Versions 1 (3 bits per cell, no garbage) and 2 had no garbage sent and
+# dealt every bag from one RNG; they load with the bag in hand intact and
+# later bags dealt the current way.
+SAVE_MAGIC = b"TSV"
+SAVE_VERSION = 3
+
+SAVE_GAME_OVER, SAVE_PAUSED, SAVE_SOFT_DROP, SAVE_FIXED_GRAVITY = 1, 2, 4, 8
+_SAVE_HEAD = struct.Struct("<BbBbbBBddd")
+_F64 = struct.Struct("<d")
+
+
+def _put_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf, pos):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def save_game(game):
+    """Serialize `game` to a compact bytes blob; ``load_game`` restores it exactly."""
+    if game.source is not None:
+        raise ValueError("a game dealt from a custom piece source cannot be saved")
+    out = bytearray(SAVE_MAGIC)
+    out.append(SAVE_VERSION)
+    for n in (game.seed, game.bags_drawn, len(game.bag), game.score, game.lines, game.level,
+              game.pieces, game.last_drop_cells, game.preview, game.garbage_sent):
+        _put_varint(out, n)
+    flags = ((SAVE_GAME_OVER if game.game_over else 0) | (SAVE_PAUSED if game.paused else 0)
+             | (SAVE_SOFT_DROP if game.soft_drop else 0)
+             | (SAVE_FIXED_GRAVITY if game.fixed_gravity is not None else 0))
+    cur = game.current
+    out += _SAVE_HEAD.pack(flags, game.move_repeat_dir, KINDS.index(cur.kind), cur.x, cur.y, cur.rot,
+                           KINDS.index(game.next_piece.kind),
+                           game.gravity_acc, game.lock_delay, game.move_repeat_timer)
+    if game.fixed_gravity is not None:
+        out += _F64.pack(game.fixed_gravity)
+    out.append(len(game.queue))
+    out += bytes(KINDS.index(k) for k in game.queue)
+
+    top = next((y for y, code in enumerate(game.rows) if code), ROWS)
+    packed = 0
+    shift = 0
+    for y in range(ROWS - 1, top - 1, -1):
+        packed |= game.rows[y] << shift
+        shift += CELL_BITS * COLS
+    out.append(ROWS - top)
+    out += packed.to_bytes((shift + 7) // 8, "little")
+    return bytes(out)
+
+
+def load_game(blob):
+    buf = memoryview(blob)
+    if bytes(buf[:3]) != SAVE_MAGIC:
+        raise ValueError("not a save file")
+    version = buf[3]
+    if version not in (1, 2, SAVE_VERSION):
+        raise ValueError(f"unsupported save version {version}")
+    bits = 3 if version == 1 else 4
+    pos = 4
+    values = []
+    for _ in range(10 if version >= 3 else 9):
+        n, pos = _get_varint(buf, pos)
+        values.append(n)
+    if version < 3:
+        values.append(0)  # garbage sent
+    seed, bags_drawn, bag_left, score, lines, level, pieces, last_drop_cells, preview, garbage_sent = values
+    (flags, repeat_dir, cur_kind, cur_x, cur_y, cur_rot, next_kind,
+     gravity_acc, lock_delay, repeat_timer) = _SAVE_HEAD.unpack_from(buf, pos)
+    pos += _SAVE_HEAD.size
+    fixed_gravity = None
+    if flags & SAVE_FIXED_GRAVITY:
+        fixed_gravity, = _F64.unpack_from(buf, pos)
+        pos += _F64.size
+    n = buf[pos]
+    queue = [KINDS[k] for k in buf[pos + 1:pos + 1 + n]]
+    pos += 1 + n
+    rows = buf[pos]
+    pos += 1
+    packed = int.from_bytes(buf[pos:pos + (rows * COLS * bits + 7) // 8], "little")
+
+    game = Tetris(gravity=fixed_gravity, seed=seed, preview=preview)
+    if version >= 3:
+        bag = dealt_bag(seed, bags_drawn - 1)
+    else:
+        rng = random.Random(seed)
+        for _ in range(bags_drawn):
+            bag = new_bag(rng)
+    game.bag, game.bags_drawn = bag[:bag_left], bags_drawn
+    game.queue = deque(queue)
+    game.current = Piece(KINDS[cur_kind])
+    game.current.x, game.current.y, game.current.rot = cur_x, cur_y, cur_rot
+    game.next_piece = Piece(KINDS[next_kind])
+
+    mask = (1 << bits) - 1
+    for y in range(ROWS - 1, ROWS - 1 - rows, -1):
+        row = game.grid[y]
+        for x in range(COLS):
+            code = packed & mask
+            packed >>= bits
+            if code:
+                row[x] = CELL_COLORS[code]
+    game._rebuild_columns()
+    game._rebuild_hash()
+
+    game.score, game.lines, game.level, game.pieces = score, lines, level, pieces
+    game.last_drop_cells, game.garbage_sent = last_drop_cells, garbage_sent
+    game.game_over = bool(flags & SAVE_GAME_OVER)
+    game.paused = bool(flags & SAVE_PAUSED)
+    game.soft_drop = bool(flags & SAVE_SOFT_DROP)
+    game.move_repeat_dir = repeat_dir
+    game.gravity_acc, game.lock_delay, game.move_repeat_timer = gravity_acc, lock_delay, repeat_timer
+    return game
+
+
+def write_save(path, game):
+    """Replace `path` with a save of `game` atomically, so a crash never leaves half a file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(save_game(game))
+    os.replace(tmp, path)
 
 
 # -------------------- Rendering --------------------
+# Set by tools/frameprof.py; main() and draw() report their phases to it.
+PROFILER = None
+
+
 def draw_cell(screen, x, y, color, alpha=255):
     r = pygame.Rect(x, y, CELL, CELL)
     surf = pygame.Surface((CELL, CELL), pygame.SRCALPHA)
@@ -302,155 +798,167 @@ def draw_text(screen, font, s, x, y, color=TEXT):
     screen.blit(img, (x, y))
 
 
-def main():
+def load_fonts():
+    font = pygame.font.SysFont("consolas", 22)
+    big = pygame.font.SysFont("consolas", 36, bold=True)
+    small = pygame.font.SysFont("consolas", 18)
+    return font, big, small
+
+
+def draw(screen, fonts, game):
+    font, big, small = fonts
+
+    # render background
+    screen.fill(BG)
+    ox, oy = 0, TOP_MARGIN
+
+    # field background
+    field_rect = pygame.Rect(ox, oy, COLS * CELL, ROWS * CELL)
+    pygame.draw.rect(screen, GRID_BG, field_rect, border_radius=8)
+
+    # grid lines
+    for x in range(COLS + 1):
+        px = ox + x * CELL
+        pygame.draw.line(screen, GRID_LINE, (px, oy), (px, oy + ROWS * CELL))
+    for y in range(ROWS + 1):
+        py = oy + y * CELL
+        pygame.draw.line(screen, GRID_LINE, (ox, py), (ox + COLS * CELL, py))
+
+    # draw settled blocks
+    for y in range(ROWS):
+        for x in range(COLS):
+            c = game.grid[y][x]
+            if c is not None:
+                draw_cell(screen, ox + x * CELL, oy + y * CELL, c, 255)
+
+    # ghost piece
+    if not game.game_over:
+        gy = game.ghost_y()
+        for bx, by in game.current.blocks(y=gy):
+            if by >= 0:
+                draw_cell(screen, ox + bx * CELL, oy + by * CELL, game.current.color, 70)
+
+    # current piece
+    if not game.game_over:
+        for bx, by in game.current.blocks():
+            if by >= 0:
+                draw_cell(screen, ox + bx * CELL, oy + by * CELL, game.current.color, 255)
+    if PROFILER:
+        PROFILER.lap("board")
+
+    # side panel
+    px = COLS * CELL + 20
+    py = TOP_MARGIN
+
+    draw_text(screen, big, "TETRIS", px, py - 10, TEXT)
+    draw_text(screen, font, f"Score: {game.score}", px, py + 45, TEXT)
+    draw_text(screen, font, f"Lines:  {game.lines}", px, py + 75, TEXT)
+    draw_text(screen, font, f"Level:  {game.level}", px, py + 105, TEXT)
+
+    draw_text(screen, font, "Next:", px, py + 150, TEXT)
+
+    # next piece preview (4x4)
+    preview_x = px
+    preview_y = py + 185
+    pygame.draw.rect(screen, (25, 27, 32), (preview_x, preview_y, 4 * CELL, 4 * CELL), border_radius=8)
+
+    np = game.next_piece
+    for bx, by in np.blocks(x=0, y=0):
+        # center it roughly
+        cx = preview_x + (bx) * CELL
+        cy = preview_y + (by) * CELL
+        draw_cell(screen, cx, cy, np.color, 255)
+
+    # help
+    help_y = py + 340
+    draw_text(screen, small, "Controls:", px, help_y, SUBTEXT)
+    draw_text(screen, small, "←/→ move", px, help_y + 22, SUBTEXT)
+    draw_text(screen, small, "↑ rotate", px, help_y + 44, SUBTEXT)
+    draw_text(screen, small, "↓ soft drop", px, help_y + 66, SUBTEXT)
+    draw_text(screen, small, "Space hard drop", px, help_y + 88, SUBTEXT)
+    draw_text(screen, small, "P pause  |  R restart", px, help_y + 110, SUBTEXT)
+
+    # overlays
+    if game.paused:
+        overlay = pygame.Surface((COLS * CELL, ROWS * CELL), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 140))
+        screen.blit(overlay, (ox, oy))
+        draw_text(screen, big, "PAUSED", ox + 70, oy + 260, (240, 240, 240))
+
+    if game.game_over:
+        overlay = pygame.Surface((COLS * CELL, ROWS * CELL), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 170))
+        screen.blit(overlay, (ox, oy))
+        draw_text(screen, big, "GAME OVER", ox + 35, oy + 230, (255, 210, 210))
+        draw_text(screen, font, "Press R to restart", ox + 45, oy + 280, TEXT)
+    if PROFILER:
+        PROFILER.lap("text")
+
+
+def main(seed=None, save_path=None):
+    """Run the game. With `save_path`, resume from it if it exists and rewrite it after every lock."""
     pygame.init()
     pygame.display.set_caption("Tetris (Python)")
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     clock = pygame.time.Clock()
-
-    font = pygame.font.SysFont("consolas", 22)
-    big = pygame.font.SysFont("consolas", 36, bold=True)
-    small = pygame.font.SysFont("consolas", 18)
-
-    game = Tetris()
-
-    def field_origin():
-        return 0, TOP_MARGIN
-
+    fonts = load_fonts()
+
+    if save_path and os.path.exists(save_path):
+        with open(save_path, "rb") as f:
+            game = load_game(f.read())
+    else:
+        game = Tetris(seed=seed)
+    # one snapshot per spawned piece; Backspace takes back the last piece
+    history = History()
+    history.push(game)
+
+    prof = PROFILER
     running = True
     while running:
         dt = clock.tick(FPS) / 1000.0
+        if prof:
+            prof.start()
 
         for event in pygame.event.get():
+            if prof:
+                prof.handle(event)
             if event.type == pygame.QUIT:
                 running = False
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
+                elif event.key == pygame.K_BACKSPACE and history.rewind(game):
+                    # keys held back then are not necessarily held now
+                    game.soft_drop, game.move_repeat_dir = False, 0
 
-                if event.key == pygame.K_p:
-                    game.paused = not game.paused
-
-                if not game.game_over and not game.paused:
-                    if event.key == pygame.K_LEFT:
-                        game.move(-1)
-                        game.move_repeat_dir = -1
-                        game.move_repeat_timer = 0.0
-                    elif event.key == pygame.K_RIGHT:
-                        game.move(1)
-                        game.move_repeat_dir = 1
-                        game.move_repeat_timer = 0.0
-                    elif event.key == pygame.K_UP:
-                        game.rotate()
-                    elif event.key == pygame.K_DOWN:
-                        game.soft_drop = True
-                    elif event.key == pygame.K_SPACE:
-                        game.hard_drop()
+                key_down(game, event.key)
 
                 if game.game_over and event.key == pygame.K_r:
-                    game = Tetris()
+                    # derive the next seed so a seeded session stays reproducible
+                    game = Tetris(seed=game.rng.getrandbits(32))
+                    history.clear()
+                    history.push(game)
 
             if event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT and game.move_repeat_dir == -1:
-                    game.move_repeat_dir = 0
-                    game.move_repeat_timer = 0.0
-                elif event.key == pygame.K_RIGHT and game.move_repeat_dir == 1:
-                    game.move_repeat_dir = 0
-                    game.move_repeat_timer = 0.0
-                elif event.key == pygame.K_DOWN:
-                    game.soft_drop = False
-
-        # update
-        if not game.paused and not game.game_over:
-            # give soft drop some extra "manual" feel:
-            if game.soft_drop:
-                game.soft_drop_step()
-            game.update(dt)
-
-        # render background
-        screen.fill(BG)
-        ox, oy = field_origin()
-
-        # field background
-        field_rect = pygame.Rect(ox, oy, COLS * CELL, ROWS * CELL)
-        pygame.draw.rect(screen, GRID_BG, field_rect, border_radius=8)
-
-        # grid lines
-        for x in range(COLS + 1):
-            px = ox + x * CELL
-            pygame.draw.line(screen, GRID_LINE, (px, oy), (px, oy + ROWS * CELL))
-        for y in range(ROWS + 1):
-            py = oy + y * CELL
-            pygame.draw.line(screen, GRID_LINE, (ox, py), (ox + COLS * CELL, py))
-
-        # draw settled blocks
-        for y in range(ROWS):
-            for x in range(COLS):
-                c = game.grid[y][x]
-                if c is not None:
-                    draw_cell(screen, ox + x * CELL, oy + y * CELL, c, 255)
-
-        # ghost piece
-        if not game.game_over:
-            gy = game.ghost_y()
-            for bx, by in game.current.blocks(y=gy):
-                if by >= 0:
-                    draw_cell(screen, ox + bx * CELL, oy + by * CELL, game.current.color, 70)
-
-        # current piece
-        if not game.game_over:
-            for bx, by in game.current.blocks():
-                if by >= 0:
-                    draw_cell(screen, ox + bx * CELL, oy + by * CELL, game.current.color, 255)
-
-        # side panel
-        px = COLS * CELL + 20
-        py = TOP_MARGIN
-
-        draw_text(screen, big, "TETRIS", px, py - 10, TEXT)
-        draw_text(screen, font, f"Score: {game.score}", px, py + 45, TEXT)
-        draw_text(screen, font, f"Lines:  {game.lines}", px, py + 75, TEXT)
-        draw_text(screen, font, f"Level:  {game.level}", px, py + 105, TEXT)
-
-        draw_text(screen, font, "Next:", px, py + 150, TEXT)
-
-        # next piece preview (4x4)
-        preview_x = px
-        preview_y = py + 185
-        pygame.draw.rect(screen, (25, 27, 32), (preview_x, preview_y, 4 * CELL, 4 * CELL), border_radius=8)
-
-        np = game.next_piece
-        for bx, by in np.blocks(x=0, y=0):
-            # center it roughly
-            cx = preview_x + (bx) * CELL
-            cy = preview_y + (by) * CELL
-            draw_cell(screen, cx, cy, np.color, 255)
-
-        # help
-        help_y = py + 340
-        draw_text(screen, small, "Controls:", px, help_y, SUBTEXT)
-        draw_text(screen, small, "←/→ move", px, help_y + 22, SUBTEXT)
-        draw_text(screen, small, "↑ rotate", px, help_y + 44, SUBTEXT)
-        draw_text(screen, small, "↓ soft drop", px, help_y + 66, SUBTEXT)
-        draw_text(screen, small, "Space hard drop", px, help_y + 88, SUBTEXT)
-        draw_text(screen, small, "P pause  |  R restart", px, help_y + 110, SUBTEXT)
-
-        # overlays
-        if game.paused:
-            overlay = pygame.Surface((COLS * CELL, ROWS * CELL), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 140))
-            screen.blit(overlay, (ox, oy))
-            draw_text(screen, big, "PAUSED", ox + 70, oy + 260, (240, 240, 240))
-
-        if game.game_over:
-            overlay = pygame.Surface((COLS * CELL, ROWS * CELL), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 170))
-            screen.blit(overlay, (ox, oy))
-            draw_text(screen, big, "GAME OVER", ox + 35, oy + 230, (255, 210, 210))
-            draw_text(screen, font, "Press R to restart", ox + 45, oy + 280, TEXT)
-
+                key_up(game, event.key)
+        if prof:
+            prof.lap("events")
+
+        advance(game, dt)
+        if game.pieces != history.snaps[-1].pieces:
+            history.push(game)
+            if save_path:
+                write_save(save_path, game)
+        if prof:
+            prof.lap("update")
+        draw(screen, fonts, game)
+        if prof:
+            prof.overlay(screen)
         pygame.display.flip()
+        if prof:
+            prof.lap("flip")
+            prof.end()
 
     pygame.quit()
     sys.exit()
@@ -42,9 +42,9 @@ grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
 
 
 class Piece:
-    def __init__(self):
-        self.shape = random.choice(SHAPES)
-        self.color = random.choice(COLORS)
+    def __init__(self, rng=random):
+        self.shape = rng.choice(SHAPES)
+        self.color = rng.choice(COLORS)
         self.x = COLS // 2 - len(self.shape[0]) // 2
         self.y = 0
 
@@ -104,12 +104,13 @@ def draw_piece(piece):
                                   BLOCK, BLOCK))
 
 
-def main():
+def main(seed=None):
+    rng = random.Random(seed)
     run = True
     clock = pygame.time.Clock()
     fall_time = 0
 
-    piece = Piece()
+    piece = Piece(rng)
 
     while run:
         dt = clock.tick(60)
@@ -122,7 +123,7 @@ def main():
             else:
                 place_piece(piece)
                 clear_lines()
-                piece = Piece()
+                piece = Piece(rng)
 
                 if not valid_position(piece):
                     print("Game Over")
@@ -153,7 +154,7 @@ def main():
                 piece.y += 1
             place_piece(piece)
             clear_lines()
-            piece = Piece()
+            piece = Piece(rng)
 
         # Zeichnen
         draw_window()
@@ -1,5 +1,7 @@
+import os
 import pygame
 import random
+import struct
 from dataclasses import dataclass
 
 # -----------------------------
@@ -121,20 +123,32 @@ class Piece:
 
 
 class Bag7:
-    def __init__(self):
+    def __init__(self, seed):
+        self.seed = seed
         self.bag = []
+        self.drawn = 0  # gemischte Beutel; mit dem Seed der ganze Zustand
+
+    @staticmethod
+    def deal(seed, index):
+        # Jeder Beutel hat seinen eigenen RNG, also ohne die vorigen mischbar
+        cards = list(SHAPES.keys())
+        random.Random(f"{seed}:{index}").shuffle(cards)
+        return cards
 
     def next(self):
         if not self.bag:
-            self.bag = list(SHAPES.keys())
-            random.shuffle(self.bag)
+            self.bag = self.deal(self.seed, self.drawn)
+            self.drawn += 1
         return self.bag.pop()
 
 
 class Tetris:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
-        self.bag = Bag7()
+        # Seed => reproduzierbare Folge; self.rng z. B. fuer den Seed des naechsten Spiels
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.bag = Bag7(self.seed)
         self.next_kind = self.bag.next()
         self.piece = self.spawn_piece()
         self.hold_kind = None
@@ -143,6 +157,7 @@ class Tetris:
         self.score = 0
         self.lines = 0
         self.level = 1
+        self.pieces = 0  # gelockte Teile
         self.game_over = False
 
         self.drop_acc = 0.0
@@ -173,6 +188,7 @@ class Tetris:
         for (x, y) in self.piece.cells():
             if y >= 0:
                 self.grid[y][x] = self.piece.kind
+        self.pieces += 1
         cleared = self.clear_lines()
         self.apply_scoring(cleared)
         self.piece = self.spawn_piece()
@@ -260,6 +276,124 @@ class Tetris:
                 break
 
 
+# -----------------------------
+# Save files
+# -----------------------------
+# Layout (little endian): b"TSN", version, varints (seed, bags drawn, cards
+# left in the bag, score, lines, level, pieces), flags, piece (kind, x, y,
+# rot), next kind, hold kind (0xFF = none), drop_acc as f64, stored row
+# count and the bottom rows at 3 bits per cell (0 empty, 1 + kind index).
+# Der Beutel in der Hand wird aus Seed + Beutelnummer neu gemischt; Version 1
+# mischte alle Beutel aus einem RNG (spaetere Beutel laden jetzt neu gemischt).
+SAVE_MAGIC = b"TSN"
+SAVE_VERSION = 2
+KINDS = list(SHAPES)
+NO_HOLD = 0xFF
+
+SAVE_GAME_OVER, SAVE_HOLD_USED = 1, 2
+_SAVE_HEAD = struct.Struct("<BBbbBBBd")
+
+
+def _put_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf, pos):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def save_game(game):
+    """Serialize `game` to a compact bytes blob; ``load_game`` restores it exactly."""
+    out = bytearray(SAVE_MAGIC)
+    out.append(SAVE_VERSION)
+    for n in (game.seed, game.bag.drawn, len(game.bag.bag), game.score, game.lines, game.level, game.pieces):
+        _put_varint(out, n)
+    flags = (SAVE_GAME_OVER if game.game_over else 0) | (SAVE_HOLD_USED if game.hold_used else 0)
+    p = game.piece
+    hold = NO_HOLD if game.hold_kind is None else KINDS.index(game.hold_kind)
+    out += _SAVE_HEAD.pack(flags, KINDS.index(p.kind), p.x, p.y, p.rot,
+                           KINDS.index(game.next_kind), hold, game.drop_acc)
+
+    top = next((y for y, row in enumerate(game.grid) if any(c is not None for c in row)), ROWS)
+    packed = 0
+    shift = 0
+    for y in range(ROWS - 1, top - 1, -1):
+        for kind in game.grid[y]:
+            if kind is not None:
+                packed |= (KINDS.index(kind) + 1) << shift
+            shift += 3
+    out.append(ROWS - top)
+    out += packed.to_bytes((shift + 7) // 8, "little")
+    return bytes(out)
+
+
+def load_game(blob):
+    buf = memoryview(blob)
+    if bytes(buf[:3]) != SAVE_MAGIC:
+        raise ValueError("not a save file")
+    version = buf[3]
+    if version not in (1, SAVE_VERSION):
+        raise ValueError(f"unsupported save version {version}")
+    pos = 4
+    values = []
+    for _ in range(7):
+        n, pos = _get_varint(buf, pos)
+        values.append(n)
+    seed, drawn, bag_left, score, lines, level, pieces = values
+    flags, kind, x, y, rot, next_kind, hold, drop_acc = _SAVE_HEAD.unpack_from(buf, pos)
+    pos += _SAVE_HEAD.size
+    rows = buf[pos]
+    pos += 1
+    packed = int.from_bytes(buf[pos:pos + (rows * COLS * 3 + 7) // 8], "little")
+
+    game = Tetris(seed=seed)
+    cards = []
+    if version >= 2 and drawn:
+        cards = Bag7.deal(seed, drawn - 1)
+    elif version == 1:
+        rng = random.Random(seed)
+        for _ in range(drawn):
+            cards = list(SHAPES.keys())
+            rng.shuffle(cards)
+    bag = Bag7(seed)
+    bag.bag, bag.drawn = cards[:bag_left], drawn
+    game.bag = bag
+    game.piece = Piece(kind=KINDS[kind], x=x, y=y, rot=rot)
+    game.next_kind = KINDS[next_kind]
+    game.hold_kind = None if hold == NO_HOLD else KINDS[hold]
+    game.hold_used = bool(flags & SAVE_HOLD_USED)
+    game.game_over = bool(flags & SAVE_GAME_OVER)
+    game.score, game.lines, game.level, game.pieces = score, lines, level, pieces
+    game.drop_acc = drop_acc
+
+    for y in range(ROWS - 1, ROWS - 1 - rows, -1):
+        row = game.grid[y]
+        for x in range(COLS):
+            code = packed & 7
+            packed >>= 3
+            if code:
+                row[x] = KINDS[code - 1]
+    return game
+
+
+def write_save(path, game):
+    """Replace `path` with a save of `game` atomically, so a crash never leaves half a file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(save_game(game))
+    os.replace(tmp, path)
+
+
 def draw_cell(screen, x, y, color):
     r = pygame.Rect(x * CELL, y * CELL, CELL, CELL)
     pygame.draw.rect(screen, color, r)
@@ -297,16 +431,79 @@ def mini_draw(screen, kind, ox, oy):
         pygame.draw.rect(screen, (0, 0, 0), r, 1)
 
 
-def main():
+def load_fonts():
+    font = pygame.font.SysFont("consolas", 22)
+    small = pygame.font.SysFont("consolas", 18)
+    return font, small
+
+
+def draw(screen, fonts, game):
+    font, small = fonts
+    screen.fill(BG)
+
+    # Playfield
+    draw_board(screen, game)
+    if not game.game_over:
+        draw_piece(screen, game.piece)
+    draw_grid_lines(screen)
+
+    # Side panel
+    sx = PLAY_W + 16
+    screen.blit(font.render("NEXT", True, TEXT), (sx, 16))
+    mini_draw(screen, game.next_kind, sx, 48)
+
+    screen.blit(font.render("HOLD", True, TEXT), (sx, 140))
+    if game.hold_kind:
+        mini_draw(screen, game.hold_kind, sx, 172)
+    else:
+        screen.blit(small.render("(press C)", True, (160, 160, 170)), (sx, 175))
+
+    screen.blit(font.render(f"SCORE {game.score}", True, TEXT), (sx, 280))
+    screen.blit(font.render(f"LINES {game.lines}", True, TEXT), (sx, 312))
+    screen.blit(font.render(f"LEVEL {game.level}", True, TEXT), (sx, 344))
+
+    # Help
+    help_lines = [
+        "←/→ Move",
+        "↑ Rotate",
+        "↓ Soft/Fast drop",
+        "Space Hard drop",
+        "C Hold",
+        "R Restart (game over)",
+        "Esc Quit",
+    ]
+    yy = 410
+    screen.blit(font.render("CONTROLS", True, TEXT), (sx, yy))
+    yy += 30
+    for h in help_lines:
+        screen.blit(small.render(h, True, (190, 190, 205)), (sx, yy))
+        yy += 22
+
+    if game.game_over:
+        overlay = pygame.Surface((PLAY_W, PLAY_H), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 160))
+        screen.blit(overlay, (0, 0))
+        msg1 = font.render("GAME OVER", True, (255, 255, 255))
+        msg2 = small.render("Press R to restart", True, (230, 230, 240))
+        screen.blit(msg1, (PLAY_W // 2 - msg1.get_width() // 2, PLAY_H // 2 - 30))
+        screen.blit(msg2, (PLAY_W // 2 - msg2.get_width() // 2, PLAY_H // 2 + 5))
+
+
+def main(seed=None, save_path=None):
+    # Mit save_path: Spielstand laden, falls vorhanden, und nach jedem Lock neu schreiben
     pygame.init()
     screen = pygame.display.set_mode((W, H))
     pygame.display.set_caption("Tetris (Python / pygame)")
     clock = pygame.time.Clock()
-    font = pygame.font.SysFont("consolas", 22)
-    small = pygame.font.SysFont("consolas", 18)
+    fonts = load_fonts()
 
-    game = Tetris()
+    if save_path and os.path.exists(save_path):
+        with open(save_path, "rb") as f:
+            game = load_game(f.read())
+    else:
+        game = Tetris(seed=seed)
     fast_drop = False
+    saved_pieces = game.pieces
 
     while True:
         dt = clock.tick(FPS) / 1000.0
@@ -323,7 +520,8 @@ def main():
 
                 if game.game_over:
                     if event.key == pygame.K_r:
-                        game = Tetris()
+                        # Neuer Seed aus dem alten => Sitzung bleibt reproduzierbar
+                        game = Tetris(seed=game.rng.getrandbits(32))
                     continue
 
                 if event.key == pygame.K_LEFT:
@@ -344,57 +542,11 @@ def main():
                     fast_drop = False
 
         game.update(dt, fast_drop=fast_drop)
+        if save_path and game.pieces != saved_pieces:
+            saved_pieces = game.pieces
+            write_save(save_path, game)
 
-        # Render
-        screen.fill(BG)
-
-        # Playfield
-        draw_board(screen, game)
-        if not game.game_over:
-            draw_piece(screen, game.piece)
-        draw_grid_lines(screen)
-
-        # Side panel
-        sx = PLAY_W + 16
-        screen.blit(font.render("NEXT", True, TEXT), (sx, 16))
-        mini_draw(screen, game.next_kind, sx, 48)
-
-        screen.blit(font.render("HOLD", True, TEXT), (sx, 140))
-        if game.hold_kind:
-            mini_draw(screen, game.hold_kind, sx, 172)
-        else:
-            screen.blit(small.render("(press C)", True, (160, 160, 170)), (sx, 175))
-
-        screen.blit(font.render(f"SCORE {game.score}", True, TEXT), (sx, 280))
-        screen.blit(font.render(f"LINES {game.lines}", True, TEXT), (sx, 312))
-        screen.blit(font.render(f"LEVEL {game.level}", True, TEXT), (sx, 344))
-
-        # Help
-        help_lines = [
-            "←/→ Move",
-            "↑ Rotate",
-            "↓ Soft/Fast drop",
-            "Space Hard drop",
-            "C Hold",
-            "R Restart (game over)",
-            "Esc Quit",
-        ]
-        yy = 410
-        screen.blit(font.render("CONTROLS", True, TEXT), (sx, yy))
-        yy += 30
-        for h in help_lines:
-            screen.blit(small.render(h, True, (190, 190, 205)), (sx, yy))
-            yy += 22
-
-        if game.game_over:
-            overlay = pygame.Surface((PLAY_W, PLAY_H), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 160))
-            screen.blit(overlay, (0, 0))
-            msg1 = font.render("GAME OVER", True, (255, 255, 255))
-            msg2 = small.render("Press R to restart", True, (230, 230, 240))
-            screen.blit(msg1, (PLAY_W // 2 - msg1.get_width() // 2, PLAY_H // 2 - 30))
-            screen.blit(msg2, (PLAY_W // 2 - msg2.get_width() // 2, PLAY_H // 2 + 5))
-
+        draw(screen, fonts, game)
         pygame.display.flip()
 
 
@@ -36,6 +36,9 @@ SHAPES = [
 # Farben für die Tetrominos
 COLORS = [CYAN, BLUE, ORANGE, YELLOW, GREEN, MAGENTA, RED]
 
+# Wird von tools/frameprof.py gesetzt; run() und draw() melden ihre Phasen daran
+PROFILER = None
+
 class Tetromino:
     def __init__(self, x, y, shape):
         self.x = x
@@ -45,7 +48,7 @@ class Tetromino:
         self.rotation = 0
 
 class TetrisGame:
-    def __init__(self):
+    def __init__(self, seed=None):
         # Spielfeldgröße
         self.width = 10
         self.height = 20
@@ -59,6 +62,10 @@ class TetrisGame:
         self.window = pygame.display.set_mode((self.window_width, self.window_height))
         pygame.display.set_caption("Tetris")
         
+        # Eigener Zufallsgenerator pro Spiel (Seed => reproduzierbare Folge)
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        
         # Spielfeld initialisieren
         self.grid = [[0 for _ in range(self.width)] for _ in range(self.height)]
         
@@ -83,12 +90,12 @@ class TetrisGame:
     def new_piece(self):
         """Erstellt ein neues zufälliges Tetromino"""
         if self.next_piece is None:
-            shape = random.choice(SHAPES)
+            shape = self.rng.choice(SHAPES)
             self.current_piece = Tetromino(self.width // 2 - 2, 0, shape)
-            self.next_piece = Tetromino(self.width // 2 - 2, 0, random.choice(SHAPES))
+            self.next_piece = Tetromino(self.width // 2 - 2, 0, self.rng.choice(SHAPES))
         else:
             self.current_piece = self.next_piece
-            self.next_piece = Tetromino(self.width // 2 - 2, 0, random.choice(SHAPES))
+            self.next_piece = Tetromino(self.width // 2 - 2, 0, self.rng.choice(SHAPES))
         
         # Überprüfen auf Game Over
         if self.check_collision():
@@ -216,6 +223,8 @@ class TetrisGame:
                             (x, y, self.cell_size, self.cell_size),
                             1
                         )
+        if PROFILER:
+            PROFILER.lap("board")
         
         # Nächstes Tetromino zeichnen (Miniaturansicht)
         if self.next_piece:
@@ -261,20 +270,30 @@ class TetrisGame:
             game_over_text = font.render("GAME OVER", True, RED)
             self.window.blit(game_over_text, (self.width * self.cell_size // 2 - 100, 
                                            self.height * self.cell_size // 2 - 25))
+        if PROFILER:
+            PROFILER.lap("text")
+            PROFILER.overlay(self.window)
         
         pygame.display.flip()
+        if PROFILER:
+            PROFILER.lap("flip")
 
     def run(self):
         """Hauptspielschleife"""
         clock = pygame.time.Clock()
+        prof = PROFILER
         
         while not self.game_over:
             # Zeitmanagement
             dt = clock.tick(60) / 1000.0  # Delta-Time in Sekunden
+            if prof:
+                prof.start()
             self.fall_time += dt
             
             # Ereignisse verarbeiten
             for event in pygame.event.get():
+                if prof:
+                    prof.handle(event)
                 if event.type == pygame.QUIT:
                     self.game_over = True
                     return
@@ -293,32 +312,46 @@ class TetrisGame:
                         while self.move(0, 1):
                             pass
                         self.lock_piece()
+            if prof:
+                prof.lap("events")
             
             # Automatisches Fallen
             if self.fall_time >= self.fall_speed:
                 self.fall_time = 0
                 if not self.move(0, 1):
                     self.lock_piece()
+            if prof:
+                prof.lap("update")
             
             # Zeichnen
             self.draw()
+            if prof:
+                prof.end()
         
         # Game Over - auf Benutzer warten
         waiting = True
         while waiting:
+            if prof:
+                prof.start()
             for event in pygame.event.get():
+                if prof:
+                    prof.handle(event)
                 if event.type == pygame.QUIT:
                     waiting = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:
-                        # Spiel neu starten
-                        self.__init__()
+                        # Spiel neu starten (neuer Seed aus dem alten => reproduzierbar)
+                        self.__init__(self.rng.getrandbits(32))
                         self.run()
                         waiting = False
                     elif event.key == pygame.K_q:
                         waiting = False
+            if prof:
+                prof.lap("events")
             
             self.draw()
+            if prof:
+                prof.end()
             clock.tick(60)
 
 if __name__ == "__main__":
@@ -0,0 +1,435 @@
+"""Agent server: bots in other processes play headless games over a socket.
+
+The server hosts any number of GPT-5.2 (thinking) games and advances all
+of them one engine frame per tick at `--tps` (default FPS), gravity
+included. So a bot that answers slowly loses time, just as a player would.
+It speaks line-delimited JSON over TCP. Client to server:
+
+    {"op": "new", "seed": 7, "ref": "a"}        -> {"created": 3, "ref": "a"}
+    {"op": "act", "id": 3, "seq": 12, "keys": ["rotate", "left", "drop"]}
+    {"op": "reset", "id": 3, "seed": 8}         -> start the session's game over
+    {"op": "close", "id": 3}
+    {"op": "stats", "reset": true}              -> server counters (and start them over)
+
+The keys of an ``act`` are ``placements.py``'s path vocabulary ("left",
+"right", "rotate", "down", "drop"), all applied at the start of the next
+tick. A placement path from ``placements.drops`` therefore plays a whole
+piece in one message. Frame-by-frame taps work too.
+
+Server to client: one line per tick per connection, holding the state of
+every session of that connection that changed during the tick:
+
+    {"tick": 812, "states": [{"id": 3, "ack": 12, "columns": [...], "piece": ["T", 3, 5, 0],
+      "next": "I", "queue": "OSZJLT", "score": 840, "lines": 6, "level": 1, "pieces": 31, "over": false}]}
+
+``columns`` are the engine's per-column bitmasks (bit y = row y filled,
+bit ROWS = floor), which is what ``placements`` and ``autoplay`` work on.
+``ack`` is the last ``seq`` applied. Changes are picked up through the
+engine's listeners, so idle sessions cost nothing to push.
+
+Backpressure: while a connection's unsent output is above
+`WRITE_LIMIT`, its pushes are held back. Only the newest state of each
+changed session is kept, and it goes out in one line once the socket
+drains. A client that stops reading therefore costs one state per session.
+Reading stops too, so a client cannot queue up unbounded actions.
+
+    python tetris/tools/agentserver.py serve --port 7200
+    python tetris/tools/agentserver.py bench --sessions 100,200,300,400,600 --connections 8 --seconds 5
+
+``bench`` starts a server subprocess. At each session count it connects
+bots (``autoplay`` heuristic over ``placements.drops``, one ``act`` per
+piece). It reports the round trip from sending an action to receiving the
+state that acknowledges it, the server's tick cost against the tick
+budget, and the server's share of the CPU and time per session-tick.
+
+It ends with sessions per core: the largest session count whose tick p99
+stayed within budget, divided by the server's CPU share at that count.
+The bots share the machine, so the server rarely has a core to itself;
+the division scales what it did hold up to a whole core.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import autoplay
+import engines
+import placements
+
+engine = placements.engine
+KEYS = {placements.LEFT, placements.RIGHT, placements.ROTATE, placements.DOWN, placements.DROP}
+WRITE_LIMIT = 64 * 1024
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# -------------------- Server --------------------
+class Session:
+    __slots__ = ("id", "game", "keys", "ack", "conn")
+
+    def __init__(self, id, conn, seed):
+        self.id = id
+        self.conn = conn
+        self.keys = []
+        self.ack = 0
+        self.start(seed)
+
+    def start(self, seed):
+        self.game = engine.Tetris(seed=seed)
+        self.game.listeners.append(self._changed)
+        self.keys.clear()
+        self.conn.dirty.add(self)
+
+    def _changed(self, game, event):
+        self.conn.dirty.add(self)
+
+    def state(self):
+        g = self.game
+        cur = g.current
+        return {"id": self.id, "ack": self.ack, "columns": g.columns, "piece": [cur.kind, cur.x, cur.y, cur.rot],
+                "next": g.next_piece.kind, "queue": "".join(g.queue), "score": g.score, "lines": g.lines,
+                "level": g.level, "pieces": g.pieces, "over": g.game_over}
+
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.sessions = {}
+        self.dirty = set()
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def congested(self):
+        return self.writer.transport.get_write_buffer_size() > WRITE_LIMIT
+
+
+class AgentServer:
+    def __init__(self, tps=engine.FPS):
+        self.tps = tps
+        self.dt = 1.0 / tps
+        self.connections = set()
+        self.next_id = 1
+        self.tick = 0
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.tick_ns = []
+        self.pushes = self.held_back = self.actions = 0
+        self.bytes_out = 0
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        self.session_ticks = 0
+
+    # ---- ticks ----
+    def step(self):
+        for conn in self.connections:
+            for s in conn.sessions.values():
+                game = s.game
+                if s.keys:
+                    for key in s.keys:
+                        placements.step(game, key)
+                    s.keys.clear()
+                    conn.dirty.add(s)
+                engine.advance(game, self.dt)
+            self.session_ticks += len(conn.sessions)
+
+    def push(self):
+        for conn in self.connections:
+            if conn.congested():
+                conn.writable.clear()
+                self.held_back += bool(conn.dirty)
+                continue
+            conn.writable.set()
+            if not conn.dirty:
+                continue
+            line = json.dumps({"tick": self.tick, "states": [s.state() for s in conn.dirty]},
+                              separators=(",", ":")).encode() + b"\n"
+            conn.dirty.clear()
+            conn.writer.write(line)
+            self.pushes += 1
+            self.bytes_out += len(line)
+
+    async def run(self, seconds=None):
+        loop = asyncio.get_running_loop()
+        start = next_tick = loop.time()
+        while seconds is None or loop.time() - start < seconds:
+            t = time.perf_counter_ns()
+            self.step()
+            self.push()
+            self.tick_ns.append(time.perf_counter_ns() - t)
+            self.tick += 1
+            next_tick += self.dt
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    # ---- clients ----
+    def stats(self):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        sessions = sum(len(c.sessions) for c in self.connections)
+        return {
+            "sessions": sessions, "ticks": len(self.tick_ns), "wall_s": wall, "cpu_s": cpu,
+            "tick_ms_p50": _percentile(self.tick_ns, 0.5) / 1e6, "tick_ms_p99": _percentile(self.tick_ns, 0.99) / 1e6,
+            "cpu_us_per_session_tick": cpu / max(1, self.session_ticks) * 1e6,
+            "pushes": self.pushes, "held_back": self.held_back, "actions": self.actions, "bytes_out": self.bytes_out,
+        }
+
+    def _reply(self, conn, msg):
+        conn.writer.write(json.dumps(msg).encode() + b"\n")
+
+    def handle_message(self, conn, msg):
+        """Apply one client message. Malformed ones get an error reply; they never raise."""
+        if not isinstance(msg, dict):
+            self._reply(conn, {"error": "expected a JSON object"})
+            return
+        op = msg.get("op")
+        seed = msg.get("seed")
+        if seed is not None and not _is_int(seed):
+            self._reply(conn, {"error": f"seed must be an integer, not {seed!r}"})
+            return
+        if op == "new":
+            s = Session(self.next_id, conn, seed)
+            self.next_id += 1
+            conn.sessions[s.id] = s
+            self._reply(conn, {"created": s.id, "ref": msg.get("ref")})
+            return
+        if op == "stats":
+            self._reply(conn, {"stats": self.stats()})
+            if msg.get("reset"):
+                self._reset_stats()
+            return
+        sid = msg.get("id")
+        s = conn.sessions.get(sid) if _is_int(sid) else None
+        if s is None:
+            self._reply(conn, {"error": f"no session {sid!r}"})
+        elif op == "act":
+            keys = msg.get("keys", [])
+            seq = msg.get("seq", s.ack)
+            if not isinstance(keys, list) or not all(isinstance(k, str) and k in KEYS for k in keys):
+                self._reply(conn, {"error": f"keys must be a list of {sorted(KEYS)}, not {keys!r}", "id": s.id})
+                return
+            if not _is_int(seq):
+                self._reply(conn, {"error": f"seq must be an integer, not {seq!r}", "id": s.id})
+                return
+            s.keys.extend(keys)
+            s.ack = seq
+            self.actions += 1
+        elif op == "reset":
+            s.start(seed)
+        elif op == "close":
+            del conn.sessions[s.id]
+            conn.dirty.discard(s)
+        else:
+            self._reply(conn, {"error": f"unknown op {op!r}"})
+
+    async def handle(self, reader, writer):
+        conn = Connection(writer)
+        writer.transport.set_write_buffer_limits(high=WRITE_LIMIT)
+        self.connections.add(conn)
+        try:
+            while True:
+                # don't take more work from a client that isn't reading its states
+                await conn.writable.wait()
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                except ValueError:
+                    self._reply(conn, {"error": "bad json"})
+                    continue
+                self.handle_message(conn, msg)
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(conn)
+            writer.close()
+
+
+async def serve(host, port, tps, seconds):
+    server = AgentServer(tps)
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"agent server on {host}:{port} at {tps} ticks/s", flush=True)
+    try:
+        await server.run(seconds)
+    finally:
+        listener.close()
+
+
+# -------------------- Benchmark client --------------------
+class Bot:
+    """Client side of one session: one act per piece."""
+    __slots__ = ("id", "seed", "seq", "sent_at", "pieces")
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.id = None
+        self.seq = 0
+        self.sent_at = None
+        self.pieces = -1
+
+
+def choose(state):
+    columns = tuple(state["columns"])
+    kind = state["piece"][0]
+    options = placements.drops(columns, kind)
+    if not options:
+        return [placements.DROP]
+    return list(max(options, key=lambda p: autoplay.evaluate(columns, p.cells)).path)
+
+
+async def agent(host, port, sessions, seed, rtt_ns, stop):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 22)
+    bots = [Bot(seed + i) for i in range(sessions)]
+    by_id = {}
+    for i, bot in enumerate(bots):
+        writer.write(json.dumps({"op": "new", "seed": bot.seed, "ref": i}).encode() + b"\n")
+    clock = time.perf_counter_ns
+    try:
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            msg = json.loads(line)
+            if "created" in msg:
+                bot = bots[msg["ref"]]
+                bot.id = msg["created"]
+                by_id[bot.id] = bot
+                continue
+            out = []
+            for state in msg.get("states", ()):
+                bot = by_id[state["id"]]
+                now = clock()
+                if bot.sent_at is not None and state["ack"] >= bot.seq:
+                    rtt_ns.append(now - bot.sent_at)
+                    bot.sent_at = None
+                if state["over"]:
+                    bot.seed += 1000
+                    bot.pieces = -1
+                    out.append({"op": "reset", "id": bot.id, "seed": bot.seed})
+                elif state["pieces"] != bot.pieces and bot.sent_at is None:
+                    bot.pieces = state["pieces"]
+                    bot.seq += 1
+                    bot.sent_at = now
+                    out.append({"op": "act", "id": bot.id, "seq": bot.seq, "keys": choose(state)})
+            if out:
+                writer.write(b"".join(json.dumps(m).encode() + b"\n" for m in out))
+                await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def request_stats(host, port, reset):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(json.dumps({"op": "stats", "reset": reset}).encode() + b"\n")
+    stats = json.loads(await reader.readline())["stats"]
+    writer.close()
+    return stats
+
+
+async def bench_level(host, port, sessions, connections, seconds, seed, tps):
+    rtt_ns = []
+    stop = asyncio.Event()
+    per_conn = [sessions // connections + (i < sessions % connections) for i in range(connections)]
+    tasks = [asyncio.ensure_future(agent(host, port, n, seed + 100000 * i, rtt_ns, stop))
+             for i, n in enumerate(per_conn) if n]
+    await asyncio.sleep(1.0)  # let every session start
+    await request_stats(host, port, reset=True)
+    rtt_ns.clear()
+    await asyncio.sleep(seconds)
+    stats = await request_stats(host, port, reset=False)
+    stop.set()
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    budget_ms = 1e3 / tps
+    within = stats["tick_ms_p99"] <= budget_ms
+    over = "within" if within else "OVER"
+    share = stats["cpu_s"] / stats["wall_s"]
+    print(f"{sessions:5d} sessions: rtt p50 {_percentile(rtt_ns, 0.5) / 1e6:6.2f} ms  "
+          f"p99 {_percentile(rtt_ns, 0.99) / 1e6:6.2f} ms  ({len(rtt_ns) / seconds:,.0f} acts/s)  "
+          f"tick p50 {stats['tick_ms_p50']:5.2f} ms  p99 {stats['tick_ms_p99']:5.2f} ms "
+          f"({over} the {budget_ms:.1f} ms budget)  {stats['ticks'] / stats['wall_s']:4.0f} ticks/s  "
+          f"server CPU {share:4.0%}, {stats['cpu_us_per_session_tick']:5.1f} us/session-tick  "
+          f"held back {stats['held_back']}")
+    return within, share
+
+
+def sessions_per_core(levels):
+    """(sessions, CPU share, sessions per core) at the largest count that stayed within budget.
+
+    `levels` holds (sessions, within budget, CPU share); None if no count did.
+    """
+    held = [(n, share) for n, within, share in levels if within and share > 0]
+    if not held:
+        return None
+    n, share = max(held)
+    return n, share, n / share
+
+
+async def _wait_for(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host headless games for bots over a socket")
+    parser.add_argument("mode", choices=("serve", "bench"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7200)
+    parser.add_argument("--tps", type=int, default=engine.FPS, help="ticks per second")
+    parser.add_argument("--seconds", type=float, help="serve: stop after this long; bench: per session count")
+    parser.add_argument("--sessions", default="100,200,300,400,600", help="comma-separated session counts")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    engines.headless()
+
+    if args.mode == "serve":
+        asyncio.run(serve(args.host, args.port, args.tps, args.seconds))
+        return
+
+    counts = [int(n) for n in args.sessions.split(",")]
+    seconds = args.seconds or 5.0
+    server = subprocess.Popen([sys.executable, __file__, "serve", "--host", args.host,
+                               "--port", str(args.port), "--tps", str(args.tps)])
+    levels = []
+    try:
+        asyncio.run(_wait_for(args.host, args.port))
+        for n in counts:
+            levels.append((n, *asyncio.run(
+                bench_level(args.host, args.port, n, args.connections, seconds, args.seed, args.tps))))
+    finally:
+        server.terminate()
+        server.wait()
+    capacity = sessions_per_core(levels)
+    if capacity is None:
+        print(f"sessions per core: unknown, no session count kept the tick p99 within {1e3 / args.tps:.1f} ms")
+    else:
+        n, share, per_core = capacity
+        print(f"sessions per core: {per_core:,.0f} ({n} sessions within budget at {share:.0%} server CPU)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Seekable game archive for the GPT-5.2 (thinking) ``Tetris`` engine.
+
+An archive holds one game as a stream of per-frame input records with a
+full-state keyframe every `interval` locked pieces, and ends with an
+index of those keyframes. Readers map the file with ``mmap``. Seeking to
+piece N restores the nearest keyframe at or before N and replays the
+few frames after it, so it never reads the game from the start.
+
+    python tetris/tools/archive.py convert game.trp game.tra
+    python tetris/tools/archive.py seek game.tra 40000
+
+Layout (little endian)::
+
+    b"TRA" version u16 interval
+    records:   frame    = u8 n_keys, varint dt_ms, n_keys * u8 (key | 0x80 on release)
+               keyframe = 0xFF, u32 length, state
+    index:     per keyframe: u32 piece, u32 frame, u64 offset
+    trailer:   u64 index offset, u32 keyframes, b"TRAX"
+"""
+import argparse
+import bisect
+import math
+import mmap
+import struct
+import time
+from collections import deque
+
+import engines
+from replay import (EV_KEYDOWN, EV_QUIT, OP_EVENTS, OP_NO_EVENTS, OP_RAWTIME, OP_TICK, TapeReader,
+                    read_varint, write_varint)
+
+IMPL = "with_thinking_gpt_5.2"
+MAGIC = b"TRA"
+VERSION = 3  # 3: no RNG state, bags are dealt from the seed and bags drawn
+TRAILER_MAGIC = b"TRAX"
+KEYFRAME_TAG = 0xFF
+RELEASE = 0x80
+
+_HEADER = struct.Struct("<3sBH")
+_INDEX = struct.Struct("<IIQ")
+_TRAILER = struct.Struct("<QI4s")
+_STATE = struct.Struct("<IIQIIHBbbBBBbddddHB")
+_COUNTERS = struct.Struct("<II")
+
+FLAG_GAME_OVER, FLAG_PAUSED, FLAG_SOFT_DROP = 1, 2, 4
+
+
+def _engine():
+    engines.headless()
+    return engines.load(IMPL)
+
+
+def control_keys(pygame):
+    """Keys the engine reacts to, in archive order (index = key code)."""
+    return [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE, pygame.K_p]
+
+
+# -------------------- Keyframes --------------------
+def encode_state(game, frame):
+    m = _engine()
+    code = {kind: i for i, kind in enumerate(m.KINDS)}
+    flags = (FLAG_GAME_OVER * game.game_over) | (FLAG_PAUSED * game.paused) | (FLAG_SOFT_DROP * game.soft_drop)
+    cur = game.current
+    out = bytearray(_STATE.pack(
+        game.pieces, frame, game.seed, game.score, game.lines, game.level,
+        code[cur.kind], cur.x, cur.y, cur.rot, code[game.next_piece.kind], flags,
+        game.move_repeat_dir, game.gravity_acc, game.lock_delay, game.move_repeat_timer,
+        math.nan if game.fixed_gravity is None else game.fixed_gravity,
+        game.last_drop_cells, game.preview,
+    ))
+    for seq in (game.queue, game.bag):
+        out.append(len(seq))
+        out += bytes(code[kind] for kind in seq)
+    out += bytes(0 if c is None else m.CELL_CODES[c] for row in game.grid for c in row)
+    out += _COUNTERS.pack(game.bags_drawn, game.garbage_sent)
+    return bytes(out)
+
+
+def decode_state(buf, offset=0):
+    """Rebuild a ``Tetris`` from a keyframe; returns (game, frame number)."""
+    m = _engine()
+    kinds = m.KINDS
+    (pieces, frame, seed, score, lines, level, cur_kind, cur_x, cur_y, cur_rot, next_kind,
+     flags, repeat_dir, gravity_acc, lock_delay, repeat_timer, fixed_gravity,
+     last_drop_cells, preview) = _STATE.unpack_from(buf, offset)
+    pos = offset + _STATE.size
+
+    game = m.Tetris(seed=seed, preview=preview)
+    seqs = []
+    for _ in range(2):
+        n = buf[pos]
+        seqs.append([kinds[i] for i in buf[pos + 1:pos + 1 + n]])
+        pos += 1 + n
+    game.queue = deque(seqs[0])
+    game.bag = seqs[1]
+
+    cells = buf[pos:pos + m.ROWS * m.COLS]
+    pos += m.ROWS * m.COLS
+    game.grid = [
+        [None if c == 0 else m.CELL_COLORS[c] for c in cells[y * m.COLS:(y + 1) * m.COLS]]
+        for y in range(m.ROWS)
+    ]
+    game._rebuild_columns()
+
+    game.bags_drawn, game.garbage_sent = _COUNTERS.unpack_from(buf, pos)
+
+    game.current = m.Piece(kinds[cur_kind])
+    game.current.x, game.current.y, game.current.rot = cur_x, cur_y, cur_rot
+    game.next_piece = m.Piece(kinds[next_kind])
+    game._rebuild_hash()
+    game.pieces, game.score, game.lines, game.level = pieces, score, lines, level
+    game.game_over = bool(flags & FLAG_GAME_OVER)
+    game.paused = bool(flags & FLAG_PAUSED)
+    game.soft_drop = bool(flags & FLAG_SOFT_DROP)
+    game.move_repeat_dir = repeat_dir
+    game.gravity_acc, game.lock_delay, game.move_repeat_timer = gravity_acc, lock_delay, repeat_timer
+    game.fixed_gravity = None if math.isnan(fixed_gravity) else fixed_gravity
+    game.last_drop_cells = last_drop_cells
+    return game, frame
+
+
+# -------------------- Writing --------------------
+class ArchiveWriter:
+    """Drive a game frame by frame and archive it.
+
+    ``frame(dt_ms, keys)`` applies the key presses/releases exactly like
+    ``main()`` does, advances the engine and appends the frame record.
+    """
+
+    def __init__(self, path, game, interval=50):
+        m = _engine()
+        self.m = m
+        self.keys = control_keys(m.pygame)
+        self.game = game
+        self.interval = interval
+        self.frames = 0
+        self.index = []
+        self.f = open(path, "wb")
+        self.buf = bytearray(_HEADER.pack(MAGIC, VERSION, interval))
+        self.offset = 0
+        self._keyframe()
+
+    def _keyframe(self):
+        state = encode_state(self.game, self.frames)
+        self.index.append((self.game.pieces, self.frames, self.offset + len(self.buf)))
+        self.buf.append(KEYFRAME_TAG)
+        self.buf += struct.pack("<I", len(state))
+        self.buf += state
+        self.next_keyframe = (self.game.pieces // self.interval + 1) * self.interval
+
+    def frame(self, dt_ms, keys=()):
+        """`keys` holds (key, down) pairs; keys outside control_keys() are ignored."""
+        m, game = self.m, self.game
+        codes = []
+        for key, down in keys:
+            if key not in self.keys:
+                continue
+            codes.append(self.keys.index(key) | (0 if down else RELEASE))
+            if down:
+                m.key_down(game, key)
+            else:
+                m.key_up(game, key)
+        m.advance(game, dt_ms / 1000.0)
+        self.frames += 1
+
+        self.buf.append(len(codes))
+        write_varint(self.buf, dt_ms)
+        self.buf += bytes(codes)
+        if game.pieces >= self.next_keyframe:
+            self._keyframe()
+        if len(self.buf) >= 1 << 16:
+            self.flush()
+
+    def flush(self):
+        self.f.write(self.buf)
+        self.offset += len(self.buf)
+        self.buf.clear()
+
+    def close(self):
+        index_offset = self.offset + len(self.buf)
+        for entry in self.index:
+            self.buf += _INDEX.pack(*entry)
+        self.buf += _TRAILER.pack(index_offset, len(self.index), TRAILER_MAGIC)
+        self.flush()
+        self.f.close()
+
+
+# -------------------- Reading --------------------
+class ArchiveReader:
+    def __init__(self, path):
+        self.f = open(path, "rb")
+        self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.interval = _HEADER.unpack_from(self.mm, 0)
+        index_offset, count, trailer = _TRAILER.unpack_from(self.mm, len(self.mm) - _TRAILER.size)
+        if magic != MAGIC or version != VERSION or trailer != TRAILER_MAGIC:
+            raise ValueError("not a game archive (or unsupported version)")
+        self.end = index_offset
+        self.index = [_INDEX.unpack_from(self.mm, index_offset + i * _INDEX.size) for i in range(count)]
+        self.index_pieces = [entry[0] for entry in self.index]
+
+    def close(self):
+        self.mm.close()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def pieces(self):
+        return self.index_pieces[-1]
+
+    def frames(self, pos):
+        """Yield (dt_ms, [(key index, down)]) from byte `pos`, skipping keyframes."""
+        mm, end = self.mm, self.end
+        while pos < end:
+            n = mm[pos]
+            if n == KEYFRAME_TAG:
+                (length,) = struct.unpack_from("<I", mm, pos + 1)
+                pos += 5 + length
+                continue
+            dt_ms, pos = read_varint(mm, pos + 1)
+            codes = mm[pos:pos + n]
+            pos += n
+            yield dt_ms, [(c & ~RELEASE, not c & RELEASE) for c in codes]
+
+    def seek(self, piece):
+        """Return (game, frame) at the first frame with at least `piece` locks."""
+        i = max(0, bisect.bisect_right(self.index_pieces, piece) - 1)
+        _, _, offset = self.index[i]
+        (length,) = struct.unpack_from("<I", self.mm, offset + 1)
+        game, frame = decode_state(self.mm, offset + 5)
+        m = _engine()
+        keys = control_keys(m.pygame)
+        for dt_ms, codes in self.frames(offset + 5 + length):
+            if game.pieces >= piece:
+                break
+            for k, down in codes:
+                if down:
+                    m.key_down(game, keys[k])
+                else:
+                    m.key_up(game, keys[k])
+            m.advance(game, dt_ms / 1000.0)
+            frame += 1
+        return game, frame
+
+
+def convert(tape_path, out_path, interval=50):
+    """Turn a replay tape of the GPT-5.2 (thinking) game into an archive.
+
+    Follows ``main()``: tick, poll events, advance. Archiving stops at quit,
+    Escape or a restart, since an archive holds a single game. A Backspace
+    that would rewind (any lock since the start) is rejected: the archive
+    has no way to replay a jump back to an earlier snapshot.
+    """
+    m = _engine()
+    pygame = m.pygame
+    tape = TapeReader.open(tape_path)
+    if tape.impl != IMPL:
+        raise ValueError(f"tape is for {tape.impl}, archives support {IMPL}")
+    writer = ArchiveWriter(out_path, m.Tetris(seed=tape.seed), interval)
+    data, pos = tape.data, tape.start
+    dt_ms = 0
+    try:
+        while pos < len(data):
+            op = data[pos]
+            if op in (OP_TICK, OP_RAWTIME):
+                dt_ms, pos = read_varint(data, pos + 1)
+                continue
+            keys = []
+            if op == OP_EVENTS:
+                count, pos = read_varint(data, pos + 1)
+                for _ in range(count):
+                    ev_type = data[pos]
+                    key, pos = read_varint(data, pos + 1)
+                    if ev_type == EV_QUIT or (ev_type == EV_KEYDOWN and key == pygame.K_ESCAPE):
+                        return writer.game
+                    if ev_type == EV_KEYDOWN and key == pygame.K_r and writer.game.game_over:
+                        return writer.game
+                    if ev_type == EV_KEYDOWN and key == pygame.K_BACKSPACE and writer.game.pieces:
+                        raise ValueError(f"tape rewinds with Backspace at frame {writer.frames}; "
+                                         "archives cannot follow a rewind")
+                    keys.append((key, ev_type == EV_KEYDOWN))
+            elif op == OP_NO_EVENTS:
+                pos += 1
+            else:
+                raise ValueError(f"unexpected tape op {op}")
+            writer.frame(dt_ms, keys)
+    finally:
+        writer.close()
+    return writer.game
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seekable game archives")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    conv = sub.add_parser("convert", help="build an archive from a replay tape")
+    conv.add_argument("tape")
+    conv.add_argument("out")
+    conv.add_argument("--interval", type=int, default=50, help="pieces between keyframes")
+    seek = sub.add_parser("seek", help="restore the game state at a piece number")
+    seek.add_argument("archive")
+    seek.add_argument("piece", type=int)
+    args = parser.parse_args()
+
+    if args.cmd == "convert":
+        game = convert(args.tape, args.out, args.interval)
+        print(f"archived {game.pieces} pieces -> {args.out}")
+        return
+
+    _engine()
+    with ArchiveReader(args.archive) as reader:
+        start = time.perf_counter()
+        game, frame = reader.seek(args.piece)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"piece {game.pieces} at frame {frame} ({ms:.2f} ms, {len(reader.index)} keyframes)")
+        print(f"score {game.score}  lines {game.lines}  level {game.level}  "
+              f"current {game.current.kind}  queue {''.join(game.queue)}")
+        for row in game.grid:
+            print("".join("." if c is None else "#" for c in row))
+
+
+if __name__ == "__main__":
+    main()
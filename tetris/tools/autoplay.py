@@ -0,0 +1,260 @@
+"""Autoplayer for the GPT-5.2 (thinking) ``Tetris`` engine.
+
+``AutoPlayer.act(game)`` picks a placement for the falling piece and plays
+its whole input path through ``move``/``rotate``/``step_down``/``hard_drop``
+in one call. Every legal placement from ``placements.py`` is scored with
+the usual four-feature heuristic (aggregate height, holes, bumpiness,
+cleared lines) on the engine's column bitmasks. The per-piece time budget
+bounds both the search and the scoring. A search that runs out of budget
+gives up, and the bot falls back to the cheap spawn drops of
+``placements.drops`` if the piece has not moved yet, else to dropping it
+straight down. Scoring that runs out plays the best placement so far. A
+decision therefore takes the budget plus at most that fallback, well under
+a millisecond, not counting the interpreter's own pauses (a full garbage
+collection costs 10-20 ms here and no budget inside the bot can stop one).
+The search is memoized, so the budget is rarely hit. A
+budget of None disables the cut-off, which makes a game a pure function of
+its seed.
+
+In a soak run the game does not wait for the bot: each decision is
+charged the frames it took, at least one, and gravity runs for them. At
+20G the next piece is therefore already on the stack when the bot sees
+it, and the bot can only slide and turn it from there. At that speed it
+still tops out every thousand pieces or so.
+
+    python tetris/tools/autoplay.py --pieces 100000 --gravity 20
+    python tetris/tools/autoplay.py --watch --pps 8
+"""
+import argparse
+import math
+import time
+
+import engines
+import placements
+import randomizer
+
+engine = placements.engine
+ROWS, COLS = engine.ROWS, engine.COLS
+ROW_BITS = (1 << ROWS) - 1
+
+WEIGHTS = {"height": -0.510066, "lines": 0.760666, "holes": -0.35663, "bumpiness": -0.184483}
+
+
+def place(columns, cells):
+    """Column masks after locking `cells` and clearing full rows, and the line count."""
+    cols = list(columns)
+    for x, y in cells:
+        cols[x] |= 1 << y
+
+    full = ROW_BITS
+    for c in cols:
+        full &= c
+    lines = full.bit_count()
+    while full:
+        # clear the topmost full row first; rows below it keep their index
+        y = (full & -full).bit_length() - 1
+        full &= full - 1
+        above = (1 << y) - 1
+        cols = [(c & ~(above | 1 << y)) | (c & above) << 1 for c in cols]
+    return cols, lines
+
+
+def surface(cols):
+    """(aggregate height, holes, bumpiness) of column masks."""
+    height = holes = bumpiness = 0
+    prev = None
+    for c in cols:
+        h = ROWS - ((c & -c).bit_length() - 1)
+        height += h
+        holes += h - (c.bit_count() - 1)  # minus the floor sentinel
+        if prev is not None:
+            bumpiness += abs(h - prev)
+        prev = h
+    return height, holes, bumpiness
+
+
+def features(columns, cells):
+    """(aggregate height, cleared lines, holes, bumpiness) after locking `cells`."""
+    cols, lines = place(columns, cells)
+    height, holes, bumpiness = surface(cols)
+    return height, lines, holes, bumpiness
+
+
+def evaluate(columns, cells, weights=WEIGHTS):
+    height, lines, holes, bumpiness = features(columns, cells)
+    return (weights["height"] * height + weights["lines"] * lines
+            + weights["holes"] * holes + weights["bumpiness"] * bumpiness)
+
+
+class AutoPlayer:
+    def __init__(self, weights=WEIGHTS, budget_ms=8.0):
+        self.weights = weights
+        self.budget_ns = None if budget_ms is None else int(budget_ms * 1e6)
+        self.decision_ns = []
+        self.over_budget = 0
+
+    def choose(self, game):
+        """Best placement for the falling piece, or None to drop it where it is.
+
+        None also means there is no legal placement.
+        """
+        start = time.perf_counter_ns()
+        deadline = None if self.budget_ns is None else start + self.budget_ns
+        columns = tuple(game.columns)
+        options = placements.placements(game, deadline=deadline)
+        if options is None:
+            self.over_budget += 1
+            options = placements.drops(columns, game.current.kind) if placements.spawned(game.current) else ()
+            deadline = None  # the fallback is small; score all of it
+        best, best_score = None, None
+        for p in options:
+            score = evaluate(columns, p.cells, self.weights)
+            if best is None or score > best_score:
+                best, best_score = p, score
+            if deadline is not None and time.perf_counter_ns() > deadline:
+                self.over_budget += 1
+                break
+        self.decision_ns.append(time.perf_counter_ns() - start)
+        return best
+
+    def act(self, game):
+        """Place the falling piece. Returns True if a piece was locked."""
+        if game.game_over or game.paused:
+            return False
+        best = self.choose(game)
+        if best is None:
+            game.hard_drop()  # nowhere to go but out of the top
+        else:
+            placements.play(game, best)
+        return True
+
+
+# -------------------- Runs --------------------
+def play_game(seed, max_pieces, gravity=None, delay=0, bot=None, strategy=None):
+    """One autoplayed game until it tops out or `max_pieces` have locked.
+
+    `strategy` names a ``randomizer`` strategy to deal the pieces, seeded
+    with `seed`; by default the engine deals its own 7-bags.
+
+    With `delay` the bot lets that many frames of gravity pass before it
+    places each piece, so the game speeds up on it as the level rises. The
+    frame it places on runs gravity too, so even a zero delay charges each
+    piece a frame. Returns (game, frames).
+    """
+    bot = AutoPlayer() if bot is None else bot
+    dt = 1.0 / engine.FPS
+    source = None if strategy is None else randomizer.make(strategy, seed)
+    game = engine.Tetris(gravity=gravity, seed=seed, source=source)
+    frames = wait = 0
+    while not game.game_over and game.pieces < max_pieces:
+        if wait >= delay and bot.act(game):
+            wait = 0
+        else:
+            wait += 1
+        engine.advance(game, dt)
+        frames += 1
+    return game, frames
+
+
+def soak(pieces, seed, gravity=None, budget_ms=8.0):
+    """Autoplay `pieces` pieces, starting a new game on every top-out.
+
+    Each decision is charged the frames it took (at least one), and gravity
+    runs for those frames before the next one.
+    """
+    bot = AutoPlayer(budget_ms=budget_ms)
+    dt = 1.0 / engine.FPS
+    game = engine.Tetris(gravity=gravity, seed=seed)
+    games, frames, placed = [], 0, 0
+    start = time.perf_counter()
+    while placed < pieces:
+        if game.game_over:
+            games.append(game)
+            game = engine.Tetris(gravity=gravity, seed=game.rng.getrandbits(32))
+        t = time.perf_counter()
+        if bot.act(game):
+            placed += 1
+        # the game does not wait for the bot: the time it took passes as frames of gravity
+        for _ in range(max(1, math.ceil((time.perf_counter() - t) / dt))):
+            engine.advance(game, dt)
+            frames += 1
+    games.append(game)
+    wall = time.perf_counter() - start
+
+    ms = sorted(bot.decision_ns)
+    return {
+        "pieces": placed,
+        "frames": frames,
+        "games": len(games),
+        "top_outs": sum(g.game_over for g in games),
+        "lines": sum(g.lines for g in games),
+        "max_level": max(g.level for g in games),
+        "best_score": max(g.score for g in games),
+        "wall_s": wall,
+        "decision_ms": {
+            "p50": ms[len(ms) // 2] / 1e6,
+            "p99": ms[min(len(ms) - 1, int(0.99 * len(ms)))] / 1e6,
+            "max": ms[-1] / 1e6,
+        },
+        "over_budget": bot.over_budget,
+    }
+
+
+def watch(seed, gravity=None, pps=8.0):
+    """Autoplay in the game window at `pps` pieces per second."""
+    pygame = engine.pygame
+    pygame.init()
+    pygame.display.set_caption("Tetris (Python) - autoplay")
+    screen = pygame.display.set_mode((engine.WIDTH, engine.HEIGHT))
+    clock = pygame.time.Clock()
+    fonts = engine.load_fonts()
+    bot = AutoPlayer()
+    game = engine.Tetris(gravity=gravity, seed=seed)
+    wait = 0.0
+
+    running = True
+    while running:
+        dt = clock.tick(engine.FPS) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                engine.key_down(game, event.key)
+                if game.game_over and event.key == pygame.K_r:
+                    game = engine.Tetris(gravity=gravity, seed=game.rng.getrandbits(32))
+
+        wait += dt
+        if wait >= 1.0 / pps and bot.act(game):
+            wait = 0.0
+        else:
+            engine.advance(game, dt)
+        engine.draw(screen, fonts, game)
+        pygame.display.flip()
+    pygame.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Heuristic autoplayer")
+    parser.add_argument("--pieces", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gravity", type=float, help="fixed rows per frame (20 = 20G); default follows the level")
+    parser.add_argument("--budget-ms", type=float, default=8.0, help="per-piece decision budget")
+    parser.add_argument("--watch", action="store_true", help="play in a window instead of a headless soak")
+    parser.add_argument("--pps", type=float, default=8.0, help="pieces per second with --watch")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.seed, args.gravity, args.pps)
+        return
+    engines.headless()
+    stats = soak(args.pieces, args.seed, args.gravity, args.budget_ms)
+    d = stats["decision_ms"]
+    print(f"{stats['pieces']} pieces in {stats['frames']} frames, {stats['wall_s']:.1f}s: "
+          f"{stats['games']} games, {stats['top_outs']} top-outs, {stats['lines']} lines, "
+          f"max level {stats['max_level']}, best score {stats['best_score']}")
+    print(f"decision p50 {d['p50']:.3f} ms  p99 {d['p99']:.3f} ms  max {d['max']:.3f} ms  "
+          f"over budget {stats['over_budget']}")
+
+
+if __name__ == "__main__":
+    main()
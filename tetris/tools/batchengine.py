@@ -0,0 +1,347 @@
+"""Many GPT-5.2 (thinking) games stepped in lockstep with NumPy (needs NumPy).
+
+``BatchTetris(seeds)`` holds B independent games. All boards live in one
+``(B, ROWS, COLS)`` uint8 array (0 = empty, kind index + 1 = filled, kinds
+in ``SHAPES`` order) next to per-game arrays for the falling piece, score,
+lines, level and timers. ``step(actions)`` applies one input per game and
+one frame of gravity to the whole batch: collision, rotation kicks, lock,
+line clear and scoring are array operations over all B games.
+
+The rules are the engine's own: ``SHAPES``, ``KICKS``, ``LINE_SCORES``, the
+``drop_interval`` level curve, rows-per-frame gravity with its accumulator
+and the lock delay. Piece order comes from the engine's ``dealt_bag``,
+so the same seed deals the same pieces as ``Tetris(seed=...)``.
+
+Actions mirror the engine calls one frame of input makes::
+
+    NOOP, LEFT (move(-1)), RIGHT (move(1)), ROTATE (rotate()),
+    SOFT_DROP (soft_drop_step()), HARD_DROP (hard_drop())
+
+followed by ``update(dt)``. ``--check`` runs both engines side by side on
+shared seeds and the same actions and compares every game after every step.
+
+    python tetris/tools/batchengine.py --check --games 256 --steps 3000
+    python tetris/tools/batchengine.py --games 4096 --steps 600
+"""
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+import autoplay
+import engines
+import placements
+
+engine = engines.load(engines.DEFAULT)
+ROWS, COLS, FPS = engine.ROWS, engine.COLS, engine.FPS
+KINDS = list(engine.SHAPES)
+
+NOOP, LEFT, RIGHT, ROTATE, SOFT_DROP, HARD_DROP = range(6)
+
+# (kind, rot, block) -> x, y offsets
+SHAPE_X = np.array([[[bx for bx, _ in rot] for rot in engine.SHAPES[k]] for k in KINDS], dtype=np.int64)
+SHAPE_Y = np.array([[[by for _, by in rot] for rot in engine.SHAPES[k]] for k in KINDS], dtype=np.int64)
+KICK_X = np.array([kx for kx, _ in engine.KICKS], dtype=np.int64)
+KICK_Y = np.array([ky for _, ky in engine.KICKS], dtype=np.int64)
+LINE_TABLE = np.array([engine.LINE_SCORES.get(n, 0) for n in range(5)], dtype=np.int64)
+SPAWN_X, SPAWN_Y = 3, -2  # Piece.__init__
+FLOOR = -1 << ROWS
+
+
+class _Feed:
+    """One game's bag and preview queue, drawn exactly like ``Tetris``."""
+
+    def __init__(self, seed, preview):
+        self.seed = seed
+        self.bag = engine.dealt_bag(seed, 0)
+        self.bags_drawn = 1
+        self.preview = preview
+        self.queue = deque()
+
+    def pop(self):
+        while len(self.queue) < self.preview:
+            if not self.bag:
+                self.bag = engine.dealt_bag(self.seed, self.bags_drawn)
+                self.bags_drawn += 1
+            self.queue.append(self.bag.pop())
+        return KINDS.index(self.queue.popleft())
+
+
+class BatchTetris:
+    def __init__(self, seeds, gravity=None, preview=engine.PREVIEW):
+        b = len(seeds)
+        self.size = b
+        self.seeds = list(seeds)
+        self.fixed_gravity = gravity
+        self.boards = np.zeros((b, ROWS, COLS), dtype=np.uint8)
+        # per-column occupancy bitmasks as in Tetris.columns; every bit from
+        # ROWS up is set, so the floor is solid however far below it we look
+        self.columns = np.full((b, COLS), FLOOR, dtype=np.int64)
+        self._games = np.arange(b)
+
+        self.feeds = [_Feed(seed, preview) for seed in self.seeds]
+        self.kind = np.array([f.pop() for f in self.feeds], dtype=np.int64)
+        self.next_kind = np.array([f.pop() for f in self.feeds], dtype=np.int64)
+        self.x = np.full(b, SPAWN_X, dtype=np.int64)
+        self.y = np.full(b, SPAWN_Y, dtype=np.int64)
+        self.rot = np.zeros(b, dtype=np.int64)
+
+        self.score = np.zeros(b, dtype=np.int64)
+        self.lines = np.zeros(b, dtype=np.int64)
+        self.level = np.ones(b, dtype=np.int64)
+        self.pieces = np.zeros(b, dtype=np.int64)
+        self.gravity_acc = np.zeros(b)
+        self.lock_delay = np.zeros(b)
+        self.game_over = self._collides(self._games, self.rot, self.x, self.y)
+
+    # -------------------- Geometry --------------------
+    # Geometry works on a subset of games: `idx` selects them and rot/x/y
+    # are the positions to test, aligned with `idx`.
+    def _cells(self, idx, rot, x, y):
+        kind = self.kind[idx]
+        return x[:, None] + SHAPE_X[kind, rot], y[:, None] + SHAPE_Y[kind, rot]
+
+    def _collides(self, idx, rot, x, y):
+        cx, cy = self._cells(idx, rot, x, y)
+        col = self.columns[idx[:, None], cx.clip(0, COLS - 1)]
+        # above the top is allowed, like Tetris._collides
+        filled = (cy >= 0) & ((col >> cy.clip(0)) & 1 != 0)
+        return ((cx < 0) | (cx >= COLS) | filled).any(axis=1)
+
+    def drop_distance(self, idx):
+        """Rows the pieces of games `idx` can drop (Tetris.drop_distance)."""
+        cx, cy = self._cells(idx, self.rot[idx], self.x[idx], self.y[idx])
+        col = self.columns[idx[:, None], cx]
+        s = cy + 1
+        below = np.where(s >= 0, col >> s.clip(0), col << (-s).clip(0))
+        # trailing zeros = empty rows under the block
+        return np.bitwise_count((below & -below) - 1).min(axis=1).astype(np.int64)
+
+    def _rebuild_columns(self, idx):
+        columns = np.full((len(idx), COLS), FLOOR, dtype=np.int64)
+        filled = self.boards[idx] != 0
+        for y in range(ROWS):
+            columns |= filled[:, y].astype(np.int64) << y
+        self.columns[idx] = columns
+
+    def _try_move(self, idx, drot, dx, dy):
+        """Move games `idx` where the target is free; returns which moved."""
+        rot = (self.rot[idx] + drot) % 4
+        x, y = self.x[idx] + dx, self.y[idx] + dy
+        ok = ~self._collides(idx, rot, x, y)
+        moved = idx[ok]
+        self.rot[moved], self.x[moved], self.y[moved] = rot[ok], x[ok], y[ok]
+        return ok
+
+    # -------------------- Rules --------------------
+    def gravity(self, idx):
+        """Rows per frame for games `idx` (Tetris.gravity)."""
+        if self.fixed_gravity is not None:
+            return np.full(len(idx), min(max(self.fixed_gravity, 0.0), engine.MAX_GRAVITY))
+        interval = 0.75 * (0.87 ** (self.level[idx] - 1))
+        return np.clip(1.0 / (interval * FPS), 0.0, engine.MAX_GRAVITY)
+
+    def _lock(self, idx):
+        """Tetris._lock_piece for games `idx`."""
+        if not len(idx):
+            return
+        cx, cy = self._cells(idx, self.rot[idx], self.x[idx], self.y[idx])
+        # _merge_piece stops at the first block above the field and ends the game
+        placed = np.logical_and.accumulate(cy >= 0, axis=1)
+        self.game_over[idx] |= ~placed.all(axis=1)
+        code = (self.kind[idx] + 1).astype(np.uint8)
+        for k in range(4):
+            on = placed[:, k]
+            g, x, y = idx[on], cx[on, k], cy[on, k]
+            self.boards[g, y, x] = code[on]
+            self.columns[g, x] |= np.int64(1) << y
+        self.pieces[idx] += 1
+
+        boards = self.boards[idx]
+        full = (boards != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        hit = cleared > 0
+        if hit.any():
+            # stable sort lifts full rows to the top, where they become empty rows
+            order = np.argsort(~full[hit], axis=1, kind="stable")
+            compact = np.take_along_axis(boards[hit], order[:, :, None], axis=1)
+            compact[np.arange(ROWS)[None, :] < cleared[hit][:, None]] = 0
+            self.boards[idx[hit]] = compact
+            self._rebuild_columns(idx[hit])
+        self.score[idx] += LINE_TABLE[cleared] * self.level[idx]
+        self.lines[idx] += cleared
+        self.level[idx] = 1 + self.lines[idx] // 10
+
+        self.kind[idx] = self.next_kind[idx]
+        self.next_kind[idx] = [self.feeds[i].pop() for i in idx]
+        self.x[idx], self.y[idx], self.rot[idx] = SPAWN_X, SPAWN_Y, 0
+        self.lock_delay[idx] = 0.0
+        self.game_over[idx] |= self._collides(idx, self.rot[idx], self.x[idx], self.y[idx])
+
+    def step(self, actions, dt=1.0 / FPS):
+        """One frame: each game's action, then gravity (Tetris.update)."""
+        actions = np.asarray(actions)
+        alive = ~self.game_over
+
+        for action, dx in ((LEFT, -1), (RIGHT, 1)):
+            self._try_move(np.flatnonzero(alive & (actions == action)), 0, dx, 0)
+
+        pending = np.flatnonzero(alive & (actions == ROTATE))
+        for kx, ky in zip(KICK_X, KICK_Y):
+            if not len(pending):
+                break
+            pending = pending[~self._try_move(pending, 1, kx, ky)]
+
+        soft = np.flatnonzero(alive & (actions == SOFT_DROP))
+        self.score[soft] += self._try_move(soft, 0, 0, 1)
+
+        hard = np.flatnonzero(alive & (actions == HARD_DROP))
+        if len(hard):
+            dist = self.drop_distance(hard)
+            self.y[hard] += dist
+            self.score[hard] += 2 * dist
+            self._lock(hard)
+
+        self._fall(np.flatnonzero(~self.game_over), dt)
+
+    def _fall(self, idx, dt):
+        gravity = self.gravity(idx)
+        acc = self.gravity_acc[idx] + gravity * dt * FPS
+        rows = acc.astype(np.int64)
+        self.gravity_acc[idx] = acc - rows
+        moving = rows > 0
+        idx, rows, gravity = idx[moving], rows[moving], gravity[moving]
+        if not len(idx):
+            return
+
+        fall = np.minimum(rows, self.drop_distance(idx))
+        self.y[idx] += fall
+        self.lock_delay[idx[fall > 0]] = 0.0
+        resting = fall < rows
+        idx, rows, fall, gravity = idx[resting], rows[resting], fall[resting], gravity[resting]
+        self.lock_delay[idx] += (rows - fall) / (gravity * FPS)
+        lock = idx[self.lock_delay[idx] >= engine.LOCK_DELAY]
+        self._lock(lock)
+        self.gravity_acc[lock] = 0.0
+
+
+# -------------------- Consistency check --------------------
+def _scalar_step(game, action, dt):
+    if game.game_over:
+        return
+    if action == LEFT:
+        game.move(-1)
+    elif action == RIGHT:
+        game.move(1)
+    elif action == ROTATE:
+        game.rotate()
+    elif action == SOFT_DROP:
+        game.soft_drop_step()
+    elif action == HARD_DROP:
+        game.hard_drop()
+    game.update(dt)
+
+
+def _mismatch(batch, i, game):
+    color_code = {engine.COLORS[k]: n + 1 for n, k in enumerate(KINDS)}
+    grid = np.array([[0 if c is None else color_code[c] for c in row] for row in game.grid], dtype=np.uint8)
+    if not np.array_equal(grid, batch.boards[i]):
+        return "board"
+    expected = {
+        "game_over": game.game_over, "score": game.score, "lines": game.lines, "level": game.level,
+        "pieces": game.pieces, "kind": KINDS.index(game.current.kind), "x": game.current.x,
+        "y": game.current.y, "rot": game.current.rot, "next_kind": KINDS.index(game.next_piece.kind),
+        "gravity_acc": game.gravity_acc, "lock_delay": game.lock_delay,
+    }
+    for name, value in expected.items():
+        if getattr(batch, name)[i] != value:
+            return f"{name}: batch {getattr(batch, name)[i]} != scalar {value}"
+    return None
+
+
+ACTION_OF = {"left": LEFT, "right": RIGHT, "rotate": ROTATE, "down": SOFT_DROP, "drop": HARD_DROP}
+
+
+def _driver(game, plan, rng):
+    """Next action for one game: mostly follow a placement path, sometimes noise."""
+    if rng.random() < 0.15:
+        return int(rng.integers(6))
+    if not plan:
+        found = placements.placements(game)
+        if found:
+            best = max(found, key=lambda p: autoplay.evaluate(tuple(game.columns), p.cells))
+            plan.extend(ACTION_OF[a] for a in best.path)
+    return plan.popleft() if plan else NOOP
+
+
+def check(games, steps, seed, gravity=None):
+    """Step both engines on the same seeds and actions; fail on any difference.
+
+    Actions come from a heuristic player on the scalar games (with some
+    random inputs), so the check covers line clears and level changes.
+    """
+    seeds = [seed + i for i in range(games)]
+    batch = BatchTetris(seeds, gravity=gravity)
+    scalar = [engine.Tetris(gravity=gravity, seed=s) for s in seeds]
+    plans = [deque() for _ in seeds]
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / FPS
+    for t in range(steps):
+        actions = np.array([NOOP if g.game_over else _driver(g, plan, rng) for g, plan in zip(scalar, plans)])
+        batch.step(actions, dt)
+        for i, game in enumerate(scalar):
+            locked = game.pieces
+            _scalar_step(game, actions[i], dt)
+            if game.pieces != locked:
+                plans[i].clear()
+            problem = _mismatch(batch, i, game)
+            if problem:
+                raise AssertionError(f"step {t}, seed {seeds[i]}: {problem}")
+    print(f"{games} games x {steps} steps match: {int(batch.pieces.sum())} pieces, "
+          f"{int(batch.lines.sum())} lines, max level {int(batch.level.max())}, "
+          f"{int(batch.game_over.sum())} games over")
+
+
+def bench(games, steps, seed):
+    seeds = [seed + i for i in range(games)]
+    rng = np.random.default_rng(seed)
+    actions = rng.choice(6, size=(steps, games), p=[0.55, 0.1, 0.1, 0.1, 0.1, 0.05])
+    dt = 1.0 / FPS
+
+    batch = BatchTetris(seeds)
+    start = time.perf_counter()
+    for row in actions:
+        batch.step(row, dt)
+    batch_s = time.perf_counter() - start
+
+    n = min(games, 256)
+    scalar = [engine.Tetris(seed=s) for s in seeds[:n]]
+    start = time.perf_counter()
+    for row in actions:
+        for game, action in zip(scalar, row[:n]):
+            _scalar_step(game, action, dt)
+    scalar_s = (time.perf_counter() - start) * games / n
+
+    total = games * steps
+    print(f"batch  {games} games x {steps} steps: {batch_s:.2f}s, {total / batch_s:12,.0f} game-steps/s")
+    print(f"scalar {total / scalar_s:12,.0f} game-steps/s (extrapolated from {n} games)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched NumPy Tetris engine")
+    parser.add_argument("--games", type=int, default=1024)
+    parser.add_argument("--steps", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gravity", type=float, help="fixed rows per frame for --check")
+    parser.add_argument("--check", action="store_true", help="compare against the scalar engine")
+    args = parser.parse_args()
+    engines.headless()
+    if args.check:
+        check(args.games, args.steps, args.seed, args.gravity)
+    else:
+        bench(args.games, args.steps, args.seed)
+
+
+if __name__ == "__main__":
+    main()
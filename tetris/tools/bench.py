@@ -0,0 +1,479 @@
+"""Benchmark all six implementations on the same scripted input.
+
+Each game is driven by an adapter that repeats what its own main loop does
+in one frame, minus the event polling. Every game gets the same stream of
+key presses: one key held per frame at most, taken from a seeded script.
+A game that tops out restarts so that every implementation runs the same
+number of frames. Every implementation runs in its own subprocess under
+the SDL dummy video driver, so peak RSS and pygame state are not shared.
+
+    python tetris/tools/bench.py --frames 3000 --out bench
+
+Writes ``bench.md`` and ``bench.json`` with one row per implementation:
+logic time per tick, render time per frame (drawing plus flip/update),
+bytes allocated per frame and peak RSS (read before tracemalloc starts,
+so its bookkeeping is not counted). Allocation is the tracemalloc
+peak above the live heap during one frame, measured in a separate pass
+so it does not distort the timings.
+"""
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import engines
+
+DT_MS = 16
+KEYS = ("left", "right", "up", "down", "space")
+
+
+def script(seed, frames):
+    """Per-frame key presses shared by every implementation."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(frames):
+        if i % 45 == 44:
+            out.append(("space",))
+        elif rng.random() < 0.18:
+            out.append((rng.choice(KEYS[:4]),))
+        else:
+            out.append(())
+    return out
+
+
+# -------------------- Adapters --------------------
+class Adapter:
+    """One frame of an implementation's main loop, split into phases.
+
+    ``press`` gets the keys held this frame (released again next frame),
+    ``tick`` runs the per-frame logic and ``render`` draws and presents.
+    """
+
+    def __init__(self, m, seed):
+        self.m = m
+        self.pygame = m.pygame
+        self.rng = random.Random(seed)
+        self.restarts = 0
+        self.new_game()
+
+    def restart(self):
+        self.restarts += 1
+        self.new_game()
+
+
+class Thinking52(Adapter):
+    """tetris_with_thinking_gpt_5.2.py: key_down/key_up/advance/draw."""
+
+    def __init__(self, m, seed):
+        m.pygame.init()
+        self.screen = m.pygame.display.set_mode((m.WIDTH, m.HEIGHT))
+        self.fonts = m.load_fonts()
+        self.held = []
+        super().__init__(m, seed)
+
+    def new_game(self):
+        self.game = self.m.Tetris(seed=self.rng.getrandbits(32))
+
+    def press(self, keys):
+        codes = self._codes()
+        for key in self.held:
+            self.m.key_up(self.game, codes[key])
+        for key in keys:
+            self.m.key_down(self.game, codes[key])
+        self.held = keys
+
+    def _codes(self):
+        pg = self.pygame
+        return {"left": pg.K_LEFT, "right": pg.K_RIGHT, "up": pg.K_UP, "down": pg.K_DOWN, "space": pg.K_SPACE}
+
+    def tick(self, dt_ms):
+        self.m.advance(self.game, dt_ms / 1000.0)
+
+    def render(self):
+        self.m.draw(self.screen, self.fonts, self.game)
+        self.pygame.display.flip()
+
+    @property
+    def over(self):
+        return self.game.game_over
+
+
+class NoThinking52(Adapter):
+    """tetris_without_thinking_gpt_5.2.py: method calls plus fast_drop flag."""
+
+    def __init__(self, m, seed):
+        m.pygame.init()
+        self.screen = m.pygame.display.set_mode((m.W, m.H))
+        self.fonts = m.load_fonts()
+        self.fast_drop = False
+        super().__init__(m, seed)
+
+    def new_game(self):
+        self.game = self.m.Tetris(seed=self.rng.getrandbits(32))
+
+    def press(self, keys):
+        self.fast_drop = "down" in keys
+        for key in keys:
+            if key == "left":
+                self.game.move(-1)
+            elif key == "right":
+                self.game.move(1)
+            elif key == "up":
+                self.game.rotate()
+            elif key == "space":
+                self.game.hard_drop()
+
+    def tick(self, dt_ms):
+        self.game.update(dt_ms / 1000.0, fast_drop=self.fast_drop)
+
+    def render(self):
+        self.m.draw(self.screen, self.fonts, self.game)
+        self.pygame.display.flip()
+
+    @property
+    def over(self):
+        return self.game.game_over
+
+
+class Vibe(Adapter):
+    """Mistral tetris_vibe.py: TetrisGame with the body of run()."""
+
+    def new_game(self):
+        self.game = self.m.TetrisGame(seed=self.rng.getrandbits(32))
+
+    def press(self, keys):
+        game = self.game
+        for key in keys:
+            if key == "left":
+                game.move(-1, 0)
+            elif key == "right":
+                game.move(1, 0)
+            elif key == "down":
+                game.move(0, 1)
+            elif key == "up":
+                game.rotate()
+            elif key == "space":
+                while game.move(0, 1):
+                    pass
+                game.lock_piece()
+
+    def tick(self, dt_ms):
+        game = self.game
+        game.fall_time += dt_ms / 1000.0
+        if game.fall_time >= game.fall_speed:
+            game.fall_time = 0
+            if not game.move(0, 1):
+                game.lock_piece()
+
+    def render(self):
+        self.game.draw()
+
+    @property
+    def over(self):
+        return self.game.game_over
+
+
+class Gpt40(Adapter):
+    """tetris_gpt_40.py: module functions, no hard drop."""
+
+    def new_game(self):
+        m = self.m
+        self.grid = m.create_grid()
+        self.fall_time = 0
+        self.piece = m.Piece(3, 0, self.rng.choice(m.SHAPES), self.rng)
+        self.over = False
+
+    def press(self, keys):
+        m, piece = self.m, self.piece
+        for key in keys:
+            if key == "left":
+                piece.x -= 1
+                if not m.valid_space(piece, self.grid):
+                    piece.x += 1
+            elif key == "right":
+                piece.x += 1
+                if not m.valid_space(piece, self.grid):
+                    piece.x -= 1
+            elif key == "down":
+                piece.y += 1
+                if not m.valid_space(piece, self.grid):
+                    piece.y -= 1
+            elif key == "up":
+                piece.shape = list(zip(*piece.shape[::-1]))
+                if not m.valid_space(piece, self.grid):
+                    piece.shape = list(zip(*piece.shape))[::-1]
+
+    def tick(self, dt_ms):
+        m = self.m
+        self.grid = m.clear_rows(self.grid)
+        self.fall_time += dt_ms
+        if self.fall_time / 1000 > 0.5:
+            self.piece.y += 1
+            if not m.valid_space(self.piece, self.grid):
+                self.piece.y -= 1
+                m.lock_piece(self.piece, self.grid)
+                self.piece = m.Piece(3, 0, self.rng.choice(m.SHAPES), self.rng)
+                if not m.valid_space(self.piece, self.grid):
+                    self.over = True
+            self.fall_time = 0
+
+    def render(self):
+        m = self.m
+        m.win.fill(m.BLACK)
+        m.draw_grid(m.win, self.grid)
+        m.draw_piece(m.win, self.piece)
+        self.pygame.display.update()
+
+
+class Thinking51(Adapter):
+    """tetris_with_thinking_gpt_5.1.py: locked-position dict, Space rotates."""
+
+    def __init__(self, m, seed):
+        m.pygame.init()
+        self.surface = m.pygame.display.set_mode((m.WINDOW_WIDTH, m.WINDOW_HEIGHT))
+        super().__init__(m, seed)
+
+    def new_game(self):
+        m = self.m
+        self.locked = {}
+        self.grid = m.create_grid(self.locked)
+        self.piece = m.get_new_piece(self.rng)
+        self.next_drop_time = 0
+        self.score = 0
+        self.level = 1
+        self.fall_speed = 500
+        self.over = False
+
+    def _lock(self):
+        m = self.m
+        m.add_piece_to_locked(self.piece, self.locked)
+        lines = m.clear_lines(self.locked)
+        if lines:
+            self.score += (100 * lines) * self.level
+        return lines
+
+    def press(self, keys):
+        m = self.m
+        for key in keys:
+            piece = self.piece
+            if key == "left":
+                piece.x -= 1
+                if not m.is_valid_position(self.grid, piece):
+                    piece.x += 1
+            elif key == "right":
+                piece.x += 1
+                if not m.is_valid_position(self.grid, piece):
+                    piece.x -= 1
+            elif key == "down":
+                piece.y += 1
+                if not m.is_valid_position(self.grid, piece):
+                    piece.y -= 1
+                    self._lock()
+                    self.grid = m.create_grid(self.locked)
+                    self.piece = m.get_new_piece(self.rng)
+                    if not m.is_valid_position(self.grid, self.piece):
+                        self.over = True
+            elif key in ("up", "space"):
+                piece.rotate(self.grid)
+
+    def tick(self, dt_ms):
+        m = self.m
+        self.next_drop_time += dt_ms
+        if self.next_drop_time > self.fall_speed:
+            self.next_drop_time = 0
+            self.piece.y += 1
+            if not m.is_valid_position(self.grid, self.piece):
+                self.piece.y -= 1
+                if self._lock():
+                    self.level = 1 + self.score // 1000
+                    self.fall_speed = max(100, 500 - (self.level - 1) * 30)
+                self.grid = m.create_grid(self.locked)
+                self.piece = m.get_new_piece(self.rng)
+                if not m.is_valid_position(self.grid, self.piece):
+                    self.over = True
+        # main() paints the falling piece into the grid it also collides against
+        self.grid = m.create_grid(self.locked)
+        for x, y in self.piece.blocks:
+            if y >= 0:
+                self.grid[y][x] = m.COLORS[self.piece.shape_key]
+
+    def render(self):
+        self.m.draw_window(self.surface, self.grid, self.score, self.level)
+
+
+class NoThinking51(Adapter):
+    """tetris_without_thinking_gpt_5.1.py: module-global grid, polled keys."""
+
+    def new_game(self):
+        m = self.m
+        m.grid = [[0 for _ in range(m.COLS)] for _ in range(m.ROWS)]
+        self.piece = m.Piece(self.rng)
+        self.fall_time = 0
+        self.over = False
+
+    def press(self, keys):
+        m, piece = self.m, self.piece
+        if "left" in keys and m.valid_position(piece, -1, 0):
+            piece.x -= 1
+        if "right" in keys and m.valid_position(piece, 1, 0):
+            piece.x += 1
+        if "down" in keys and m.valid_position(piece, 0, 1):
+            piece.y += 1
+        if "up" in keys:
+            old_shape = piece.shape
+            piece.rotate()
+            if not m.valid_position(piece):
+                piece.shape = old_shape
+        if "space" in keys:
+            while m.valid_position(piece, 0, 1):
+                piece.y += 1
+            m.place_piece(piece)
+            m.clear_lines()
+            self.piece = m.Piece(self.rng)
+
+    def tick(self, dt_ms):
+        m = self.m
+        self.fall_time += dt_ms
+        if self.fall_time > 500:
+            if m.valid_position(self.piece, 0, 1):
+                self.piece.y += 1
+            else:
+                m.place_piece(self.piece)
+                m.clear_lines()
+                self.piece = m.Piece(self.rng)
+                if not m.valid_position(self.piece):
+                    self.over = True
+            self.fall_time = 0
+
+    def render(self):
+        self.m.draw_window()
+        self.m.draw_piece(self.piece)
+        self.pygame.display.update()
+
+
+ADAPTERS = {
+    "gpt_40": Gpt40,
+    "with_thinking_gpt_5.1": Thinking51,
+    "without_thinking_gpt_5.1": NoThinking51,
+    "with_thinking_gpt_5.2": Thinking52,
+    "without_thinking_gpt_5.2": NoThinking52,
+    "vibe": Vibe,
+}
+
+
+# -------------------- Measurement --------------------
+def _frame(adapter, keys):
+    adapter.press(keys)
+    adapter.tick(DT_MS)
+    if adapter.over:
+        adapter.restart()
+
+
+def _summary(samples_ns, scale):
+    s = sorted(samples_ns)
+    return {
+        "mean": sum(s) / len(s) / scale,
+        "p50": s[len(s) // 2] / scale,
+        "p95": s[min(len(s) - 1, int(len(s) * 0.95))] / scale,
+        "max": s[-1] / scale,
+    }
+
+
+def measure(impl, frames, seed, alloc_frames=600):
+    """Run one implementation in this process and return its metrics."""
+    engines.headless()
+    m = engines.load(impl)
+    keys = script(seed, frames)
+    clock = time.perf_counter_ns
+
+    adapter = ADAPTERS[impl](m, seed)
+    logic, render = [], []
+    for held in keys:
+        t0 = clock()
+        _frame(adapter, held)
+        t1 = clock()
+        adapter.render()
+        t2 = clock()
+        logic.append(t1 - t0)
+        render.append(t2 - t1)
+    restarts = adapter.restarts
+    # before tracemalloc, whose own bookkeeping would count as the game's memory
+    peak_rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # separate pass: tracemalloc makes every allocation several times slower
+    adapter = ADAPTERS[impl](m, seed)
+    alloc = []
+    tracemalloc.start()
+    for held in keys[:alloc_frames]:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        _frame(adapter, held)
+        adapter.render()
+        alloc.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+
+    return {
+        "impl": impl,
+        "frames": frames,
+        "restarts": restarts,
+        "logic_us": _summary(logic, 1e3),
+        "render_ms": _summary(render, 1e6),
+        "alloc_bytes_per_frame": sum(alloc) / len(alloc),
+        "peak_rss_kib": peak_rss_kib,
+    }
+
+
+def run_all(impls, frames, seed):
+    results = []
+    for impl in impls:
+        out = subprocess.run(
+            [sys.executable, __file__, "--worker", impl, "--frames", str(frames), "--seed", str(seed)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.splitlines()[-1]))
+    return results
+
+
+def to_markdown(results):
+    lines = [
+        "| implementation | logic µs/tick (p50 / p95) | render ms/frame (p50 / p95) "
+        "| alloc KiB/frame | peak RSS MiB | restarts |",
+        "|---|---|---|---|---|---|",
+    ]
+    for r in results:
+        lg, rd = r["logic_us"], r["render_ms"]
+        lines.append(
+            f"| {r['impl']} | {lg['p50']:.1f} / {lg['p95']:.1f} | {rd['p50']:.3f} / {rd['p95']:.3f} "
+            f"| {r['alloc_bytes_per_frame'] / 1024:.1f} | {r['peak_rss_kib'] / 1024:.1f} | {r['restarts']} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the six implementations")
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench", help="output path without extension")
+    parser.add_argument("--only", nargs="*", choices=sorted(ADAPTERS), default=list(ADAPTERS))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.frames, args.seed)))
+        return
+
+    results = run_all(args.only, args.frames, args.seed)
+    out = Path(args.out)
+    out.with_suffix(".json").write_text(json.dumps(results, indent=2) + "\n")
+    table = to_markdown(results)
+    out.with_suffix(".md").write_text(table)
+    print(table, end="")
+
+
+if __name__ == "__main__":
+    main()
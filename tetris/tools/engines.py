@@ -0,0 +1,68 @@
+"""Load the six implementations by file path.
+
+The game files are named after the model that wrote them
+(``tetris_with_thinking_gpt_5.2.py``) and cannot be imported by name, so the
+tools go through ``load()``. Call ``headless()`` before the first load to run
+them under the SDL dummy drivers; several files open a window at import time.
+"""
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+IMPLEMENTATIONS = {
+    "gpt_40": "ChatGPT/tetris_gpt_40.py",
+    "with_thinking_gpt_5.1": "ChatGPT/tetris_with_thinking_gpt_5.1.py",
+    "without_thinking_gpt_5.1": "ChatGPT/tetris_without_thinking_gpt_5.1.py",
+    "with_thinking_gpt_5.2": "ChatGPT/tetris_with_thinking_gpt_5.2.py",
+    "without_thinking_gpt_5.2": "ChatGPT/tetris_without_thinking_gpt_5.2.py",
+    "vibe": "Mistral/tetris_vibe.py",
+}
+DEFAULT = "with_thinking_gpt_5.2"
+
+
+def headless():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+
+def module_name(name):
+    return "tetris_" + name.replace(".", "_")
+
+
+def load(name=DEFAULT, fresh=False):
+    """Import an implementation once and register it in ``sys.modules``.
+
+    `fresh` re-executes the file, which resets module-level game state
+    (``grid`` in the function-style engines) and re-runs their
+    import-time ``pygame.init()``.
+    """
+    mod_name = module_name(name)
+    if mod_name in sys.modules and not fresh:
+        return sys.modules[mod_name]
+    spec = importlib.util.spec_from_file_location(mod_name, ROOT / IMPLEMENTATIONS[name])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[mod_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(name=DEFAULT, seed=None, profiler=None):
+    """Start the implementation's own game loop, as its __main__ block would.
+
+    `profiler` is installed as the module's ``PROFILER`` (see frameprof.py);
+    only the implementations whose loops report to it accept one.
+    """
+    module = load(name, fresh=True)
+    if profiler is not None:
+        if not hasattr(module, "PROFILER"):
+            raise ValueError(f"{name} has no profiler hooks")
+        module.PROFILER = profiler
+    if name == "vibe":
+        module.TetrisGame(seed=seed).run()
+        module.pygame.quit()
+    else:
+        module.main(seed=seed)
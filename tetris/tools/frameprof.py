@@ -0,0 +1,285 @@
+"""Per-phase frame profiler for the game loops.
+
+The GPT-5.2 (thinking) ``main()`` and the Mistral ``TetrisGame.run``/``draw``
+report to a module-level ``PROFILER`` when one is installed. ``start()``
+marks the beginning of a frame, right after the clock tick returns.
+``lap(phase)`` charges the time since the previous mark to a phase, and
+``end()`` closes the frame. The phases are:
+
+    events   the pygame event loop (the Mistral hard drop locks here)
+    update   gravity, locking, history and save files
+    board    background, grid, settled blocks, ghost and falling piece
+    text     the side panel (score, preview, help) and pause/game-over text
+    overlay  this profiler's own overlay
+    flip     pygame.display.flip
+    frame    start() to end(), i.e. everything but the wait in clock.tick
+
+Each phase goes into a rolling window of recent frames and into a
+log-linear (HDR-style) histogram of the whole run. The window gives the
+p50/p95/p99 the overlay shows. F3 toggles the overlay. A histogram bucket
+keeps the top SUB_BITS bits of a value, so bucket bounds are within 1/64
+of the real times, from nanoseconds to seconds, in a few hundred buckets.
+On exit the histograms are written to JSON and summarised on stdout.
+
+F9 runs cProfile over exactly the next --cprofile frames (default 60).
+--cprofile N --cprofile-at F does the same from frame F without a key
+press. The profiler is enabled in ``start()`` and disabled in ``end()``,
+so the clock tick's sleep is not in it. A capture writes
+<impl>-frames<first>-<last>.pstats (for pstats or snakeviz) and a .txt
+next to it with the functions ranked by their own time. Frames under
+cProfile run slower and are left out of the histograms.
+
+    python tetris/tools/frameprof.py
+    python tetris/tools/frameprof.py --impl vibe --json vibe.json
+    python tetris/tools/frameprof.py --headless --frames 600
+    python tetris/tools/frameprof.py --headless --frames 400 --cprofile 30 --cprofile-at 200
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import time
+from collections import deque
+
+import engines
+
+HOOKED = ("with_thinking_gpt_5.2", "vibe")
+PHASES = ("events", "update", "board", "text", "overlay", "flip", "frame")
+SUB_BITS = 7
+REPORT = (50, 90, 95, 99, 99.9, 100)
+CAPTURE_FRAMES = 60
+
+
+def bucket(ns):
+    """Lower bound of the bucket holding `ns`: its top SUB_BITS bits."""
+    shift = ns.bit_length() - SUB_BITS
+    return ns if shift <= 0 else (ns >> shift) << shift
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = {}
+        self.count = self.total = self.max = 0
+        self.min = None
+
+    def record(self, ns):
+        b = bucket(ns)
+        self.counts[b] = self.counts.get(b, 0) + 1
+        self.count += 1
+        self.total += ns
+        self.max = max(self.max, ns)
+        self.min = ns if self.min is None else min(self.min, ns)
+
+    def percentile(self, q):
+        """Lower bound of the bucket holding the q-th percentile."""
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for b in sorted(self.counts):
+            seen += self.counts[b]
+            if seen >= rank:
+                return b
+        return 0
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "min_ns": self.min or 0,
+            "max_ns": self.max,
+            "mean_ns": self.total // self.count if self.count else 0,
+            "percentiles_ns": {str(q): self.percentile(q) for q in REPORT} if self.count else {},
+            "buckets": sorted(self.counts.items()),
+        }
+
+
+def top_functions(stats, limit=30):
+    """[(own s, cumulative s, calls, "file:line(function)")] by own time, callers folded in."""
+    rows = [(tt, ct, nc, f"{os.path.basename(file)}:{line}({func})")
+            for (file, line, func), (_cc, nc, tt, ct, _callers) in stats.stats.items()]
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+class FrameProfiler:
+    def __init__(self, name, window=240, max_frames=None, visible=False,
+                 capture_frames=CAPTURE_FRAMES, capture_at=None, out_dir="."):
+        self.name = name
+        self.max_frames = max_frames
+        self.visible = visible
+        self.hist = {p: Histogram() for p in PHASES}
+        self.recent = {p: deque(maxlen=window) for p in PHASES}
+        self.frames = 0
+        self._acc = {}
+        self._start = self._mark = None
+        self._panel = None
+        self._panel_frame = -1
+        self._font = None
+        self.capture_frames = capture_frames
+        self.out_dir = out_dir
+        self.captures = []  # (pstats path, summary path) written so far
+        self._capture_at = capture_at
+        self._cprof = None
+        self._capture_first = None
+
+    # -------------------- Hooks --------------------
+    def start(self):
+        if self.max_frames is not None and self.frames >= self.max_frames:
+            # the QUIT posted at the last frame is still on its way; record nothing more
+            self._start = self._mark = None
+            return
+        if self._capture_at is not None and self.frames >= self._capture_at and self._cprof is None:
+            self._capture_at = None
+            self._capture_first = self.frames
+            self._cprof = cProfile.Profile()
+        self._start = self._mark = time.perf_counter_ns()
+        self._acc = {}
+        if self._cprof is not None:
+            self._cprof.enable()
+
+    def lap(self, phase):
+        now = time.perf_counter_ns()
+        if self._mark is not None:
+            self._acc[phase] = self._acc.get(phase, 0) + now - self._mark
+        self._mark = now
+
+    def end(self):
+        if self._cprof is not None:
+            self._cprof.disable()
+        if self._start is None:
+            return
+        self._acc["frame"] = time.perf_counter_ns() - self._start
+        if self._cprof is None:
+            for phase, ns in self._acc.items():
+                self.hist[phase].record(ns)
+                self.recent[phase].append(ns)
+        self._start = self._mark = None
+        self.frames += 1
+        if self._cprof is not None and self.frames - self._capture_first == self.capture_frames:
+            self.finish_capture()
+        if self.frames == self.max_frames:
+            import pygame
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    def handle(self, event):
+        import pygame
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.visible = not self.visible
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and self._cprof is None:
+            self._capture_at = self.frames + 1  # this frame has already started
+        elif event.type == pygame.QUIT and self._cprof is not None:
+            self._cprof.disable()  # some loops return without ending the frame; keep pygame.quit out
+
+    def overlay(self, screen):
+        if self.visible:
+            if self._panel is None or self.frames - self._panel_frame >= 15:
+                self._panel = self._render()
+                self._panel_frame = self.frames
+            screen.blit(self._panel, (6, 6))
+        self.lap("overlay")
+
+    # -------------------- cProfile captures --------------------
+    def finish_capture(self):
+        """Write the capture in progress (possibly cut short by quitting), if any."""
+        prof, self._cprof = self._cprof, None
+        if prof is None:
+            return None
+        prof.disable()
+        # only frames that ended count; one cut short by quitting is left out of
+        # the label and the per-frame figures (its few calls stay in the stats)
+        first, last = self._capture_first, self.frames - 1
+        if last < first:
+            return None
+        base = os.path.join(self.out_dir, f"{self.name}-frames{first}-{last}")
+        prof.dump_stats(base + ".pstats")
+        stats = pstats.Stats(prof)
+        frames = last - first + 1
+        lines = [f"{self.name}, frames {first}-{last} ({frames}), {stats.total_calls} calls, "
+                 f"{stats.total_tt * 1e3:.1f} ms profiled",
+                 f"{'own ms':>9}{'/frame':>9}{'cum ms':>9}{'calls':>9}  function"]
+        for tt, ct, nc, where in top_functions(stats):
+            lines.append(f"{tt * 1e3:9.2f}{tt * 1e3 / frames:9.3f}{ct * 1e3:9.2f}{nc:9d}  {where}")
+        with open(base + ".txt", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        self.captures.append((base + ".pstats", base + ".txt"))
+        print(f"cProfile of frames {first}-{last} written to {base}.pstats and .txt")
+        return base
+
+    # -------------------- Reports --------------------
+    def rolling(self, phase):
+        """(p50, p95, p99) in ms over the recent window."""
+        values = sorted(self.recent[phase])
+        if not values:
+            return 0.0, 0.0, 0.0
+        return tuple(values[min(len(values) - 1, int(q * len(values)))] / 1e6 for q in (0.5, 0.95, 0.99))
+
+    def _render(self):
+        import pygame
+        if self._font is None:
+            self._font = pygame.font.Font(None, 18)
+        font = self._font
+        lines = [f"{'ms':<8}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        lines += [f"{p:<8}" + "".join(f"{v:7.2f}" for v in self.rolling(p)) for p in PHASES if self.recent[p]]
+        images = [font.render(line, True, (230, 230, 230)) for line in lines]
+        height = font.get_linesize()
+        panel = pygame.Surface((max(i.get_width() for i in images) + 12, height * len(images) + 8), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        for i, image in enumerate(images):
+            panel.blit(image, (6, 4 + i * height))
+        return panel
+
+    def to_json(self):
+        return {
+            "implementation": self.name,
+            "frames": self.frames,
+            "sub_bucket_bits": SUB_BITS,
+            "phases": {p: h.to_json() for p, h in self.hist.items() if h.count},
+        }
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f, indent=1)
+
+    def summary(self):
+        lines = [f"{self.name}, {self.frames} frames (ms)", f"{'':<8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for p, h in self.hist.items():
+            if h.count:
+                lines.append(f"{p:<8}" + "".join(f"{h.percentile(q) / 1e6:8.2f}" for q in (50, 95, 99))
+                             + f"{h.max / 1e6:8.2f}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play with per-phase frame timing")
+    parser.add_argument("--impl", choices=HOOKED, default=engines.DEFAULT)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="histogram file (default: frameprof-<impl>.json)")
+    parser.add_argument("--frames", type=int, help="quit after this many frames")
+    parser.add_argument("--overlay", action="store_true", help="start with the overlay shown")
+    parser.add_argument("--headless", action="store_true", help="SDL dummy drivers (use with --frames)")
+    parser.add_argument("--cprofile", type=int, metavar="N",
+                        help=f"frames per cProfile capture (F9; default {CAPTURE_FRAMES})")
+    parser.add_argument("--cprofile-at", type=int, metavar="FRAME",
+                        help="start a capture at this frame without F9 (default 0 with --cprofile)")
+    parser.add_argument("--out", default=".", help="directory for cProfile captures")
+    args = parser.parse_args()
+    if args.headless:
+        engines.headless()
+    capture_at = args.cprofile_at
+    if capture_at is None and args.cprofile:
+        capture_at = 0
+    prof = FrameProfiler(args.impl, max_frames=args.frames, visible=args.overlay,
+                         capture_frames=args.cprofile or CAPTURE_FRAMES, capture_at=capture_at, out_dir=args.out)
+    try:
+        engines.run(args.impl, args.seed, profiler=prof)
+    except SystemExit:
+        pass
+    finally:
+        prof.finish_capture()
+        path = args.json or f"frameprof-{args.impl}.json"
+        prof.dump(path)
+        print(prof.summary())
+        print(f"histograms written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Gym-style environment around the GPT-5.2 (thinking) engine (needs NumPy).
+
+``TetrisEnv`` has the usual ``reset(seed)`` -> (obs, info) and
+``step(action)`` -> (obs, reward, terminated, truncated, info). An action is
+one frame of input, the same six as ``batchengine.py`` (NOOP, LEFT, RIGHT,
+ROTATE, SOFT_DROP, HARD_DROP), followed by one ``update(1/FPS)``. The reward
+is the number of lines cleared in that step.
+
+Observations are a dict of NumPy arrays:
+    board   (ROWS, COLS) uint8, 0 empty, else the save format's cell code
+            (kind index + 1, 8 for garbage)
+    piece   (4,) int16, kind index, x, y, rot of the falling piece
+    queue   (PREVIEW,) uint8, kind indices of next_piece and the PREVIEW - 1
+            kinds queued behind it (what the side panel shows)
+The env writes them into arrays it is given (or allocates its own) and
+returns those same arrays every step. The board is only rewritten when the
+engine's listeners report a lock, garbage or restore.
+
+``SubprocVecEnv(n)`` runs n envs split over worker processes. Every
+observation, action, reward and done flag lives in one
+``multiprocessing.shared_memory`` block that the learner and the workers
+view as NumPy arrays. The pipes to the workers carry one-byte commands,
+never boards. A finished env is reset in its worker at once, with a seed
+drawn from its previous game, and ``episode_lines``/``episode_score`` hold
+what the finished game reached. The arrays ``step`` returns are
+overwritten by the next step; copy what you keep.
+
+    python tetris/tools/gymenv.py --envs 64 --workers 4 --steps 2000
+    python tetris/tools/gymenv.py --check
+
+--check steps a vectorized env and the same envs in-process with the same
+seeds and actions, and compares every observation and reward. It also
+checks each in-process observation against the engine's own game state.
+"""
+import argparse
+import os
+import time
+from multiprocessing import get_all_start_methods, get_context, shared_memory
+
+import numpy as np
+
+import engines
+from batchengine import HARD_DROP, LEFT, NOOP, RIGHT, ROTATE, SOFT_DROP
+
+engine = engines.load(engines.DEFAULT)
+ROWS, COLS, FPS, PREVIEW = engine.ROWS, engine.COLS, engine.FPS, engine.PREVIEW
+KINDS = engine.KINDS
+CODES = {None: 0, **engine.CELL_CODES}
+ACTIONS = 6
+DT = 1.0 / FPS
+
+
+def observation_arrays(n=None):
+    """Fresh zeroed observation arrays, with a leading env axis if `n` is given."""
+    lead = () if n is None else (n,)
+    return {
+        "board": np.zeros(lead + (ROWS, COLS), dtype=np.uint8),
+        "piece": np.zeros(lead + (4,), dtype=np.int16),
+        "queue": np.zeros(lead + (PREVIEW,), dtype=np.uint8),
+    }
+
+
+class TetrisEnv:
+    def __init__(self, seed=None, gravity=None, max_steps=None, obs=None):
+        self.gravity = gravity
+        self.max_steps = max_steps
+        self.obs = observation_arrays() if obs is None else obs
+        self.game = None
+        self.steps = 0
+        self._seed = seed
+
+    def _changed(self, game, event):
+        if event != "move":
+            self._board_dirty = True
+
+    def reset(self, seed=None):
+        """Start a new game; without a seed, the next one is drawn from the previous game."""
+        if seed is None:
+            seed = self._seed if self.game is None else self.game.rng.getrandbits(32)
+        self._seed = None
+        self.game = engine.Tetris(gravity=self.gravity, seed=seed)
+        self.game.listeners.append(self._changed)
+        self._board_dirty = True
+        self.steps = 0
+        self._observe()
+        return self.obs, {"seed": self.game.seed}
+
+    def step(self, action):
+        game = self.game
+        lines = game.lines
+        if action == LEFT:
+            game.move(-1)
+        elif action == RIGHT:
+            game.move(1)
+        elif action == ROTATE:
+            game.rotate()
+        elif action == SOFT_DROP:
+            game.soft_drop_step()
+        elif action == HARD_DROP:
+            game.hard_drop()
+        elif action != NOOP:
+            raise ValueError(f"unknown action {action}")
+        game.update(DT)
+        self.steps += 1
+        self._observe()
+        truncated = self.max_steps is not None and self.steps >= self.max_steps
+        return self.obs, game.lines - lines, game.game_over, truncated, {}
+
+    def _observe(self):
+        game, obs = self.game, self.obs
+        if self._board_dirty:
+            self._board_dirty = False
+            cells = bytes([CODES[c] for row in game.grid for c in row])
+            obs["board"][:] = np.frombuffer(cells, dtype=np.uint8).reshape(ROWS, COLS)
+        cur = game.current
+        obs["piece"][:] = (KINDS.index(cur.kind), cur.x, cur.y, cur.rot)
+        queue = obs["queue"]
+        queue[0] = KINDS.index(game.next_piece.kind)
+        for i, kind in enumerate(game.queue, 1):
+            queue[i] = KINDS.index(kind)
+
+
+# -------------------- Vectorized --------------------
+def _layout(n):
+    """(name, dtype, shape, offset) of every array in the shared block, and its size."""
+    fields = [(name, a.dtype, a.shape) for name, a in observation_arrays(n).items()]
+    fields += [("actions", np.dtype(np.uint8), (n,)), ("rewards", np.dtype(np.float32), (n,)),
+               ("terminated", np.dtype(np.bool_), (n,)), ("truncated", np.dtype(np.bool_), (n,)),
+               ("episode_lines", np.dtype(np.int32), (n,)), ("episode_score", np.dtype(np.int32), (n,))]
+    layout, offset = [], 0
+    for name, dtype, shape in fields:
+        offset = -(-offset // 8) * 8
+        layout.append((name, dtype, shape, offset))
+        offset += dtype.itemsize * int(np.prod(shape))
+    return layout, offset
+
+
+def _views(buf, n):
+    return {name: np.ndarray(shape, dtype, buf, offset) for name, dtype, shape, offset in _layout(n)[0]}
+
+
+def _worker(conn, shm_name, n, lo, hi, seeds, gravity, max_steps):
+    engines.headless()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arrays = _views(shm.buf, n)
+        actions, rewards = arrays["actions"], arrays["rewards"]
+        terminated, truncated = arrays["terminated"], arrays["truncated"]
+        envs = []
+        for i, seed in zip(range(lo, hi), seeds):
+            obs = {k: arrays[k][i] for k in ("board", "piece", "queue")}
+            envs.append(TetrisEnv(seed, gravity, max_steps, obs))
+        while True:
+            cmd = conn.recv_bytes()
+            if cmd == b"s":
+                for i, env in enumerate(envs, lo):
+                    _, reward, term, trunc, _ = env.step(actions[i])
+                    rewards[i], terminated[i], truncated[i] = reward, term, trunc
+                    if term or trunc:
+                        arrays["episode_lines"][i] = env.game.lines
+                        arrays["episode_score"][i] = env.game.score
+                        env.reset()
+            elif cmd == b"r":
+                for env in envs:
+                    env.reset()
+            else:
+                break
+            conn.send_bytes(b"")
+        del arrays, actions, rewards, terminated, truncated, envs
+    finally:
+        shm.close()
+
+
+class SubprocVecEnv:
+    def __init__(self, n, seed=0, workers=None, gravity=None, max_steps=None):
+        workers = max(1, min(n, workers or os.cpu_count() or 1))
+        self.n = n
+        size = _layout(n)[1]
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self.arrays = _views(self._shm.buf, n)
+        self.obs = {k: self.arrays[k] for k in ("board", "piece", "queue")}
+        ctx = get_context("fork" if "fork" in get_all_start_methods() else "spawn")
+        self._conns, self._procs = [], []
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=_worker, daemon=True, args=(
+                child, self._shm.name, n, int(lo), int(hi), [seed + i for i in range(lo, hi)], gravity, max_steps))
+            p.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(p)
+
+    def _command(self, cmd):
+        for conn in self._conns:
+            conn.send_bytes(cmd)
+        for conn in self._conns:
+            conn.recv_bytes()
+
+    def reset(self):
+        self._command(b"r")
+        return self.obs
+
+    def step(self, actions):
+        """Step every env; returns (obs, rewards, terminated, truncated) as views into shared memory."""
+        self.arrays["actions"][:] = actions
+        self._command(b"s")
+        a = self.arrays
+        return self.obs, a["rewards"], a["terminated"], a["truncated"]
+
+    def close(self):
+        for conn in self._conns:
+            try:
+                conn.send_bytes(b"q")
+            except OSError:
+                pass
+        for p in self._procs:
+            p.join(timeout=5)
+        self.obs = self.arrays = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+# -------------------- Runs --------------------
+def matches_game(obs, game):
+    """Whether `obs` describes `game`, decoded independently of ``_observe``."""
+    board = [[CODES[c] for c in row] for row in game.grid]
+    cur = game.current
+    preview = [game.next_piece.kind, *game.queue]
+    return (obs["board"].tolist() == board
+            and obs["piece"].tolist() == [KINDS.index(cur.kind), cur.x, cur.y, cur.rot]
+            and [KINDS[k] for k in obs["queue"]] == preview)
+
+
+def check(n, steps, seed, workers):
+    rng = np.random.default_rng(seed)
+    vec = SubprocVecEnv(n, seed, workers, max_steps=400)
+    envs = [TetrisEnv(seed + i, max_steps=400) for i in range(n)]
+    try:
+        vec.reset()
+        for env in envs:
+            env.reset()
+        for t in range(steps):
+            actions = rng.integers(0, ACTIONS, n)
+            obs, rewards, terminated, truncated = vec.step(actions)
+            for i, env in enumerate(envs):
+                o, r, term, trunc, _ = env.step(actions[i])
+                if term or trunc:
+                    o, _ = env.reset()
+                if (r != rewards[i] or term != terminated[i] or trunc != truncated[i]
+                        or any(not np.array_equal(o[k], obs[k][i]) for k in o)):
+                    raise SystemExit(f"env {i} differs at step {t}")
+                if not matches_game(o, env.game):
+                    raise SystemExit(f"env {i} observes something other than its game at step {t}")
+    finally:
+        vec.close()
+    print(f"{n} envs x {steps} steps: shared-memory observations match in-process envs")
+
+
+def bench(n, steps, seed, workers):
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, ACTIONS, (steps, n))
+
+    env = TetrisEnv(seed, max_steps=1000)
+    env.reset()
+    start = time.perf_counter()
+    for a in actions[:, 0]:
+        _, _, term, trunc, _ = env.step(a)
+        if term or trunc:
+            env.reset()
+    single = steps / (time.perf_counter() - start)
+
+    vec = SubprocVecEnv(n, seed, workers, max_steps=1000)
+    try:
+        vec.reset()
+        start = time.perf_counter()
+        for a in actions:
+            vec.step(a)
+        elapsed = time.perf_counter() - start
+    finally:
+        vec.close()
+    print(f"single env: {single:,.0f} steps/s")
+    print(f"{n} envs in {workers or os.cpu_count()} workers: {steps * n / elapsed:,.0f} env steps/s, "
+          f"{elapsed / steps * 1e3:.2f} ms per vector step")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gym-style env and shared-memory vectorized env")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="compare the vectorized env with in-process envs")
+    args = parser.parse_args()
+    engines.headless()
+    if args.check:
+        check(min(args.envs, 16), min(args.steps, 1500), args.seed, args.workers or 2)
+    else:
+        bench(args.envs, args.steps, args.seed, args.workers)
+
+
+if __name__ == "__main__":
+    main()
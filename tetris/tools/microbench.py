@@ -0,0 +1,497 @@
+"""Microbenchmarks of engine primitives across the six implementations.
+
+Every implementation has its own collision test, line clear and rotation.
+This suite runs each of them over one shared corpus of boards and reports
+ns/op with a 95% confidence interval:
+
+    collision  _collides / valid / check_collision / valid_space /
+               is_valid_position / valid_position
+    clear      _clear_lines / clear_lines / clear_rows / clear_lines(locked)
+    rotate     table lookup (SHAPES[kind][rot]) vs zip(*shape[::-1])
+    snapshot   Tetris.snapshot / Tetris.restore (GPT-5.2 thinking only)
+
+The corpus is generated from a seed and has four board classes: empty,
+ragged, near_full and tetris_ready (bottom four rows missing only the well
+column). The clear benchmark fills the well first, so tetris_ready clears
+four rows.
+
+    python tetris/tools/microbench.py --save-baseline micro_baseline.json
+    python tetris/tools/microbench.py --baseline micro_baseline.json
+
+With --baseline, any result whose confidence interval lies entirely above
+the baseline mean by more than --threshold is reported as a regression, and
+the exit status is 1.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+import engines
+
+ROWS, COLS = 20, 10
+KINDS = "IOTSZJL"
+LIST_ORDER = "IJLOSTZ"  # order of the list-based SHAPES tables
+BOARD_CLASSES = ("empty", "ragged", "near_full", "tetris_ready")
+WELL = COLS - 1
+
+
+# -------------------- Corpus --------------------
+def _stack(rng, heights, holes):
+    board = [[None] * COLS for _ in range(ROWS)]
+    for x, h in enumerate(heights):
+        for y in range(ROWS - h, ROWS):
+            if rng.random() >= holes:
+                board[y][x] = rng.choice(KINDS)
+    return board
+
+
+def corpus(seed=0, per_class=8):
+    """Boards as ROWS x COLS lists of piece kinds (None = empty)."""
+    rng = random.Random(seed)
+    boards = {name: [] for name in BOARD_CLASSES}
+    for _ in range(per_class):
+        boards["empty"].append([[None] * COLS for _ in range(ROWS)])
+        boards["ragged"].append(_stack(rng, [rng.randint(0, 8) for _ in range(COLS)], 0.15))
+
+        near = _stack(rng, [rng.randint(14, 18) for _ in range(COLS)], 0.05)
+        for y in rng.sample(range(ROWS - 6, ROWS), 2):
+            near[y] = [rng.choice(KINDS) for _ in range(COLS)]
+        boards["near_full"].append(near)
+
+        ready = _stack(rng, [rng.randint(4, 9) if x != WELL else 0 for x in range(COLS)], 0.1)
+        for y in range(ROWS - 4, ROWS):
+            ready[y] = [rng.choice(KINDS) if x != WELL else None for x in range(COLS)]
+        boards["tetris_ready"].append(ready)
+    return boards
+
+
+def placements(rng, n):
+    """Random (kind, rot, x, y) probes, a mix of free and blocked spots."""
+    return [(rng.choice(KINDS), rng.randrange(4), rng.randint(-1, COLS - 2), rng.randint(-1, ROWS - 2))
+            for _ in range(n)]
+
+
+def for_clear(board):
+    board = [row[:] for row in board]
+    if board[-1][WELL] is None and all(board[-1][x] for x in range(COLS) if x != WELL):
+        for y in range(ROWS - 4, ROWS):
+            board[y][WELL] = "I"
+    return board
+
+
+def _list_shape(m, kind, rot):
+    shape = m.SHAPES[LIST_ORDER.index(kind)]
+    for _ in range(rot):
+        shape = list(zip(*shape[::-1]))
+    return shape
+
+
+# -------------------- Per-implementation primitives --------------------
+# Each setup function converts the corpus into the implementation's own
+# representation (outside the timed region) and returns {primitive: (name,
+# prepare(board, probes, n) -> run or (run, reset))}; run() performs n
+# operations. Primitives that change their boards (the line clears) also
+# return reset(), which puts fresh copies back before every sample, untimed.
+
+def setup_thinking_52(m):
+    game = m.Tetris(seed=0)
+
+    def grid(board):
+        return [[None if k is None else m.COLORS[k] for k in row] for row in board]
+
+    def piece(kind, rot, x, y):
+        p = m.Piece(kind)
+        p.rot, p.x, p.y = rot, x, y
+        return p
+
+    def collision(board, probes, n):
+        g, pieces = grid(board), [piece(*p) for p in probes]
+
+        def run():
+            game.grid = g
+            collides = game._collides
+            for p in pieces:
+                collides(p)
+        return run
+
+    def clear(board, probes, n):
+        source = grid(for_clear(board))
+        pool = []
+
+        def reset():
+            pool[:] = [[row[:] for row in source] for _ in range(n)]
+
+        def run():
+            for g in pool:
+                game.grid = g
+                game._clear_lines()
+        return run, reset
+
+    def rotate(board, probes, n):
+        pieces = [piece(*p) for p in probes]
+
+        def run():
+            for p in pieces:
+                p.blocks(rot=(p.rot + 1) % 4)
+        return run
+
+    def snapshot(board, probes, n):
+        game.grid = grid(board)
+        game._rebuild_columns()
+
+        def run():
+            for _ in range(n):
+                game.snapshot()
+        return run
+
+    def restore(board, probes, n):
+        game.grid = grid(board)
+        game._rebuild_columns()
+        snap = game.snapshot()
+
+        def run():
+            for _ in range(n):
+                game.restore(snap)
+        return run
+
+    return {"collision": ("_collides", collision), "clear": ("_clear_lines", clear),
+            "rotate": ("SHAPES[kind][rot]", rotate), "snapshot": ("snapshot", snapshot),
+            "restore": ("restore", restore)}
+
+
+def setup_no_thinking_52(m):
+    game = m.Tetris(seed=0)
+
+    def grid(board):
+        return [row[:] for row in board]
+
+    def piece(kind, rot, x, y):
+        return m.Piece(kind, x, y, rot)
+
+    def collision(board, probes, n):
+        g, pieces = grid(board), [piece(*p) for p in probes]
+
+        def run():
+            game.grid = g
+            valid = game.valid
+            for p in pieces:
+                valid(p)
+        return run
+
+    def clear(board, probes, n):
+        source = grid(for_clear(board))
+        pool = []
+
+        def reset():
+            pool[:] = [[row[:] for row in source] for _ in range(n)]
+
+        def run():
+            for g in pool:
+                game.grid = g
+                game.clear_lines()
+        return run, reset
+
+    def rotate(board, probes, n):
+        pieces = [piece(*p) for p in probes]
+
+        def run():
+            for p in pieces:
+                m.Piece(p.kind, p.x, p.y, (p.rot + 1) % 4).cells()
+        return run
+
+    return {"collision": ("valid", collision), "clear": ("clear_lines", clear),
+            "rotate": ("rotate_4x4 per call", rotate)}
+
+
+def setup_vibe(m):
+    game = m.TetrisGame(seed=0)
+
+    def grid(board):
+        return [[0 if k is None else m.COLORS[LIST_ORDER.index(k)] for k in row] for row in board]
+
+    def piece(kind, rot, x, y):
+        t = m.Tetromino(x, y, m.SHAPES[LIST_ORDER.index(kind)])
+        t.shape = _list_shape(m, kind, rot)
+        return t
+
+    def collision(board, probes, n):
+        g, pieces = grid(board), [piece(*p) for p in probes]
+
+        def run():
+            game.grid = g
+            check = game.check_collision
+            for p in pieces:
+                game.current_piece = p
+                check()
+        return run
+
+    def clear(board, probes, n):
+        source = grid(for_clear(board))
+        pool = []
+
+        def reset():
+            pool[:] = [[row[:] for row in source] for _ in range(n)]
+
+        def run():
+            for g in pool:
+                game.grid = g
+                game.clear_lines()
+        return run, reset
+
+    def rotate(board, probes, n):
+        shapes = [piece(*p).shape for p in probes]
+
+        def run():
+            for shape in shapes:
+                [list(row) for row in zip(*shape[::-1])]
+        return run
+
+    return {"collision": ("check_collision", collision), "clear": ("clear_lines", clear),
+            "rotate": ("zip(*shape[::-1])", rotate)}
+
+
+def setup_gpt_40(m):
+    def grid(board):
+        return [[m.BLACK if k is None else m.COLORS[LIST_ORDER.index(k)] for k in row] for row in board]
+
+    def piece(kind, rot, x, y):
+        p = m.Piece(x, y, m.SHAPES[LIST_ORDER.index(kind)])
+        p.shape = _list_shape(m, kind, rot)
+        return p
+
+    def collision(board, probes, n):
+        g, pieces = grid(board), [piece(*p) for p in probes]
+
+        def run():
+            valid_space = m.valid_space
+            for p in pieces:
+                valid_space(p, g)
+        return run
+
+    def clear(board, probes, n):
+        source = grid(for_clear(board))
+        pool = []
+
+        def reset():
+            pool[:] = [[row[:] for row in source] for _ in range(n)]
+
+        def run():
+            clear_rows = m.clear_rows
+            for g in pool:
+                clear_rows(g)
+        return run, reset
+
+    def rotate(board, probes, n):
+        shapes = [piece(*p).shape for p in probes]
+
+        def run():
+            for shape in shapes:
+                list(zip(*shape[::-1]))
+        return run
+
+    return {"collision": ("valid_space", collision), "clear": ("clear_rows", clear),
+            "rotate": ("zip(*shape[::-1])", rotate)}
+
+
+def setup_thinking_51(m):
+    def locked(board):
+        return {(x, y): m.COLORS[k] for y, row in enumerate(board) for x, k in enumerate(row) if k}
+
+    def piece(kind, rot, x, y):
+        p = m.Piece(kind)
+        p.rotation = rot % len(p.rotations)
+        p.x, p.y = x, y
+        return p
+
+    def collision(board, probes, n):
+        g, pieces = m.create_grid(locked(board)), [piece(*p) for p in probes]
+
+        def run():
+            valid = m.is_valid_position
+            for p in pieces:
+                valid(g, p)
+        return run
+
+    def clear(board, probes, n):
+        source = locked(for_clear(board))
+        pool = []
+
+        def reset():
+            pool[:] = [dict(source) for _ in range(n)]
+
+        def run():
+            clear_lines = m.clear_lines
+            for positions in pool:
+                clear_lines(positions)
+        return run, reset
+
+    def rotate(board, probes, n):
+        pieces = [piece(*p) for p in probes]
+
+        def run():
+            for p in pieces:
+                p.rotation = (p.rotation + 1) % len(p.rotations)
+                p.blocks
+        return run
+
+    return {"collision": ("is_valid_position", collision), "clear": ("clear_lines(locked)", clear),
+            "rotate": ("rotations[rotation]", rotate)}
+
+
+def setup_no_thinking_51(m):
+    def grid(board):
+        return [[0 if k is None else m.COLORS[LIST_ORDER.index(k)] for k in row] for row in board]
+
+    def piece(kind, rot, x, y):
+        p = m.Piece()
+        p.shape = _list_shape(m, kind, rot)
+        p.x, p.y = x, y
+        return p
+
+    def collision(board, probes, n):
+        g, pieces = grid(board), [piece(*p) for p in probes]
+
+        def run():
+            m.grid = g
+            valid = m.valid_position
+            for p in pieces:
+                valid(p)
+        return run
+
+    def clear(board, probes, n):
+        source = grid(for_clear(board))
+        pool = []
+
+        def reset():
+            pool[:] = [[row[:] for row in source] for _ in range(n)]
+
+        def run():
+            clear_lines = m.clear_lines
+            for g in pool:
+                m.grid = g
+                clear_lines()
+        return run, reset
+
+    def rotate(board, probes, n):
+        pieces = [piece(*p) for p in probes]
+
+        def run():
+            for p in pieces:
+                p.rotate()
+        return run
+
+    return {"collision": ("valid_position", collision), "clear": ("clear_lines()", clear),
+            "rotate": ("zip(*shape[::-1])", rotate)}
+
+
+SETUPS = {
+    "gpt_40": setup_gpt_40,
+    "with_thinking_gpt_5.1": setup_thinking_51,
+    "without_thinking_gpt_5.1": setup_no_thinking_51,
+    "with_thinking_gpt_5.2": setup_thinking_52,
+    "without_thinking_gpt_5.2": setup_no_thinking_52,
+    "vibe": setup_vibe,
+}
+
+
+# -------------------- Timing --------------------
+def time_primitive(prepare, boards, rng, ops, samples):
+    """ns/op samples; each sample runs `ops` operations on every board."""
+    runs, resets = [], []
+    for board in boards:
+        probes = placements(rng, ops)
+        run = prepare(board, probes, ops)
+        if isinstance(run, tuple):
+            run, reset = run
+            resets.append(reset)
+        runs.append(run)
+    clock = time.perf_counter_ns
+    for reset in resets:
+        reset()
+    for run in runs:  # warm-up
+        run()
+    out = []
+    for _ in range(samples):
+        for reset in resets:
+            reset()
+        start = clock()
+        for run in runs:
+            run()
+        out.append((clock() - start) / (ops * len(runs)))
+    return out
+
+
+def summarize(samples):
+    mean = statistics.fmean(samples)
+    half = 1.96 * statistics.stdev(samples) / len(samples) ** 0.5 if len(samples) > 1 else 0.0
+    return {"ns": mean, "ci95": half}
+
+
+def run_suite(impls, seed, ops, samples):
+    engines.headless()
+    boards = corpus(seed)
+    results = {}
+    for impl in impls:
+        setup = SETUPS[impl](engines.load(impl))
+        for primitive, (func, prepare) in setup.items():
+            for cls in BOARD_CLASSES:
+                rng = random.Random(seed)
+                stats = summarize(time_primitive(prepare, boards[cls], rng, ops, samples))
+                stats["function"] = func
+                results[f"{primitive}/{impl}/{cls}"] = stats
+    return results
+
+
+def regressions(results, baseline, threshold):
+    out = []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base and r["ns"] - r["ci95"] > base["ns"] * (1 + threshold):
+            out.append((key, base["ns"], r["ns"]))
+    return out
+
+
+def print_table(results, baseline=None):
+    print(f"{'primitive/implementation/board':58} {'function':22} {'ns/op':>10} {'±95%':>8} {'vs base':>8}")
+    for key, r in results.items():
+        delta = ""
+        if baseline and key in baseline:
+            delta = f"{(r['ns'] / baseline[key]['ns'] - 1) * 100:+.1f}%"
+        print(f"{key:58} {r['function']:22} {r['ns']:10.1f} {r['ci95']:8.1f} {delta:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine primitive microbenchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ops", type=int, default=200, help="operations per board per sample")
+    parser.add_argument("--samples", type=int, default=15)
+    parser.add_argument("--only", nargs="*", choices=sorted(SETUPS), default=list(SETUPS))
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--save-baseline", help="write results as a new baseline file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = run_suite(args.only, args.seed, args.ops, args.samples)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if baseline:
+        slow = regressions(results, baseline, args.threshold)
+        for key, before, after in slow:
+            print(f"REGRESSION {key}: {before:.1f} -> {after:.1f} ns/op")
+        if slow:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
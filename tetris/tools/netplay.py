@@ -0,0 +1,512 @@
+"""Two-player versus over UDP with rollback netcode.
+
+Both players run the same seeded pair of GPT-5.2 (thinking) ``Tetris``
+games in lockstep, one fixed 1/FPS step per frame. Doubles, triples and
+tetrises send garbage (``GARBAGE_LINES``) that lands on the other board in
+the same frame, with the hole column drawn from the seed and frame.
+Because a frame is a pure function of the previous state and both players'
+button masks, the two sides only exchange inputs.
+
+Local input is applied at once. The remote player's input for a frame
+that has not arrived yet is predicted (the buttons they last held stay
+held). When the real input turns out different, the session restores the
+snapshot taken before that frame and re-simulates up to the present with
+the corrected input. If the remote side falls more than `max_rollback`
+frames behind, the session stalls instead of predicting further.
+
+Each packet carries every input the peer has not acknowledged yet, so a
+lost packet is covered by the next one. ``LatencyLink`` wraps a transport
+to add latency, jitter and loss on the sending side.
+
+    python tetris/tools/netplay.py --frames 3600 --latency-ms 80 --jitter-ms 20 --loss 0.05
+    python tetris/tools/netplay.py --play --latency-ms 100
+    python tetris/tools/netplay.py --play --bind 0.0.0.0:7000 --peer 192.168.1.20:7000 --player 0
+    python tetris/tools/netplay.py --check
+
+The default run plays two bots against each other over UDP on loopback,
+with time simulated so the run is quick and reproducible, and reports how
+often each side rolled back and what the re-simulation cost per frame.
+--play opens a window with you on the left. The opponent is that bot on
+a loopback socket, or with --peer a second copy of this tool (both sides
+need the same --seed). Over a real network nothing is added by default,
+but --latency-ms, --jitter-ms and --loss still apply on the sending side. --check replays the confirmed inputs in plain
+lockstep and checks that both peers ended up in exactly that state.
+"""
+import argparse
+import heapq
+import random
+import socket
+import struct
+import time
+
+import autoplay
+import engines
+import placements
+
+engine = placements.engine
+FPS = engine.FPS
+DT = 1.0 / FPS
+
+LEFT, RIGHT, ROTATE, DOWN, DROP = 1, 2, 4, 8, 16
+CHECK_GARBAGE = 12
+LINK = (80.0, 20.0, 0.05)  # default latency ms, jitter ms and loss of the simulated link
+_pg = engine.pygame
+KEYS = ((LEFT, _pg.K_LEFT), (RIGHT, _pg.K_RIGHT), (ROTATE, _pg.K_UP), (DOWN, _pg.K_DOWN), (DROP, _pg.K_SPACE))
+
+
+def apply_input(game, held, buttons):
+    """Turn the change from `held` to `buttons` into the engine's key events."""
+    if held == buttons:
+        return
+    for bit, key in KEYS:
+        if buttons & bit and not held & bit:
+            engine.key_down(game, key)
+        elif held & bit and not buttons & bit:
+            engine.key_up(game, key)
+
+
+# -------------------- Versus --------------------
+class Versus:
+    """Two boards and the garbage between them, stepped one frame at a time."""
+
+    def __init__(self, seed, garbage=0):
+        self.seed = seed
+        self.garbage = garbage
+        self.games = [engine.Tetris(seed=seed), engine.Tetris(seed=seed)]
+        self.frame = 0
+        self.held = (0, 0)
+        for game in self.games:  # a head start of garbage rows: clears come sooner and bigger
+            game.add_garbage(garbage, self.hole(2))
+
+    def hole(self, player):
+        return random.Random(self.seed * 7919 + self.frame * 2 + player).randrange(engine.COLS)
+
+    def step(self, inputs):
+        sent = []
+        for game, held, buttons in zip(self.games, self.held, inputs):
+            before = game.garbage_sent
+            apply_input(game, held, buttons)
+            engine.advance(game, DT)
+            sent.append(game.garbage_sent - before)
+        for player, lines in enumerate(sent):
+            if lines:
+                self.games[1 - player].add_garbage(lines, self.hole(player))
+        self.held = tuple(inputs)
+        self.frame += 1
+
+    def snapshot(self):
+        return self.frame, self.held, self.games[0].snapshot(), self.games[1].snapshot()
+
+    def restore(self, snap):
+        self.frame, self.held, a, b = snap
+        self.games[0].restore(a)
+        self.games[1].restore(b)
+
+    def state(self):
+        """Everything that must match between peers, for --check."""
+        return self.frame, self.held, tuple((g.state_hash(), g.score, g.lines, g.garbage_sent, g.game_over)
+                                            for g in self.games)
+
+
+# -------------------- Transport --------------------
+class UdpTransport:
+    """Non-blocking UDP socket talking to one peer."""
+
+    def __init__(self, bind=("127.0.0.1", 0), peer=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.sock.bind(bind)
+        self.address = self.sock.getsockname()
+        self.peer = peer
+
+    def send(self, data):
+        if self.peer is not None:
+            self.sock.sendto(data, self.peer)
+
+    def recv(self):
+        packets = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+            if self.peer is None:
+                self.peer = addr  # the listening side answers whoever talks first
+            packets.append(data)
+
+    def close(self):
+        self.sock.close()
+
+
+class LatencyLink:
+    """Delays, jitters and drops outgoing packets before they reach `transport`.
+
+    `clock` returns seconds; the headless runs pass a simulated clock so a
+    run does not depend on how fast this machine is.
+    """
+
+    def __init__(self, transport, latency_ms=0.0, jitter_ms=0.0, loss=0.0, seed=0, clock=time.monotonic):
+        self.transport = transport
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.pending = []
+        self.count = 0
+        self.sent = self.dropped = 0
+
+    def send(self, data):
+        self.sent += 1
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = self.clock() + max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        self.count += 1
+        heapq.heappush(self.pending, (due, self.count, data))
+        self.flush()
+
+    def flush(self):
+        now = self.clock()
+        while self.pending and self.pending[0][0] <= now:
+            self.transport.send(heapq.heappop(self.pending)[2])
+
+    def recv(self):
+        self.flush()
+        return self.transport.recv()
+
+    def close(self):
+        self.transport.close()
+
+
+# -------------------- Rollback session --------------------
+# packet: frames of ours the peer has confirmed, first frame carried, count, then one input byte per frame
+HEADER = struct.Struct("<IIB")
+MAX_INPUTS = 255
+
+
+class RollbackSession:
+    def __init__(self, player, transport, seed, max_rollback=8, garbage=0):
+        self.player = player
+        self.remote = 1 - player
+        self.transport = transport
+        self.max_rollback = max_rollback
+        self.versus = Versus(seed, garbage)
+        self.inputs = ([], [])  # confirmed inputs per player, indexed by frame
+        self.predicted = {}  # frame -> remote input it was simulated with
+        self.snaps = {}  # frame -> Versus snapshot taken before simulating it
+        self.acked = 0  # local frames the peer has confirmed
+
+        # metrics
+        self.rollbacks = 0
+        self.resimulated = []  # frames re-simulated per rollback
+        self.resim_ns = []  # re-simulation cost of each rollback
+        self.frame_ns = []  # update() + advance() per advanced frame
+        self.stalls = 0
+        self.garbage_resimulated = 0  # re-simulated frames in which garbage was sent
+        self._update_ns = 0
+
+    @property
+    def frame(self):
+        return self.versus.frame
+
+    @property
+    def game(self):
+        return self.versus.games[self.player]
+
+    def remote_input(self, frame):
+        confirmed = self.inputs[self.remote]
+        if frame < len(confirmed):
+            return confirmed[frame]
+        return confirmed[-1] if confirmed else 0
+
+    def _inputs(self, frame):
+        pair = [0, 0]
+        pair[self.player] = self.inputs[self.player][frame]
+        pair[self.remote] = self.remote_input(frame)
+        return pair
+
+    def _simulate(self, frame):
+        self.snaps[frame] = self.versus.snapshot()
+        pair = self._inputs(frame)
+        if frame >= len(self.inputs[self.remote]):
+            self.predicted[frame] = pair[self.remote]
+        self.versus.step(pair)
+
+    def _garbage(self):
+        return self.versus.games[0].garbage_sent + self.versus.games[1].garbage_sent
+
+    def receive(self):
+        """Take in remote inputs; returns the earliest frame that was mispredicted, or None."""
+        confirmed = self.inputs[self.remote]
+        rollback = None
+        for data in self.transport.recv():
+            if len(data) < HEADER.size:
+                continue
+            acked, start, count = HEADER.unpack_from(data)
+            self.acked = max(self.acked, acked)
+            for frame in range(max(start, len(confirmed)), start + count):
+                if frame != len(confirmed):
+                    break  # a gap; the peer resends from what we acknowledged
+                buttons = data[HEADER.size + frame - start]
+                confirmed.append(buttons)
+                guess = self.predicted.pop(frame, None)
+                if guess is not None and guess != buttons and rollback is None:
+                    rollback = frame
+        return rollback
+
+    def send(self):
+        local = self.inputs[self.player]
+        start = self.acked
+        batch = bytes(local[start:start + MAX_INPUTS])
+        self.transport.send(HEADER.pack(len(self.inputs[self.remote]), start, len(batch)) + batch)
+
+    def update(self):
+        """Receive, roll back if needed, and say whether a new frame may be simulated."""
+        start = time.perf_counter_ns()
+        rollback = self.receive()
+        if rollback is not None:
+            now = self.frame
+            self.versus.restore(self.snaps[rollback])
+            for frame in range(rollback, now):
+                before = self._garbage()
+                self._simulate(frame)
+                self.garbage_resimulated += self._garbage() != before
+            self.rollbacks += 1
+            self.resimulated.append(now - rollback)
+            self.resim_ns.append(time.perf_counter_ns() - start)
+        # frames before the first unconfirmed one can never be rolled back to
+        for frame in [f for f in self.snaps if f < len(self.inputs[self.remote])]:
+            del self.snaps[frame]
+        self._update_ns = time.perf_counter_ns() - start
+        if self.frame - len(self.inputs[self.remote]) >= self.max_rollback:
+            self.stalls += 1
+            self.send()
+            return False
+        return True
+
+    def advance(self, buttons):
+        """Simulate the next frame with the local `buttons` and send them."""
+        start = time.perf_counter_ns()
+        self.inputs[self.player].append(buttons)
+        self._simulate(self.frame)
+        self.send()
+        self.frame_ns.append(self._update_ns + time.perf_counter_ns() - start)
+
+    def synced(self):
+        """True once every frame simulated so far has confirmed inputs from both sides."""
+        return len(self.inputs[self.remote]) >= self.frame and self.acked >= self.frame
+
+
+# -------------------- Players --------------------
+class InputBot:
+    """Plays through button presses: picks a drop with the autoplayer's
+    heuristic when a piece spawns, then taps the path one press per two
+    frames after a short reaction delay."""
+
+    def __init__(self, seed=0, reaction=(4, 12)):
+        self.rng = random.Random(seed)
+        self.reaction = reaction
+        self.plan = []
+        self.pieces = None
+
+    def input(self, game):
+        if game.game_over:
+            return 0
+        if game.pieces != self.pieces:
+            self.pieces = game.pieces
+            self.plan = self._plan(game)
+        return self.plan.pop() if self.plan else 0
+
+    def _plan(self, game):
+        columns = tuple(game.columns)
+        options = placements.drops(columns, game.current.kind)
+        if not options:
+            return [DROP]
+        best = max(options, key=lambda p: autoplay.evaluate(columns, p.cells))
+        bits = {placements.LEFT: LEFT, placements.RIGHT: RIGHT, placements.ROTATE: ROTATE,
+                placements.DROP: DROP}
+        presses = [0] * self.rng.randint(*self.reaction)
+        for action in best.path:
+            presses += [bits[action], 0]
+        return presses[::-1]
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def report(session, frames):
+    name = f"player {session.player}"
+    resim = session.resimulated
+    print(f"{name}: {session.rollbacks} rollbacks in {frames} frames "
+          f"({session.rollbacks / max(1, frames):.1%} of frames), {session.stalls} stalled ticks")
+    if resim:
+        print(f"  re-simulated frames per rollback: mean {sum(resim) / len(resim):.2f}  max {max(resim)}")
+        print(f"  rollback cost: p50 {_percentile(session.resim_ns, 0.5) / 1e3:.0f} us  "
+              f"p99 {_percentile(session.resim_ns, 0.99) / 1e3:.0f} us  max {max(session.resim_ns) / 1e3:.0f} us")
+    print(f"  frame cost: p50 {_percentile(session.frame_ns, 0.5) / 1e3:.0f} us  "
+          f"p99 {_percentile(session.frame_ns, 0.99) / 1e3:.0f} us")
+
+
+# -------------------- Runs --------------------
+def loopback_pair(seed, latency_ms, jitter_ms, loss, max_rollback, clock, garbage=0):
+    """Two sessions talking over UDP on 127.0.0.1 through latency links."""
+    a, b = UdpTransport(), UdpTransport()
+    a.peer, b.peer = b.address, a.address
+    links = [LatencyLink(t, latency_ms, jitter_ms, loss, seed + i, clock) for i, t in enumerate((a, b))]
+    return [RollbackSession(i, link, seed, max_rollback, garbage) for i, link in enumerate(links)]
+
+
+def simulate(frames, seed, latency_ms, jitter_ms, loss, max_rollback, garbage=0):
+    """Bot against bot on loopback with simulated time. Returns the sessions once both are in sync."""
+    tick = [0]
+    sessions = loopback_pair(seed, latency_ms, jitter_ms, loss, max_rollback, lambda: tick[0] * DT, garbage)
+    bots = [InputBot(seed + 100), InputBot(seed + 200)]
+    while min(s.frame for s in sessions) < frames:
+        for session, bot in zip(sessions, bots):
+            if session.update() and session.frame < frames:
+                session.advance(bot.input(session.game))
+        tick[0] += 1
+    # let the last inputs arrive (and be acknowledged) so both sides settle
+    for _ in range(10 * FPS):
+        if all(s.synced() for s in sessions):
+            break
+        for session in sessions:
+            session.update()
+            session.send()
+        tick[0] += 1
+    return sessions
+
+
+def reference(session):
+    """Replay a session's confirmed inputs in plain lockstep, without prediction."""
+    versus = Versus(session.versus.seed, session.versus.garbage)
+    for frame in range(session.frame):
+        versus.step([session.inputs[0][frame], session.inputs[1][frame]])
+    return versus
+
+
+def check(seed, frames):
+    # the last run starts both boards on CHECK_GARBAGE rows, so clears send garbage
+    # often, and some of it is sent in frames a rollback has to simulate again
+    runs = ((0, 0, 0.0, 0), (50, 10, 0.0, 0), (120, 40, 0.1, 0), (250, 80, 0.3, 0), (120, 40, 0.1, CHECK_GARBAGE))
+    for latency, jitter, loss, garbage in runs:
+        sessions = simulate(frames, seed, latency, jitter, loss, max_rollback=30, garbage=garbage)
+        if not all(s.synced() for s in sessions):
+            raise SystemExit(f"peers never synced at {latency} ms / {loss:.0%} loss")
+        expected = reference(sessions[0]).state()
+        for s in sessions:
+            if s.versus.state() != expected:
+                raise SystemExit(f"player {s.player} diverged at {latency} ms / {loss:.0%} loss")
+        if sessions[0].inputs != sessions[1].inputs:
+            raise SystemExit("peers disagree on the inputs")
+        sent = [g.garbage_sent for g in sessions[0].versus.games]
+        resim = sum(s.garbage_resimulated for s in sessions)
+        if garbage and not (all(sent) and resim):
+            raise SystemExit(f"garbage run sent {sent} lines, {resim} frames of it rolled back: nothing was tested")
+        print(f"{latency:3d} ms +-{jitter:2d} loss {loss:4.0%}{f', {garbage} rows of garbage' if garbage else ''}: "
+              f"both peers match lockstep after {frames} frames "
+              f"({sessions[0].rollbacks} + {sessions[1].rollbacks} rollbacks, garbage sent {sent[0]} + {sent[1]}, "
+              f"{resim} garbage frames re-simulated)")
+        for s in sessions:
+            s.transport.close()
+
+
+def _address(text):
+    host, port = text.rsplit(":", 1)
+    return host, int(port)
+
+
+def play(seed, latency_ms, jitter_ms, loss, max_rollback, bind=None, peer=None, player=0):
+    """Window with the local board on the left; the opponent is a loopback bot or `peer`."""
+    pg = engine.pygame
+    pg.init()
+    pg.display.set_caption("Tetris versus")
+    screen = pg.display.set_mode((2 * engine.WIDTH, engine.HEIGHT))
+    halves = [pg.Surface((engine.WIDTH, engine.HEIGHT)) for _ in range(2)]
+    fonts = engine.load_fonts()
+    clock = pg.time.Clock()
+
+    if peer is None and bind is None:
+        sessions = loopback_pair(seed, latency_ms, jitter_ms, loss, max_rollback, time.monotonic)
+        local, bot_session = sessions
+        bot = InputBot(seed + 200)
+    else:
+        transport = UdpTransport(bind or ("0.0.0.0", 0), peer)
+        if latency_ms or jitter_ms or loss:
+            transport = LatencyLink(transport, latency_ms, jitter_ms, loss, seed)
+        local, bot_session = RollbackSession(player, transport, seed, max_rollback), None
+        sessions = [local]
+
+    running = True
+    while running:
+        clock.tick(FPS)
+        for event in pg.event.get():
+            if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
+                running = False
+        keys = pg.key.get_pressed()
+        if local.update():
+            local.advance(sum(bit for bit, key in KEYS if keys[key]))
+        if bot_session is not None and bot_session.update():
+            bot_session.advance(bot.input(bot_session.game))
+
+        games = local.versus.games
+        for surface, game in zip(halves, (games[local.player], games[local.remote])):
+            engine.draw(surface, fonts, game)
+        screen.blit(halves[0], (0, 0))
+        screen.blit(halves[1], (engine.WIDTH, 0))
+        pg.display.flip()
+
+    pg.quit()
+    for s in sessions:
+        report(s, s.frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versus over UDP with rollback netcode")
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float,
+                        help=f"one-way latency added to each packet (default {LINK[0]:g}, none with --peer/--bind)")
+    parser.add_argument("--jitter-ms", type=float, help=f"(default {LINK[1]:g}, none with --peer/--bind)")
+    parser.add_argument("--loss", type=float,
+                        help=f"fraction of packets dropped (default {LINK[2]:g}, none with --peer/--bind)")
+    parser.add_argument("--max-rollback", type=int, default=12, help="frames of prediction before stalling")
+    parser.add_argument("--play", action="store_true", help="open a window and play")
+    parser.add_argument("--bind", type=_address, help="host:port to listen on (with --play)")
+    parser.add_argument("--peer", type=_address, help="host:port of the other player (with --play)")
+    parser.add_argument("--player", type=int, choices=(0, 1), default=0, help="which side this copy plays")
+    parser.add_argument("--check", action="store_true", help="check rollback against plain lockstep")
+    args = parser.parse_args()
+
+    # a real network brings its own latency; add to it only what was asked for
+    network = args.play and (args.peer is not None or args.bind is not None)
+    link = [(0 if network else default) if value is None else value
+            for value, default in zip((args.latency_ms, args.jitter_ms, args.loss), LINK)]
+    args.latency_ms, args.jitter_ms, args.loss = link
+    if args.play:
+        play(args.seed, *link, args.max_rollback, args.bind, args.peer, args.player)
+        return
+    engines.headless()
+    if args.check:
+        check(args.seed, min(args.frames, 1800))
+        return
+
+    sessions = simulate(args.frames, args.seed, args.latency_ms, args.jitter_ms, args.loss, args.max_rollback)
+    links = [s.transport for s in sessions]
+    print(f"{args.frames} frames at {args.latency_ms:.0f} ms +-{args.jitter_ms:.0f} ms, {args.loss:.0%} loss: "
+          f"{sum(l.sent for l in links)} packets, {sum(l.dropped for l in links)} dropped")
+    for s in sessions:
+        g = s.game
+        print(f"player {s.player}: {g.pieces} pieces, {g.lines} lines, {g.garbage_sent} garbage sent"
+              + (", topped out" if g.game_over else ""))
+    for s in sessions:
+        report(s, args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""Perfect-clear solver for the GPT-5.2 (thinking) ``Tetris`` engine.
+
+Given a board and the known pieces (falling, ``next_piece`` and the
+preview ``queue``), ``solve`` says whether a perfect clear, a board with no
+cells left, can be reached with the next `n` pieces, and returns one
+sequence of placements that does it.
+
+Only the bottom `height` rows take part. A clear in `height` rows
+needs exactly ``(10 * height - filled) / 4`` pieces, so only heights
+where that is a whole number of pieces, at most `n`, are tried. Each is
+searched from low to high, up to `max_rows` (default 6). The field is one
+integer with bit ``row * COLS + x`` set for a filled cell and row 0 at the
+bottom. Piece masks come from the engine's ``SHAPES`` tables.
+
+Moves are the ones ``placements.drops`` finds: rotate at spawn, slide,
+hard drop. With the rows above the field empty, that is every rotation at
+every column. Tucks and spins are not tried, so "no" means no perfect
+clear by drops. Pieces are used in queue order; this engine has no hold.
+
+Pruning, all of it exact:
+
+* Column parity. Colour the columns alternately. The difference between
+  empty cells in even and odd columns is unchanged by line clears (a full
+  row has five of each), so the remaining pieces must be able to cover
+  exactly that difference. L and J always cover 3:1, T covers 2:2 or 3:1,
+  I covers 2:2 or 4:0, and O, S and Z always cover 2:2.
+* Walls. A column filled from the floor to the top of the field can never
+  be crossed, so the empty cells to its left must come in fours.
+* Tiling. The empty cells must be exactly coverable by the remaining
+  pieces in any order, each piece allowed to straddle rows that a clear
+  will have removed by the time it lands. Drops add one rule: a cell with
+  a filled cell above it is reachable only after that row clears, and a
+  row clears only when full, so no piece may cover both such a cell and an
+  empty cell of a row it waits on. Covers are built column by column from
+  whichever end of the field has fewer ways to cover its outermost empty
+  cell. A check that runs past ``TILE_EFFORT`` nodes lets the state through.
+* Transposition table. Failed (field, height, piece index) triples and
+  tiling results are remembered for the rest of the solve. With no hold,
+  the piece index fixes which pieces are left.
+
+Ten pieces from an empty board are the expensive case, so the search has
+a time budget (``--budget``, default 1 s). When it runs out, the answer
+is "unknown" rather than "none".
+
+    python tetris/tools/perfectclear.py --queue IOTSZJLIOT
+    python tetris/tools/perfectclear.py --queue IOTSZJLIOT --budget 0
+    python tetris/tools/perfectclear.py --bench 50 --pieces 10 --check
+"""
+import argparse
+import random
+import time
+from functools import lru_cache
+from itertools import combinations
+
+import engines
+import placements
+
+engine = placements.engine
+ROWS, COLS = engine.ROWS, engine.COLS
+ROW = (1 << COLS) - 1
+
+
+def _shapes(kind):
+    """Distinct (mask, width, height, x offset, y offset, rot) for `kind` at column 0, row 0."""
+    out, seen = [], set()
+    for rot, cells in enumerate(engine.SHAPES[kind]):
+        minx = min(bx for bx, _ in cells)
+        maxy = max(by for _, by in cells)
+        mask = 0
+        for bx, by in cells:
+            mask |= 1 << ((maxy - by) * COLS + bx - minx)
+        if mask in seen:
+            continue
+        seen.add(mask)
+        width = max(bx for bx, _ in cells) - minx + 1
+        height = maxy - min(by for _, by in cells) + 1
+        out.append((mask, width, height, minx, maxy, rot))
+    return out
+
+
+SHAPES = {kind: _shapes(kind) for kind in engine.SHAPES}
+
+# even-minus-odd column counts a piece can cover, over rotations and columns
+STRIPES = {}
+for _kind, _cells in engine.SHAPES.items():
+    _diffs = set()
+    for _rot in _cells:
+        d = sum(1 if bx % 2 == 0 else -1 for bx, _ in _rot)
+        _diffs.update((d, -d))
+    STRIPES[_kind] = frozenset(_diffs)
+
+TILE_EFFORT = 200  # tiling nodes per check before it gives up and lets the state through
+CHECK_EVERY = 128  # nodes between deadline checks
+
+EVEN = sum(1 << x for x in range(0, COLS, 2))
+
+
+def _rows(mask_row, height):
+    """`mask_row` repeated in each of `height` rows."""
+    return sum(mask_row << (r * COLS) for r in range(height))
+
+
+@lru_cache(maxsize=None)
+def _masks(height):
+    """(whole field, even columns, [(column, columns left of it)]) for a `height`-row field."""
+    walls = [(_rows(1 << x, height), _rows((1 << x) - 1, height)) for x in range(COLS)]
+    return _rows(ROW, height), _rows(EVEN, height), walls
+
+
+def _clear(field, height):
+    """Field and height after removing full rows."""
+    kept, rows = 0, 0
+    for r in range(height):
+        row = field >> (r * COLS) & ROW
+        if row != ROW:
+            kept |= row << (rows * COLS)
+            rows += 1
+    return kept, rows
+
+
+def _reachable(kinds):
+    """Column-parity differences the pieces in `kinds` can cover together."""
+    sums = {0}
+    for kind in kinds:
+        sums = {s + d for s in sums for d in STRIPES[kind]}
+    return sums
+
+
+@lru_cache(maxsize=None)
+def _transpose(height):
+    """Per row, a table from that row's cells to the same cells in column-major order.
+
+    The tiling check numbers cells column by column (bit ``x * height + row``),
+    so its lowest empty cell is in the leftmost unfinished column.
+    """
+    return [[sum(1 << (x * height + r) for x in range(COLS) if bits >> x & 1) for bits in range(1 << COLS)]
+            for r in range(height)]
+
+
+@lru_cache(maxsize=None)
+def _tiles(height):
+    """Every way a piece can cover cells of a `height`-row field, in column-major order.
+
+    Returns ({lowest cell: [(kind, mask)]}, {highest cell: [(kind, mask)]}).
+    A piece that lands after a line clear covers rows that were not adjacent
+    before it, so each shape is also spread over every increasing choice of
+    rows, not just consecutive ones.
+    """
+    low, high = {}, {}
+    for kind, shapes in SHAPES.items():
+        for mask, width, ph, *_ in shapes:
+            cells = [(b % COLS, b // COLS) for b in range(ph * COLS) if mask >> b & 1]
+            for rows in combinations(range(height), ph):
+                for x in range(COLS - width + 1):
+                    m = sum(1 << ((cx + x) * height + rows[cy]) for cx, cy in cells)
+                    low.setdefault((m & -m).bit_length() - 1, []).append((kind, m))
+                    high.setdefault(m.bit_length() - 1, []).append((kind, m))
+    return low, high
+
+
+@lru_cache(maxsize=None)
+def _layout(height):
+    """Column-major ([cells of row r], [cells with at least k rows above them]) for a `height`-row field."""
+    rows = [sum(1 << (x * height + r) for x in range(COLS)) for r in range(height)]
+    return rows, [sum(rows[:height - k]) for k in range(height)]
+
+
+def _waits(cols, height):
+    """Pairs (empty cells of a row, cells that cannot be filled until that row clears), column-major.
+
+    Hard drops reach an empty cell with a filled cell above it only once
+    every row holding such a cell has cleared, and a row clears only once
+    its own empty cells are filled. No piece can cover cells from both sides
+    of a pair.
+    """
+    rows, below = _layout(height)
+    empty = ~cols & ((1 << height * COLS) - 1)
+    covered = 0
+    for k in range(1, height):
+        covered |= cols >> k & below[k]
+    holes = empty & covered
+    if not holes:
+        return ()
+    column = (1 << height) - 1
+    before = [0] * height  # per row, the rows that must clear before it can fill
+    waiting = [0] * height
+    for r in reversed(range(height)):
+        row_holes = holes & rows[r]
+        while row_holes:
+            cell = (row_holes & -row_holes).bit_length() - 1
+            row_holes &= row_holes - 1
+            above = cols >> (cell - r) & column & -(2 << r)
+            need = above
+            while above:
+                need |= before[(above & -above).bit_length() - 1]
+                above &= above - 1
+            before[r] |= need
+            while need:
+                waiting[(need & -need).bit_length() - 1] |= 1 << cell
+                need &= need - 1
+    return tuple((empty & rows[r], waiting[r]) for r in range(height) if waiting[r])
+
+
+_FITS = {}
+
+
+def _fits(height, cell, cols, top):
+    """(kind, mask) from ``_tiles`` whose lowest cell (highest with `top`) is `cell` and that miss `cols`.
+
+    Cached on the four columns' worth of cells on that side of `cell`, which
+    is all such a piece can touch.
+    """
+    span = 4 * height
+    base = max(0, cell - span + 1) if top else cell
+    key = (height, cell, top, cols >> base & ((1 << span) - 1))
+    fits = _FITS.get(key)
+    if fits is None:
+        fits = _FITS[key] = [(kind, m) for kind, m in _tiles(height)[top].get(cell, ()) if not cols & m]
+    return fits
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class _GaveUp(Exception):
+    pass
+
+
+class Solver:
+    """Depth-first search for one queue; the transposition table lives as long as the solver.
+
+    With a `deadline` (``time.perf_counter()`` seconds) the search gives up
+    once it passes, checked every ``CHECK_EVERY`` nodes, and ``solve`` raises
+    ``_OutOfTime``. States it was still exploring are not recorded as failed.
+    """
+
+    def __init__(self, pieces, deadline=None):
+        self.pieces = list(pieces)
+        self.deadline = deadline
+        self.failed = set()
+        self.tiling = {}
+        self.nodes = 0
+        self.tt_hits = 0
+
+    def _pruned(self, field, height, i):
+        full, even, walls = _masks(height)
+        empty = full & ~field
+        diff = 2 * (empty & even).bit_count() - empty.bit_count()
+        if diff not in self._parity[i]:
+            return True
+        solid = ROW  # columns filled in every row
+        for r in range(height):
+            solid &= field >> (r * COLS)
+        if solid:
+            for col, left in walls:
+                if field & col == col and (empty & left).bit_count() % 4:
+                    return True
+        kinds = self._kinds[i]
+        table = _transpose(height)
+        cols = 0
+        for r in range(height):
+            cols |= table[r][field >> (r * COLS) & ROW]
+        try:
+            return not self._tileable(cols, height, kinds, _waits(cols, height), [TILE_EFFORT])
+        except _GaveUp:
+            return False
+
+    def _tileable(self, cols, height, kinds, waits, effort):
+        """Whether pieces `kinds` (a sorted string) can cover every empty cell, ignoring the order they come in.
+
+        `cols` is the field in column-major order and `waits` comes from
+        ``_waits`` on the field being checked. Raises ``_GaveUp`` after
+        ``effort[0]`` uncached nodes; results already settled stay cached.
+        """
+        if not kinds:
+            return True
+        key = (cols, height, kinds, waits)
+        ok = self.tiling.get(key)
+        if ok is not None:
+            return ok
+        effort[0] -= 1
+        if effort[0] < 0:
+            raise _GaveUp
+        ok = False
+        empty = ~cols & ((1 << height * COLS) - 1)
+        # the first and last empty cells must each be covered; branch on the one with fewer ways
+        fits = _fits(height, (empty & -empty).bit_length() - 1, cols, False)
+        last = _fits(height, empty.bit_length() - 1, cols, True)
+        if len(last) < len(fits):
+            fits = last
+        for kind, m in fits:
+            if kind not in kinds:
+                continue
+            for row, waiting in waits:
+                if m & row and m & waiting:
+                    break
+            else:
+                if self._tileable(cols | m, height, kinds.replace(kind, "", 1), waits, effort):
+                    ok = True
+                    break
+        self.tiling[key] = ok
+        return ok
+
+    def _moves(self, field, height, kind):
+        """(new field, mask, row, column, shape) for every hard drop that stays inside the field."""
+        out = []
+        for shape in SHAPES[kind]:
+            mask, width, ph, _, _, _ = shape
+            top = height - ph
+            if top < 0:
+                continue
+            for x in range(COLS - width + 1):
+                m = mask << x
+                # fall from above the field; the rows up there are empty
+                row = height
+                while row > 0 and not field & (m << ((row - 1) * COLS)):
+                    row -= 1
+                if row > top:
+                    continue  # would stick out of the field
+                placed = m << (row * COLS)
+                out.append((row, x, field | placed, placed, shape))
+        out.sort(key=lambda move: (move[0], move[1]))  # low placements first
+        return out
+
+    def _search(self, field, height, i, path):
+        if height == 0:
+            return True
+        if i == self._stop:
+            return False
+        key = (field, height, i)
+        if key in self.failed:
+            self.tt_hits += 1
+            return False
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes % CHECK_EVERY and time.perf_counter() > self.deadline:
+            raise _OutOfTime
+        if not self._pruned(field, height, i):
+            for row, x, new, placed, shape in self._moves(field, height, self.pieces[i]):
+                cleared, rows = _clear(new, height)
+                path.append((self.pieces[i], row, x, shape, height))
+                if self._search(cleared, rows, i + 1, path):
+                    return True
+                path.pop()
+        self.failed.add(key)
+        return False
+
+    def solve(self, field, height):
+        """Placements that clear `field` (`height` rows) using all the pieces it needs, or None."""
+        empty = height * COLS - field.bit_count()
+        if empty % 4 or empty // 4 > len(self.pieces):
+            return None
+        self._stop = empty // 4
+        self._parity = [_reachable(self.pieces[i:self._stop]) for i in range(self._stop + 1)]
+        self._kinds = ["".join(sorted(self.pieces[i:self._stop])) for i in range(self._stop + 1)]
+        path = []
+        return path if self._search(field, height, 0, path) else None
+
+
+# -------------------- Engine glue --------------------
+def field_of(grid, height):
+    """Bottom `height` rows of an engine grid as a field, or None if anything sits above them."""
+    field = 0
+    for y in range(ROWS):
+        for x in range(COLS):
+            if grid[y][x] is not None:
+                r = ROWS - 1 - y
+                if r >= height:
+                    return None
+                field |= 1 << (r * COLS + x)
+    return field
+
+
+def known_pieces(game):
+    return [game.current.kind, game.next_piece.kind, *game.queue]
+
+
+def to_cells(step):
+    """Engine board cells of a solver step."""
+    _, row, x, (mask, *_), height = step
+    cells, placed = [], mask << (row * COLS + x)
+    while placed:
+        bit = (placed & -placed).bit_length() - 1
+        placed &= placed - 1
+        cells.append((bit % COLS, ROWS - 1 - bit // COLS))
+    return tuple(sorted(cells))
+
+
+def solve(grid, pieces, n=None, max_rows=6, budget_s=None):
+    """Shortest perfect clear within `n` pieces as (steps, solver), or (None, solver).
+
+    With `budget_s` the search stops after about that many seconds; then
+    ``solver.timed_out`` is set and None means "unknown", not "none".
+    """
+    n = len(pieces) if n is None else min(n, len(pieces))
+    solver = Solver(pieces[:n], None if budget_s is None else time.perf_counter() + budget_s)
+    solver.timed_out = False
+    for height in range(1, max_rows + 1):
+        field = field_of(grid, height)
+        if field is None:
+            continue
+        try:
+            steps = solver.solve(field, height)
+        except _OutOfTime:
+            solver.timed_out = True
+            return None, solver
+        if steps is not None:
+            return steps, solver
+    return None, solver
+
+
+def replay(game, steps):
+    """Play `steps` on `game` through the engine's own inputs."""
+    for step in steps:
+        cells = to_cells(step)
+        for p in placements.drops(tuple(game.columns), game.current.kind):
+            if p.cells == cells:
+                placements.play(game, p)
+                break
+        else:
+            raise AssertionError(f"no drop reaches {cells} for {game.current.kind}")
+
+
+# -------------------- Benchmark --------------------
+def bench(openings, pieces, seed, check, budget_s=None):
+    rng = random.Random(seed)
+    times = {"perfect clear": [], "none": [], "unknown": []}
+    for _ in range(openings):
+        game = engine.Tetris(seed=rng.getrandbits(32), preview=max(1, pieces - 1))
+        t0 = time.perf_counter()
+        steps, solver = solve(game.grid, known_pieces(game), pieces, budget_s=budget_s)
+        outcome = "perfect clear" if steps is not None else "unknown" if solver.timed_out else "none"
+        times[outcome].append(time.perf_counter() - t0)
+        if steps is not None and check:
+            replay(game, steps)
+            assert all(c is None for row in game.grid for c in row), "board not empty after replay"
+    limit = f", {budget_s * 1e3:.0f} ms budget" if budget_s is not None else ""
+    print(f"{openings} empty-board openings, {pieces} pieces{limit}")
+    for label, ts in times.items():
+        ts.sort()
+        if ts:
+            print(f"  {label:13} {len(ts):4d}  p50 {ts[len(ts) // 2] * 1e3:8.1f} ms  "
+                  f"p95 {ts[min(len(ts) - 1, int(0.95 * len(ts)))] * 1e3:8.1f} ms  max {ts[-1] * 1e3:8.1f} ms")
+    if check:
+        print(f"replayed {len(times['perfect clear'])} solutions through the engine")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfect-clear solver over the known queue")
+    parser.add_argument("--queue", help="piece kinds in order, e.g. IOTSZJLIOT (default: a seeded game's queue)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pieces", type=int, default=10, help="look at most this many pieces ahead")
+    parser.add_argument("--max-rows", type=int, default=6)
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="give up after this many seconds and answer unknown (0: search to the end)")
+    parser.add_argument("--bench", type=int, metavar="N", help="time N seeded empty-board openings")
+    parser.add_argument("--check", action="store_true", help="replay each solution through the engine")
+    args = parser.parse_args()
+    engines.headless()
+    budget_s = args.budget or None
+
+    if args.bench:
+        bench(args.bench, args.pieces, args.seed, args.check, budget_s)
+        return
+    game = engine.Tetris(seed=args.seed, preview=max(1, args.pieces - 1))
+    pieces = list(args.queue.upper()) if args.queue else known_pieces(game)
+    t0 = time.perf_counter()
+    steps, solver = solve(game.grid, pieces, args.pieces, args.max_rows, budget_s)
+    ms = (time.perf_counter() - t0) * 1e3
+    print(f"queue {''.join(pieces[:args.pieces])}: {solver.nodes} nodes, {solver.tt_hits} table hits, {ms:.1f} ms")
+    if solver.timed_out:
+        print(f"unknown (gave up after {args.budget:g} s)")
+        return
+    if steps is None:
+        print("no perfect clear")
+        return
+    print(f"perfect clear in {len(steps)} pieces, {steps[0][4]} rows:")
+    for step in steps:
+        print(f"  {step[0]} rot {step[3][5]} at {to_cells(step)}")
+
+
+if __name__ == "__main__":
+    main()
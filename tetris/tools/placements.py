@@ -0,0 +1,313 @@
+"""Legal placements for the GPT-5.2 (thinking) ``Tetris`` engine.
+
+``placements(game)`` returns every position the current piece can come to
+rest in, found by a breadth-first search over (x, y, rot) from where the
+piece is now. Each placement has the shortest input path that gets it
+there, in the engine's own vocabulary: ``move(-1)``, ``move(1)``,
+``rotate()``, ``step_down()`` and a final ``hard_drop()``. Rotation uses
+the engine's ``KICKS`` table in the same order as ``Tetris.rotate``, so a
+path replayed through ``play()`` lands exactly where the search said.
+
+Placements are deduplicated by the cells they cover, so I, S and Z
+(whose opposite rotations fill the same cells one column over) and O (all
+four rotations alike) are not listed twice. Results are memoized by
+(board signature, kind, start position); the signature is the engine's
+per-column bitmasks, so a repeated position costs a dictionary lookup.
+Given a ``deadline``, a search that is not memoized gives up when it
+passes and returns None, for callers with a per-piece time budget.
+
+``drops(columns, kind)`` is the cheap subset a lookahead search wants:
+rotate at spawn, slide, hard drop. Given a `start` it does the same from
+where a piece already is, e.g. after gravity has moved it.
+
+    python tetris/tools/placements.py --check 2000
+"""
+import argparse
+import random
+import time
+from collections import deque, namedtuple
+from functools import lru_cache
+
+import engines
+
+engine = engines.load(engines.DEFAULT)
+ROWS, COLS = engine.ROWS, engine.COLS
+
+LEFT, RIGHT, ROTATE, DOWN, DROP = "left", "right", "rotate", "down", "drop"
+
+# (x, y, rot) is where the piece rests; cells are sorted (x, y) board cells
+Placement = namedtuple("Placement", "x y rot cells path")
+
+# rows at and below the floor are solid, like the engine's sentinel bit
+FLOOR = -1 << ROWS
+
+# kinds whose rotations all cover the same cells never need to rotate
+_ROTATES = {kind: any(r != rots[0] for r in rots) for kind, rots in engine.SHAPES.items()}
+
+
+def _free(solid, shapes, px, py, r):
+    for bx, by in shapes[r]:
+        cx = px + bx
+        if cx < 0 or cx >= COLS:
+            return False
+        cy = py + by
+        if cy >= 0 and solid[cx] >> cy & 1:
+            return False
+    return True
+
+
+def _rest(solid, shapes, px, py, r):
+    """Row the piece comes to rest in when dropped from (px, py)."""
+    dist = 2 * ROWS
+    for bx, by in shapes[r]:
+        s = py + by + 1
+        col = solid[px + bx]
+        below = col >> s if s >= 0 else col << -s
+        d = (below & -below).bit_length() - 1
+        if d < dist:
+            dist = d
+    return py + dist
+
+
+SEARCH_CACHE = 1 << 14
+# (columns, kind, x, y, rot) -> placements as plain tuples, least recently
+# used first. Plain tuples of ints and strings drop out of the cyclic GC;
+# namedtuples never do, and tens of thousands of them made every full
+# collection cost tens of milliseconds.
+_searches = {}
+
+
+def search(columns, kind, x, y, rot, deadline=None):
+    """All resting placements reachable from (x, y, rot) on `columns`.
+
+    `columns` is a tuple of per-column bitmasks as in ``Tetris.columns``.
+    Placements with a cell above the visible field are left out; locking
+    one ends the game. With `deadline` (a ``perf_counter_ns`` value) a
+    search that is not memoized returns None once it runs past it.
+    """
+    key = (columns, kind, x, y, rot)
+    found = _searches.pop(key, None)
+    if found is None:
+        found = _bfs(columns, kind, x, y, rot, deadline)
+        if found is None:
+            return None
+        if len(_searches) >= SEARCH_CACHE:
+            del _searches[next(iter(_searches))]
+    _searches[key] = found
+    return tuple(map(Placement._make, found))
+
+
+def clear_cache():
+    _searches.clear()
+
+
+def spawned(piece):
+    """True while `piece` is still where it spawned, which is where ``drops`` paths start."""
+    spawn = engine.Piece(piece.kind)
+    return (piece.x, piece.y, piece.rot) == (spawn.x, spawn.y, spawn.rot)
+
+
+def _bfs(columns, kind, x, y, rot, deadline):
+    solid = [c | FLOOR for c in columns]
+    shapes = engine.SHAPES[kind]
+
+    def path(state):
+        actions = []
+        while parent[state] is not None:
+            state, action = parent[state]
+            actions.append(action)
+        return tuple(reversed(actions))
+
+    start = (x, y, rot)
+    parent = {start: None}
+    frontier = deque([start])
+    seen_cells = set()
+    out = []
+    rotates = _ROTATES[kind]
+    clock = time.perf_counter_ns
+    while frontier:
+        if deadline is not None and clock() > deadline:
+            return None
+        state = frontier.popleft()
+        sx, sy, sr = state
+
+        # BFS order means the first drop onto a cell set is the shortest path
+        ry = _rest(solid, shapes, sx, sy, sr)
+        cells = tuple(sorted((sx + bx, ry + by) for bx, by in shapes[sr]))
+        if cells not in seen_cells:
+            seen_cells.add(cells)
+            if min(cy for _, cy in cells) >= 0:
+                out.append((sx, ry, sr, cells, path(state) + (DROP,)))
+
+        moves = [(LEFT, (sx - 1, sy, sr)), (RIGHT, (sx + 1, sy, sr))]
+        if rotates:
+            nr = (sr + 1) % 4
+            for kx, ky in engine.KICKS:
+                if _free(solid, shapes, sx + kx, sy + ky, nr):
+                    moves.append((ROTATE, (sx + kx, sy + ky, nr)))
+                    break
+        moves.append((DOWN, (sx, sy + 1, sr)))
+        for action, nxt in moves:
+            if nxt in parent or (action != ROTATE and not _free(solid, shapes, *nxt)):
+                continue
+            parent[nxt] = (state, action)
+            frontier.append(nxt)
+    return tuple(out)
+
+
+@lru_cache(maxsize=1 << 16)
+def drops(columns, kind, start=None):
+    """Placements reached by rotating at spawn, sliding and hard-dropping.
+
+    A cheap subset of ``search`` for lookahead: no soft drops, so no tucks
+    or spins. Empty if the piece cannot spawn. `start` is an (x, y, rot) to
+    rotate and slide from instead of the spawn position.
+    """
+    solid = [c | FLOOR for c in columns]
+    shapes = engine.SHAPES[kind]
+    if start is None:
+        spawn = engine.Piece(kind)
+        start = spawn.x, spawn.y, spawn.rot
+    x, y, rot = start
+    if not _free(solid, shapes, x, y, rot):
+        return ()
+
+    seen_cells = set()
+    out = []
+    turns = ()
+    for _ in range(4 if _ROTATES[kind] else 1):
+        shifts = [(x, ())]
+        for dx, action in ((-1, LEFT), (1, RIGHT)):
+            px, moves = x + dx, (action,)
+            while _free(solid, shapes, px, y, rot):
+                shifts.append((px, moves))
+                px, moves = px + dx, moves + (action,)
+        for px, moves in shifts:
+            ry = _rest(solid, shapes, px, y, rot)
+            cells = tuple(sorted((px + bx, ry + by) for bx, by in shapes[rot]))
+            if cells not in seen_cells and min(cy for _, cy in cells) >= 0:
+                seen_cells.add(cells)
+                out.append(Placement(px, ry, rot, cells, turns + moves + (DROP,)))
+
+        nr = (rot + 1) % 4
+        for kx, ky in engine.KICKS:
+            if _free(solid, shapes, x + kx, y + ky, nr):
+                x, y, rot = x + kx, y + ky, nr
+                turns += (ROTATE,)
+                break
+        else:
+            break
+    return tuple(out)
+
+
+def placements(game, piece=None, deadline=None):
+    """Resting placements for `piece` (default: the falling piece) on `game`.
+
+    None if `deadline` passed before the search finished.
+    """
+    piece = game.current if piece is None else piece
+    return search(tuple(game.columns), piece.kind, piece.x, piece.y, piece.rot, deadline)
+
+
+def step(game, action):
+    """Apply one path action through the engine's input methods."""
+    if action == LEFT:
+        game.move(-1)
+    elif action == RIGHT:
+        game.move(1)
+    elif action == ROTATE:
+        game.rotate()
+    elif action == DOWN:
+        game.step_down()
+    else:
+        game.hard_drop()
+
+
+def play(game, placement):
+    """Feed the placement's input path to the engine; the piece locks."""
+    for action in placement.path:
+        step(game, action)
+
+
+# -------------------- Checks --------------------
+def _reference(game):
+    """The same search driven through the engine's own move methods."""
+    piece = game.current
+    saved = (piece.x, piece.y, piece.rot)
+    start = saved
+    seen = {start}
+    frontier = deque([start])
+    cells = set()
+    while frontier:
+        state = frontier.popleft()
+        for action in (lambda: game.move(-1), lambda: game.move(1), game.rotate, game.step_down):
+            piece.x, piece.y, piece.rot = state
+            action()
+            nxt = (piece.x, piece.y, piece.rot)
+            if nxt not in seen:
+                seen.add(nxt)
+                frontier.append(nxt)
+        piece.x, piece.y, piece.rot = state
+        landed = tuple(sorted(piece.blocks(y=game.ghost_y())))
+        if min(y for _, y in landed) >= 0:
+            cells.add(landed)
+    piece.x, piece.y, piece.rot = saved
+    return cells
+
+
+def _replays(game, placement):
+    piece = game.current
+    saved = (piece.x, piece.y, piece.rot)
+    for action in placement.path[:-1]:
+        step(game, action)
+    landed = tuple(sorted(piece.blocks(y=game.ghost_y())))
+    piece.x, piece.y, piece.rot = saved
+    return landed == placement.cells
+
+
+def check(pieces, seed):
+    """Compare against the engine-driven search and replay every path."""
+    rng = random.Random(seed)
+    game = engine.Tetris(seed=seed)
+    counts, cold, warm = [], 0, 0
+    for _ in range(pieces):
+        if game.game_over:
+            game = engine.Tetris(seed=rng.getrandbits(32))
+        clear_cache()
+        t0 = time.perf_counter_ns()
+        found = placements(game)
+        t1 = time.perf_counter_ns()
+        placements(game)
+        warm += time.perf_counter_ns() - t1
+        cold += t1 - t0
+
+        expected = _reference(game)
+        if {p.cells for p in found} != expected:
+            raise AssertionError(f"placement sets differ for {game.current.kind} on piece {game.pieces}")
+        for p in found:
+            if not _replays(game, p):
+                raise AssertionError(f"path {p.path} does not reach {p.cells}")
+        # the falling piece is always at spawn here, where drops() starts
+        for p in drops(tuple(game.columns), game.current.kind):
+            if p.cells not in expected or not _replays(game, p):
+                raise AssertionError(f"drop path {p.path} does not reach {p.cells}")
+        counts.append(len(found))
+        if not found:
+            game.hard_drop()
+        else:
+            play(game, rng.choice(found))
+    n = len(counts)
+    print(f"{n} pieces ok: {sum(counts) / n:.1f} placements per piece, "
+          f"search {cold / n / 1000:.0f} us cold, {warm / n / 1000:.2f} us cached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legal placement search")
+    parser.add_argument("--check", type=int, default=500, metavar="PIECES")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    check(args.check, args.seed)
+
+
+if __name__ == "__main__":
+    main()
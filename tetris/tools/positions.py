@@ -0,0 +1,72 @@
+"""Repeated positions across autoplayed games, keyed by Zobrist hashes.
+
+The GPT-5.2 (thinking) engine keeps ``board_hash`` up to date as pieces
+lock and lines clear, and ``state_hash()`` adds the falling piece and
+(optionally) the preview queue. This plays seeded games with the
+autoplayer and counts how many spawn positions repeat, both with and
+without the queue.
+
+    python tetris/tools/positions.py --games 20 --pieces 500
+    python tetris/tools/positions.py --check
+
+--check recomputes the hashes from scratch after every lock and compares
+them with the incremental ones. It also keeps the full position behind
+every key, so a collision is reported instead of being counted as a
+repeat.
+"""
+import argparse
+
+import autoplay
+import engines
+
+engine = autoplay.engine
+
+
+def position(game, queue):
+    """Exact position behind a state hash, for collision checks."""
+    cur = game.current
+    key = (tuple(game.columns), cur.kind, cur.rot, cur.x, cur.y)
+    return key + (game.next_piece.kind, tuple(game.queue)) if queue else key
+
+
+def scan(games, pieces, seed, check):
+    seen = {False: {}, True: {}}
+    total = 0
+    for s in range(seed, seed + games):
+        bot = autoplay.AutoPlayer(budget_ms=None)
+        game = engine.Tetris(seed=s)
+        while not game.game_over and game.pieces < pieces:
+            for queue, table in seen.items():
+                key = game.state_hash(queue)
+                pos = position(game, queue) if check else None
+                if key in table and check and table[key] != pos:
+                    raise SystemExit(f"hash collision at seed {s}, piece {game.pieces}")
+                table.setdefault(key, pos)
+            total += 1
+            bot.act(game)
+            if check:
+                board, queue_hash = game.board_hash, game.queue_hash
+                game._rebuild_hash()
+                if (board, queue_hash) != (game.board_hash, game.queue_hash):
+                    raise SystemExit(f"incremental hash drifted at seed {s}, piece {game.pieces}")
+    return total, len(seen[False]), len(seen[True])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count repeated positions by Zobrist hash")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--pieces", type=int, default=500, help="pieces per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="verify incremental hashes and look for collisions")
+    args = parser.parse_args()
+    engines.headless()
+
+    total, boards, full = scan(args.games, args.pieces, args.seed, args.check)
+    print(f"{total} spawn positions: {boards} distinct by board and piece "
+          f"({1 - boards / total:.1%} repeats), {full} distinct with the queue ({1 - full / total:.1%} repeats)")
+    if args.check:
+        print("incremental hashes match full recomputation; no collisions")
+
+
+if __name__ == "__main__":
+    main()
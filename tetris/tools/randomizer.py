@@ -0,0 +1,205 @@
+"""Seedable piece randomizers.
+
+Every strategy is a generator function that takes its own ``random.Random``
+and yields piece kinds forever, so a seed fully determines the sequence and
+games never share the global ``random`` state:
+
+    queue = PreviewQueue(make("7bag", seed=1234), size=5)
+    kind = queue.pop()
+
+The GPT-5.2 (thinking) ``Tetris`` takes any of them as its ``source``,
+which is how ``sweep.py --randomizer`` plays the bot against each.
+
+Run as a script to draw 10^7 pieces per strategy and print distribution and
+drought statistics:
+
+    python tetris/tools/randomizer.py --pieces 10000000
+    python tetris/tools/randomizer.py --pieces 1000000 tgm
+
+7-bag and uniform take 2-3 s for 10^7 pieces. TGM takes 7-9 s on a busy
+single core, because its reroll loop runs in Python for every piece. Use
+a smaller --pieces for a quick look.
+"""
+import argparse
+import random
+import time
+from collections import Counter, deque
+from itertools import islice, permutations
+
+KINDS = "IOTSZJL"
+BAGS = ["".join(p) for p in permutations(KINDS)]
+
+
+# -------------------- Strategies --------------------
+def seven_bag(rng):
+    """Deal all seven kinds in random order before starting a new bag.
+
+    Picking one of the 5040 orderings is equivalent to shuffling, and lets
+    ``choices`` draw bags in batches.
+    """
+    while True:
+        for bag in rng.choices(BAGS, k=256):
+            yield from bag
+
+
+def tgm_history(rng, rolls=4):
+    """TGM-style: reroll up to `rolls` times while the pick is in the last 4.
+
+    The history lives in four locals and the picks come straight from
+    batches like ``uniform``'s. That deals the same pieces as a deque and a
+    nested generator, for about 40% less time per piece.
+    """
+    h1, h2, h3, h4 = "ZZSS"  # oldest first
+    draws = iter(())
+    tries = range(rolls)
+    # The first piece is never S, Z or O
+    kind = rng.choice("IJLT")
+    while True:
+        h1, h2, h3, h4 = h2, h3, h4, kind
+        yield kind
+        for _ in tries:
+            kind = next(draws, None)
+            if kind is None:
+                draws = iter(rng.choices(KINDS, k=1024))
+                kind = next(draws)
+            if kind != h1 and kind != h2 and kind != h3 and kind != h4:
+                break
+
+
+def uniform(rng):
+    """Independent uniform picks (what most of the games here do).
+
+    Picks are drawn in batches of 1024; the sequence still depends only on
+    the seed.
+    """
+    while True:
+        yield from rng.choices(KINDS, k=1024)
+
+
+STRATEGIES = {
+    "7bag": seven_bag,
+    "tgm": tgm_history,
+    "uniform": uniform,
+}
+
+
+def make(name, seed=None):
+    """Return the named strategy driven by a fresh ``random.Random(seed)``."""
+    return STRATEGIES[name](random.Random(seed))
+
+
+# -------------------- Preview queue --------------------
+class PreviewQueue:
+    """Fixed-length lookahead over a piece source, backed by a deque."""
+
+    def __init__(self, source, size=7):
+        self.source = source
+        self.items = deque(islice(source, size))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def peek(self, n=None):
+        return list(self.items if n is None else islice(self.items, n))
+
+    def pop(self):
+        kind = self.items.popleft()
+        self.items.append(next(self.source))
+        return kind
+
+    def resize(self, size):
+        while len(self.items) > size:
+            self.items.pop()
+        self.items.extend(islice(self.source, size - len(self.items)))
+
+
+# -------------------- Statistics --------------------
+def _drought_stats(lengths):
+    """Count, mean, p99 and max of a {drought length: occurrences} histogram."""
+    total = sum(lengths.values())
+    if not total:
+        return {"droughts": 0, "mean_drought": float("nan"), "p99_drought": 0, "max_drought": 0}
+    below = 0
+    for length in sorted(lengths):
+        below += lengths[length]
+        if below >= 0.99 * total:
+            p99 = length
+            break
+    return {"droughts": total, "mean_drought": sum(k * v for k, v in lengths.items()) / total,
+            "p99_drought": p99, "max_drought": max(lengths)}
+
+
+def piece_stats(source, n, chunk=1 << 16):
+    """Draw `n` pieces and collect counts and drought lengths per kind.
+
+    A drought is the number of pieces dealt between two occurrences of the
+    same kind. The runs before a kind's first piece and after its last are
+    not droughts and are left out. Pieces are joined into string chunks so
+    counting and gap lengths are done by ``str.split`` rather than a Python
+    loop per piece.
+    """
+    counts = dict.fromkeys(KINDS, 0)
+    lengths = {kind: Counter() for kind in KINDS}  # drought length -> how many
+    # pieces since the kind was last dealt (or since the start), carried across chunks
+    carry = dict.fromkeys(KINDS, 0)
+    seen = set()
+    left = n
+    while left > 0:
+        pieces = "".join(islice(source, min(chunk, left)))
+        left -= len(pieces)
+        for kind in KINDS:
+            runs = pieces.split(kind)
+            if len(runs) == 1:
+                carry[kind] += len(pieces)
+                continue
+            counts[kind] += len(runs) - 1
+            if kind in seen:
+                # the gap that was open when the chunk started has closed
+                lengths[kind][carry[kind] + len(runs[0])] += 1
+            seen.add(kind)
+            lengths[kind].update(map(len, runs[1:-1]))
+            carry[kind] = len(runs[-1])
+
+    expected = n / len(KINDS)
+    chi2 = sum((c - expected) ** 2 / expected for c in counts.values())
+    return {
+        "pieces": n,
+        "chi2": chi2,
+        "kinds": {
+            kind: {
+                "count": counts[kind],
+                "share": counts[kind] / n,
+                **_drought_stats(lengths[kind]),
+            }
+            for kind in KINDS
+        },
+    }
+
+
+def print_stats(name, stats, seconds):
+    print(f"{name}: {stats['pieces']:,} pieces in {seconds:.2f}s "
+          f"({stats['pieces'] / seconds / 1e6:.1f} M/s), chi2={stats['chi2']:.2f}")
+    print("  kind   share   mean drought   p99 drought   max drought")
+    for kind, s in stats["kinds"].items():
+        print(f"  {kind}    {s['share'] * 100:6.3f}%   {s['mean_drought']:12.3f}   {s['p99_drought']:11d}"
+              f"   {s['max_drought']:11d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Piece randomizer statistics")
+    parser.add_argument("--pieces", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("strategies", nargs="*", default=list(STRATEGIES))
+    args = parser.parse_args()
+
+    for name in args.strategies:
+        start = time.perf_counter()
+        stats = piece_stats(make(name, args.seed), args.pieces)
+        print_stats(name, stats, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
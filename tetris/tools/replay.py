@@ -0,0 +1,336 @@
+"""Deterministic recording and replay for any of the six games.
+
+The game loops read the outside world through a handful of pygame calls:
+``pygame.event.get``, ``Clock.tick``/``Clock.get_rawtime`` and
+``pygame.key.get_pressed``. Recording wraps those calls and writes what they
+returned, plus the game seed, to a compact binary tape. Replay hands the
+same values back in the same order, so the unmodified ``main()``/``run()``
+loop plays an identical game, and the frame timings of two builds can be
+compared on the same input.
+
+    python tetris/tools/replay.py record game.trp --impl with_thinking_gpt_5.2 --seed 7
+    python tetris/tools/replay.py play game.trp --headless --speed max
+
+Tape layout: ``b"TRP" version`` header, varint seed, length-prefixed
+implementation name, then one record per intercepted call. Each record is
+an opcode byte followed by varint fields. A typical frame (tick plus an
+empty event poll) takes 3 bytes.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+import engines
+
+MAGIC = b"TRP"
+VERSION = 1
+
+OP_TICK = 1  # varint ms returned by Clock.tick
+OP_RAWTIME = 2  # varint ms returned by Clock.get_rawtime
+OP_EVENTS = 3  # varint count, then (u8 type, varint key) per event
+OP_NO_EVENTS = 4  # event.get() returned nothing
+OP_PRESSED = 5  # varint count, then varint scancode index per held key
+
+# event types the games look at; everything else is dropped while recording
+EV_QUIT, EV_KEYDOWN, EV_KEYUP = 0, 1, 2
+
+
+class EndOfTape(Exception):
+    pass
+
+
+class ReplayDesync(Exception):
+    pass
+
+
+# -------------------- Varints --------------------
+def write_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(buf, pos):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+# -------------------- Tape --------------------
+class TapeWriter:
+    def __init__(self, path, impl, seed):
+        self.f = open(path, "wb")
+        self.buf = bytearray(MAGIC)
+        self.buf.append(VERSION)
+        write_varint(self.buf, seed)
+        name = impl.encode()
+        write_varint(self.buf, len(name))
+        self.buf += name
+
+    def op(self, code, *values):
+        self.buf.append(code)
+        for v in values:
+            write_varint(self.buf, v)
+        if len(self.buf) >= 1 << 16:
+            self.flush()
+
+    def events(self, events):
+        if not events:
+            self.buf.append(OP_NO_EVENTS)
+            return
+        self.buf.append(OP_EVENTS)
+        write_varint(self.buf, len(events))
+        for ev_type, key in events:
+            self.buf.append(ev_type)
+            write_varint(self.buf, key)
+
+    def flush(self):
+        self.f.write(self.buf)
+        self.buf.clear()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+class TapeReader:
+    def __init__(self, data):
+        self.data = data
+        if bytes(data[:3]) != MAGIC or data[3] != VERSION:
+            raise ValueError("not a replay tape (or unsupported version)")
+        self.seed, pos = read_varint(data, 4)
+        n, pos = read_varint(data, pos)
+        self.impl = bytes(data[pos:pos + n]).decode()
+        self.pos = self.start = pos + n
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def expect(self, code):
+        """Return the fields of the next record, which must be `code`."""
+        data = self.data
+        if self.pos >= len(data):
+            raise EndOfTape()
+        op = data[self.pos]
+        if op != code and not (code == OP_EVENTS and op == OP_NO_EVENTS):
+            raise ReplayDesync(f"tape has op {op} at byte {self.pos}, game asked for {code}")
+        pos = self.pos + 1
+        if op == OP_NO_EVENTS:
+            self.pos = pos
+            return []
+        if op in (OP_TICK, OP_RAWTIME):
+            value, self.pos = read_varint(data, pos)
+            return value
+        count, pos = read_varint(data, pos)
+        items = []
+        for _ in range(count):
+            if op == OP_EVENTS:
+                ev_type = data[pos]
+                key, pos = read_varint(data, pos + 1)
+                items.append((ev_type, key))
+            else:
+                code_, pos = read_varint(data, pos)
+                items.append(code_)
+        self.pos = pos
+        return items
+
+
+# -------------------- pygame interposition --------------------
+def _encode_events(pygame, events):
+    out = []
+    for event in events:
+        if event.type == pygame.QUIT:
+            out.append((EV_QUIT, 0))
+        elif event.type == pygame.KEYDOWN:
+            out.append((EV_KEYDOWN, event.key))
+        elif event.type == pygame.KEYUP:
+            out.append((EV_KEYUP, event.key))
+    return out
+
+
+def _decode_events(pygame, items):
+    types = {EV_QUIT: pygame.QUIT, EV_KEYDOWN: pygame.KEYDOWN, EV_KEYUP: pygame.KEYUP}
+    return [
+        pygame.event.Event(pygame.QUIT) if ev_type == EV_QUIT
+        else pygame.event.Event(types[ev_type], key=key)
+        for ev_type, key in items
+    ]
+
+
+@contextmanager
+def _patched(pygame, clock_factory, get_events, get_pressed, wait=None):
+    saved = (pygame.time.Clock, pygame.event.get, pygame.key.get_pressed, pygame.time.wait)
+    pygame.time.Clock = clock_factory
+    pygame.event.get = get_events
+    pygame.key.get_pressed = get_pressed
+    if wait is not None:
+        pygame.time.wait = wait
+    try:
+        yield
+    finally:
+        pygame.time.Clock, pygame.event.get, pygame.key.get_pressed, pygame.time.wait = saved
+
+
+def record(path, impl=engines.DEFAULT, seed=None):
+    """Play `impl` live and write the session to `path`."""
+    import pygame
+
+    seed = random.randrange(1 << 32) if seed is None else seed
+    tape = TapeWriter(path, impl, seed)
+    real_clock, real_get, real_pressed = pygame.time.Clock, pygame.event.get, pygame.key.get_pressed
+
+    class RecordingClock:
+        def __init__(self):
+            self.clock = real_clock()
+
+        def tick(self, framerate=0):
+            ms = self.clock.tick(framerate)
+            tape.op(OP_TICK, ms)
+            return ms
+
+        def get_rawtime(self):
+            ms = self.clock.get_rawtime()
+            tape.op(OP_RAWTIME, ms)
+            return ms
+
+    def get_events(*args, **kwargs):
+        items = _encode_events(pygame, real_get(*args, **kwargs))
+        tape.events(items)
+        # the game sees exactly what was recorded
+        return _decode_events(pygame, items)
+
+    def get_pressed():
+        held = [i for i, down in enumerate(real_pressed()) if down]
+        tape.op(OP_PRESSED, len(held), *held)
+        return real_pressed()
+
+    try:
+        with _patched(pygame, RecordingClock, get_events, get_pressed):
+            engines.run(impl, seed)
+    except SystemExit:
+        pass
+    finally:
+        tape.close()
+    return seed
+
+
+def replay(path, realtime=False):
+    """Feed a tape back into its game loop and return frame timing stats.
+
+    With `realtime` the recorded frame durations are honoured (1x speed);
+    otherwise frames run back to back as fast as the game allows.
+    """
+    import pygame
+
+    tape = TapeReader.open(path)
+    frame_ns = []
+    state = {"last": None, "deadline": time.perf_counter()}
+
+    class ReplayClock:
+        def tick(self, framerate=0):
+            now = time.perf_counter_ns()
+            if state["last"] is not None:
+                frame_ns.append(now - state["last"])
+            ms = tape.expect(OP_TICK)
+            if realtime:
+                state["deadline"] += ms / 1000.0
+                delay = state["deadline"] - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            state["last"] = time.perf_counter_ns()
+            return ms
+
+        def get_rawtime(self):
+            return tape.expect(OP_RAWTIME)
+
+    def get_events(*args, **kwargs):
+        return _decode_events(pygame, tape.expect(OP_EVENTS))
+
+    def get_pressed():
+        pressed = [False] * 512
+        for i in tape.expect(OP_PRESSED):
+            pressed[i] = True
+        return pygame.key.ScancodeWrapper(pressed)
+
+    wait = None if realtime else (lambda ms: 0)
+    start = time.perf_counter()
+    try:
+        with _patched(pygame, ReplayClock, get_events, get_pressed, wait):
+            engines.run(tape.impl, tape.seed)
+    except (EndOfTape, SystemExit):
+        pass
+    wall = time.perf_counter() - start
+    return {
+        "impl": tape.impl,
+        "seed": tape.seed,
+        "frames": len(frame_ns) + 1,
+        "wall_s": wall,
+        "consumed_bytes": tape.pos,
+        "tape_bytes": len(tape.data),
+        "frame_ms": _percentiles(frame_ns),
+    }
+
+
+def _percentiles(samples_ns):
+    if not samples_ns:
+        return {}
+    s = sorted(samples_ns)
+
+    def pick(q):
+        return s[min(len(s) - 1, int(q * len(s)))] / 1e6
+
+    return {
+        "mean": sum(s) / len(s) / 1e6,
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": s[-1] / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay a game")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("path")
+    rec.add_argument("--impl", default=engines.DEFAULT, choices=sorted(engines.IMPLEMENTATIONS))
+    rec.add_argument("--seed", type=int)
+    play = sub.add_parser("play")
+    play.add_argument("path")
+    play.add_argument("--headless", action="store_true")
+    play.add_argument("--speed", choices=("1", "max"), default="1")
+    play.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.cmd == "record":
+        seed = record(args.path, args.impl, args.seed)
+        print(f"recorded {args.impl} seed={seed} -> {args.path}")
+        return
+
+    if args.headless:
+        engines.headless()
+    stats = replay(args.path, realtime=args.speed == "1")
+    if args.json:
+        json.dump(stats, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{stats['impl']} seed={stats['seed']}: {stats['frames']} frames in {stats['wall_s']:.2f}s")
+    if stats["consumed_bytes"] < stats["tape_bytes"]:
+        print(f"warning: game ended with {stats['tape_bytes'] - stats['consumed_bytes']} tape bytes unread")
+    for k, v in stats["frame_ms"].items():
+        print(f"  frame {k:>4}: {v:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Save files of the two GPT-5.2 engines: sizes, timings and a round-trip check.
+
+``save_game``/``load_game`` store the seed and the number of bags drawn
+and deal the bag in hand again from those, so a loaded game must deal
+exactly the pieces the saved one would have. This plays seeded games and saves them every few pieces.
+
+    python tetris/tools/saves.py --games 20 --pieces 400
+    python tetris/tools/saves.py --check
+
+Without --check it reports blob sizes and save/load times. --check saves
+at every lock and compares the loaded game with the original, now and
+after playing both on with the same inputs. In the thinking engine it also
+rewinds a few pieces with ``History`` (as Backspace does) before saving.
+"""
+import argparse
+import random
+import time
+
+import autoplay
+import engines
+
+thinking = autoplay.engine
+plain = engines.load("without_thinking_gpt_5.2")
+
+
+def state(game):
+    """Everything a save must carry."""
+    if isinstance(game, thinking.Tetris):
+        return game.snapshot()
+    p = game.piece
+    return (tuple(map(tuple, game.grid)), (p.kind, p.x, p.y, p.rot), game.next_kind, game.hold_kind,
+            game.hold_used, game.score, game.lines, game.level, game.pieces, game.game_over, game.drop_acc,
+            tuple(game.bag.bag), game.bag.drawn, game.rng.getstate())
+
+
+def plain_step(game, rng):
+    """One random input for the non-thinking engine; hard drops often enough to make progress."""
+    r = rng.random()
+    if r < 0.3:
+        game.hard_drop()
+    elif r < 0.5:
+        game.move(rng.choice((-1, 1)))
+    elif r < 0.6:
+        game.rotate()
+    elif r < 0.65:
+        game.hold()
+    else:
+        game.update(1.0 / 60)
+
+
+# -------------------- Check --------------------
+def check_thinking(games, pieces, seed):
+    saves = 0
+    for s in range(seed, seed + games):
+        rng = random.Random(s)
+        bot = autoplay.AutoPlayer(budget_ms=None)
+        game = thinking.Tetris(seed=s)
+        history = thinking.History()
+        history.push(game)
+        while not game.game_over and game.pieces < pieces:
+            bot.act(game)
+            history.push(game)
+            if rng.random() < 0.25:
+                history.rewind(game, rng.randint(1, 3))
+            blob = thinking.save_game(game)
+            loaded = thinking.load_game(blob)
+            saves += 1
+            if state(loaded) != state(game) or thinking.save_game(loaded) != blob:
+                raise SystemExit(f"thinking seed {s}: load differs at piece {game.pieces}")
+            ahead = thinking.Tetris(seed=s)
+            ahead.restore(game.snapshot())
+            for _ in range(14):  # two bags on, past the bag the save dealt again
+                if ahead.game_over:
+                    break
+                move = bot.choose(ahead)
+                for g in (ahead, loaded):
+                    if move is None:
+                        g.hard_drop()
+                    else:
+                        autoplay.placements.play(g, move)
+                if state(loaded) != state(ahead):
+                    raise SystemExit(f"thinking seed {s}: loaded game diverges after piece {game.pieces}")
+    return saves
+
+
+def check_plain(games, pieces, seed):
+    saves = 0
+    for s in range(seed, seed + games):
+        rng = random.Random(s)
+        game = plain.Tetris(seed=s)
+        while not game.game_over and game.pieces < pieces:
+            locked = game.pieces
+            while game.pieces == locked and not game.game_over:
+                plain_step(game, rng)
+            blob = plain.save_game(game)
+            loaded = plain.load_game(blob)
+            saves += 1
+            if state(loaded) != state(game) or plain.save_game(loaded) != blob:
+                raise SystemExit(f"plain seed {s}: load differs at piece {game.pieces}")
+            ahead = plain.load_game(blob)
+            inputs = random.Random(rng.random())
+            for _ in range(200):
+                r = inputs.random()
+                for g in (ahead, loaded):
+                    plain_step(g, random.Random(r))
+            if state(loaded) != state(ahead):
+                raise SystemExit(f"plain seed {s}: loaded game diverges after piece {game.pieces}")
+    return saves
+
+
+# -------------------- Report --------------------
+def report(games, pieces, seed):
+    for name, module in (("with_thinking_gpt_5.2", thinking), ("without_thinking_gpt_5.2", plain)):
+        sizes, save_ns, load_ns = [], [], []
+        for s in range(seed, seed + games):
+            rng = random.Random(s)
+            bot = autoplay.AutoPlayer(budget_ms=None)
+            game = module.Tetris(seed=s)
+            while not game.game_over and game.pieces < pieces:
+                if module is thinking:
+                    bot.act(game)
+                else:
+                    locked = game.pieces
+                    while game.pieces == locked and not game.game_over:
+                        plain_step(game, rng)
+                t0 = time.perf_counter_ns()
+                blob = module.save_game(game)
+                t1 = time.perf_counter_ns()
+                module.load_game(blob)
+                t2 = time.perf_counter_ns()
+                sizes.append(len(blob))
+                save_ns.append(t1 - t0)
+                load_ns.append(t2 - t1)
+        sizes.sort()
+        print(f"{name}: {len(sizes)} saves, {sizes[len(sizes) // 2]} bytes median, {sizes[-1]} max; "
+              f"save {sorted(save_ns)[len(save_ns) // 2] / 1e3:.0f} us, "
+              f"load {sorted(load_ns)[len(load_ns) // 2] / 1e3:.0f} us median")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save file sizes, timings and round trips")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--pieces", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="save, rewind, load and compare at every lock")
+    args = parser.parse_args()
+    engines.headless()
+    if args.check:
+        n = check_thinking(args.games, args.pieces, args.seed)
+        n += check_plain(args.games, args.pieces, args.seed)
+        print(f"{n} saves: every loaded game matches and plays on identically")
+    else:
+        report(args.games, args.pieces, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,608 @@
+"""Spectator server: live games streamed to many viewers as board deltas.
+
+The server plays a table of GPT-5.2 (thinking) games with the button-
+pressing bot from ``netplay.py``, one engine frame per tick at FPS, and
+subscribes to each game's change listeners. A game whose piece moved or
+locked since the last tick gets one delta frame, encoded once and queued
+for every spectator. Untouched games send nothing. Only rows that differ
+from the last frame sent are included, and the board is compared only
+after a lock or garbage.
+
+Frames are length-prefixed (u32) and start with (type, game, seq,
+monotonic send time in ns). After that come a flags byte and the parts
+the flags name:
+    piece     kind, x, y, rot
+    stats     score, lines, level, pieces
+    queue     next piece and the preview
+    board     20-bit row mask, then 5 bytes per row (4 bits per cell as in
+              the save format)
+A keyframe carries every part and every row. Every `keyframe_every`
+ticks each game's keyframe follows its delta, as a checkpoint viewers can
+verify their copy against. A restarted game's first delta is complete by
+itself.
+
+Each spectator has a bounded queue of ticks (--queue). A viewer that
+lets it fill has its backlog replaced by a resync keyframe of the
+current state, and deltas resume after it. Below the queue the server
+holds at most UNSENT_TICKS ticks per viewer in the transport and the
+kernel, so a stalled viewer costs one full queue and nothing more, and
+its resync is never stuck behind seconds of old frames. Raw TCP viewers
+get the frames as they are. WebSocket viewers (--ws-port) get the same
+bytes, one binary message per tick.
+
+    python tetris/tools/spectate.py serve --games 4 --port 7100 --ws-port 7101
+    python tetris/tools/spectate.py load --clients 300 --seconds 10 --slow 10
+    python tetris/tools/spectate.py bench --clients 300 --seconds 10 --slow 10
+
+``load`` connects many viewers from one process and reports fan-out
+latency (server send time to arrival) for the viewers that keep up,
+throughput and resyncs. Each slow viewer gets its own line: how stale
+its frames were on arrival and how many resync keyframes it received.
+The slow viewers and a few more (--mirrors) also rebuild the boards
+from the frames and compare them with every keyframe. ``bench`` starts a
+server subprocess and runs ``load`` against it.
+"""
+import argparse
+import asyncio
+import base64
+import functools
+import hashlib
+import socket
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+
+import engines
+import netplay
+
+engine = netplay.engine
+ROWS, COLS = engine.ROWS, engine.COLS
+CODES = engine.CELL_CODES
+KINDS = engine.KINDS
+
+DELTA, KEYFRAME, RESYNC = 0, 1, 2
+PIECE, STATS, QUEUE, BOARD = 1, 2, 4, 8
+GAME_OVER = 0x80  # state bit, sent with every frame
+EVERYTHING = PIECE | STATS | QUEUE | BOARD
+ALL_ROWS = (1 << ROWS) - 1
+ROW_BYTES = (COLS * 4 + 7) // 8
+
+LENGTH = struct.Struct("<I")
+HEADER = struct.Struct("<BBIQ")  # type, game, seq, sent at
+_PIECE = struct.Struct("<BbbB")
+_STATS = struct.Struct("<IHHI")
+_MASK = struct.Struct("<I")
+
+
+def pack_row(row):
+    n = 0
+    for x, cell in enumerate(row):
+        if cell is not None:
+            n |= CODES[cell] << 4 * x
+    return n.to_bytes(ROW_BYTES, "little")
+
+
+# -------------------- Server --------------------
+class Table:
+    """One watched game and what its viewers have been sent of it."""
+
+    def __init__(self, index, game):
+        self.index = index
+        self.seq = 0
+        self.attach(game)
+
+    def attach(self, game):
+        self.game = game
+        game.listeners.append(self._changed)
+        self.sent_rows = [None] * ROWS  # packed rows as of the last frame
+        self.dirty = EVERYTHING
+
+    def _changed(self, game, event):
+        self.dirty |= PIECE if event == "move" else EVERYTHING
+
+    def _body(self, flags, mask, rows):
+        g = self.game
+        out = bytearray()
+        out.append(flags | (GAME_OVER if g.game_over else 0))
+        if flags & PIECE:
+            cur = g.current
+            out += _PIECE.pack(KINDS.index(cur.kind), cur.x, cur.y, cur.rot)
+        if flags & STATS:
+            out += _STATS.pack(g.score, g.lines, g.level, g.pieces)
+        if flags & QUEUE:
+            out.append(1 + len(g.queue))
+            out.append(KINDS.index(g.next_piece.kind))
+            out += bytes(KINDS.index(k) for k in g.queue)
+        if flags & BOARD:
+            out += _MASK.pack(mask)
+            for y in range(ROWS):
+                if mask >> y & 1:
+                    out += rows[y]
+        return out
+
+    def _frame(self, kind, now, body):
+        return LENGTH.pack(HEADER.size + len(body)) + HEADER.pack(kind, self.index, self.seq, now) + body
+
+    def delta(self, now):
+        """The frame for this tick, or None if nothing changed. Advances the sent state."""
+        flags, self.dirty = self.dirty, 0
+        if not flags:
+            return None
+        mask = 0
+        if flags & BOARD:
+            for y, row in enumerate(self.game.grid):
+                packed = pack_row(row)
+                if packed != self.sent_rows[y]:
+                    self.sent_rows[y] = packed
+                    mask |= 1 << y
+            if not mask:
+                flags &= ~BOARD
+        self.seq += 1
+        return self._frame(DELTA, now, self._body(flags, mask, self.sent_rows))
+
+    def keyframe(self, now, kind=KEYFRAME):
+        """The whole game as it is now in one frame (call after this tick's delta).
+
+        The rows come from the live grid, not from what the deltas sent, so a
+        periodic keyframe really checks the viewers' copies against the game.
+        """
+        rows = [pack_row(row) for row in self.game.grid]
+        return self._frame(kind, now, self._body(EVERYTHING, ALL_ROWS, rows))
+
+
+class Viewer:
+    __slots__ = ("writer", "sock", "queue", "resync", "ws", "pending", "recent", "backlog", "room")
+
+    def __init__(self, writer, queue_size, ws=False):
+        self.writer = writer
+        self.sock = writer.get_extra_info("socket")
+        self.queue = asyncio.Queue(queue_size)
+        self.resync = True  # the first thing a viewer gets is the full state
+        self.ws = ws
+        self.pending = None  # the overflow resync queued and not yet written
+        self.recent = deque(maxlen=UNSENT_TICKS - 1)  # sizes of the last ticks written
+        # bytes in the kernel send queue when last asked, plus all written since
+        self.backlog = 0
+        self.room = asyncio.Event()  # set by the tick once the backlog fits again
+
+
+def ws_message(data):
+    """One unmasked binary WebSocket frame."""
+    n = len(data)
+    if n < 126:
+        head = bytes((0x82, n))
+    elif n < 1 << 16:
+        head = bytes((0x82, 126)) + n.to_bytes(2, "big")
+    else:
+        head = bytes((0x82, 127)) + n.to_bytes(8, "big")
+    return head + data
+
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# Below the queue, a viewer's ticks sit in the transport and in the kernel
+# send buffer, and the server cannot drop them there for a resync. The
+# transport holds at most the tick being written: the pump waits for it to
+# reach the kernel before taking the next one. The kernel buffer cannot be
+# made that small (Linux will not go below about 4.6 KB, over 100 ticks of
+# four games), so the pump also waits while more than the last UNSENT_TICKS
+# ticks are still in it. A stalled viewer then backs up into its queue,
+# where an overflow replaces the backlog with a resync. The kernel is asked
+# at most once a tick per viewer, and only when what was written since the
+# last answer could have pushed it over.
+SEND_BUFFER = 2048
+UNSENT_TICKS = 4
+if sys.platform.startswith("linux"):
+    import fcntl
+    import termios
+
+    _OUTQ = termios.TIOCOUTQ
+else:
+    _OUTQ = None
+
+
+def unsent(sock):
+    """Bytes in a socket's send queue; 0 where that cannot be asked (then only SEND_BUFFER bounds it)."""
+    if _OUTQ is None or sock is None or sock.fileno() < 0:
+        return 0  # a closed socket fails at the next write instead
+    return struct.unpack("i", fcntl.ioctl(sock.fileno(), _OUTQ, b"\0\0\0\0"))[0]
+
+
+class SpectatorServer:
+    def __init__(self, games=4, seed=0, queue_size=32, keyframe_every=5 * engine.FPS):
+        self.seed = seed
+        self.queue_size = queue_size
+        self.keyframe_every = keyframe_every
+        self.tables = []
+        self.bots = []
+        for i in range(games):
+            self.tables.append(Table(i, engine.Tetris(seed=seed + i)))
+            self.bots.append(netplay.InputBot(seed + i))
+        self.held = [0] * games
+        self.viewers = set()
+        self.ticks = 0
+        self.frames = 0
+        self.bytes_out = 0
+        self.resyncs = 0
+        self.resyncs_sent = 0
+        self.tick_ns = []
+
+    # ---- game loop ----
+    def step(self):
+        for i, table in enumerate(self.tables):
+            game = table.game
+            if game.game_over:
+                table.attach(engine.Tetris(seed=game.rng.getrandbits(32)))
+                self.bots[i] = netplay.InputBot(self.seed + i + self.ticks)
+                self.held[i] = 0
+                continue
+            buttons = self.bots[i].input(game)
+            netplay.apply_input(game, self.held[i], buttons)
+            self.held[i] = buttons
+            engine.advance(game, netplay.DT)
+
+    def broadcast(self):
+        now = time.monotonic_ns()
+        frames = [f for f in (t.delta(now) for t in self.tables) if f is not None]
+        if self.ticks % self.keyframe_every == 0:
+            frames += [t.keyframe(now) for t in self.tables]
+        tick = b"".join(frames)
+        self.frames += len(frames)
+        full = None
+        for viewer in self.viewers:
+            if viewer.backlog > sum(viewer.recent):
+                viewer.backlog = unsent(viewer.sock)
+                if viewer.backlog <= sum(viewer.recent):
+                    viewer.room.set()
+            overflow = False
+            if not viewer.resync:
+                if not tick:
+                    continue
+                if viewer.queue.full():
+                    # too slow: throw its backlog away (an unsent resync too) and
+                    # queue a keyframe of the state as of now in its place
+                    while not viewer.queue.empty():
+                        viewer.queue.get_nowait()
+                    viewer.resync = overflow = True
+                    self.resyncs += 1
+            if viewer.resync:
+                if full is None:
+                    full = b"".join(t.keyframe(now, RESYNC) for t in self.tables)
+                item = full
+            else:
+                item = tick
+            item = ws_message(item) if viewer.ws else item
+            viewer.queue.put_nowait(item)
+            viewer.resync = False
+            if overflow:
+                viewer.pending = item
+
+    async def run_games(self, seconds=None):
+        loop = asyncio.get_running_loop()
+        period = 1.0 / engine.FPS
+        start = next_tick = loop.time()
+        while seconds is None or loop.time() - start < seconds:
+            t = time.perf_counter_ns()
+            self.step()
+            self.broadcast()
+            self.tick_ns.append(time.perf_counter_ns() - t)
+            self.ticks += 1
+            next_tick += period
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    # ---- viewers ----
+    def _add(self, writer, ws=False):
+        viewer = Viewer(writer, self.queue_size, ws)
+        if viewer.sock is not None:
+            viewer.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        writer.transport.set_write_buffer_limits(high=0)
+        self.viewers.add(viewer)
+        return viewer
+
+    async def _pump(self, viewer):
+        writer = viewer.writer
+        try:
+            while True:
+                while viewer.backlog > sum(viewer.recent):
+                    viewer.room.clear()
+                    await viewer.room.wait()
+                item = await viewer.queue.get()
+                if item is viewer.pending:
+                    viewer.pending = None
+                    self.resyncs_sent += 1
+                writer.write(item)
+                self.bytes_out += len(item)
+                viewer.backlog += len(item)
+                viewer.recent.append(len(item))
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.viewers.discard(viewer)
+            writer.close()
+
+    async def handle_tcp(self, reader, writer):
+        await self._pump(self._add(writer))
+
+    async def handle_ws(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        key = None
+        for line in request.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"sec-websocket-key":
+                key = value.strip()
+        if key is None:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\n\r\n")
+            writer.close()
+            return
+        accept = base64.b64encode(hashlib.sha1(key + WS_GUID).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        viewer = self._add(writer, ws=True)
+        pump = asyncio.ensure_future(self._pump(viewer))
+        # viewers only listen; whatever they send is read and dropped until they hang up
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+        pump.cancel()
+
+    def stats(self):
+        ms = sorted(self.tick_ns)
+        p = (lambda q: ms[min(len(ms) - 1, int(q * len(ms)))] / 1e6) if ms else (lambda q: 0.0)
+        return (f"server: {self.ticks} ticks, {self.frames} frames encoded, {self.bytes_out / 1e6:.1f} MB out, "
+                f"{self.resyncs} resyncs queued ({self.resyncs_sent} written, the rest replaced unsent "
+                f"by a later one), {len(self.viewers)} viewers at the end; "
+                f"tick p50 {p(0.5):.2f} ms p99 {p(0.99):.2f} ms")
+
+
+async def serve(host, port, ws_port, games, seed, queue_size, seconds):
+    server = SpectatorServer(games, seed, queue_size)
+    listeners = [await asyncio.start_server(server.handle_tcp, host, port)]
+    if ws_port:
+        listeners.append(await asyncio.start_server(server.handle_ws, host, ws_port))
+    print(f"serving {games} games on {host}:{port}" + (f", websocket on :{ws_port}" if ws_port else ""), flush=True)
+    try:
+        await server.run_games(seconds)
+    finally:
+        for listener in listeners:
+            listener.close()
+        print(server.stats(), flush=True)
+
+
+# -------------------- Load generator --------------------
+class Mirror:
+    """A viewer's copy of one game, rebuilt from frames."""
+
+    def __init__(self):
+        self.seq = None
+        self.parts = {}
+        self.rows = [bytes(ROW_BYTES)] * ROWS
+
+    def apply(self, kind, seq, body):
+        """Apply a frame. Returns False if it shows the mirror had drifted."""
+        parts, rows, pos = {}, list(self.rows), 1
+        flags = body[0]
+        parts["over"] = flags & GAME_OVER
+        if flags & PIECE:
+            parts["piece"] = body[pos:pos + _PIECE.size]
+            pos += _PIECE.size
+        if flags & STATS:
+            parts["stats"] = body[pos:pos + _STATS.size]
+            pos += _STATS.size
+        if flags & QUEUE:
+            n = body[pos]
+            parts["queue"] = body[pos + 1:pos + 1 + n]
+            pos += 1 + n
+        if flags & BOARD:
+            mask, = _MASK.unpack_from(body, pos)
+            pos += _MASK.size
+            for y in range(ROWS):
+                if mask >> y & 1:
+                    rows[y] = body[pos:pos + ROW_BYTES]
+                    pos += ROW_BYTES
+        if kind == DELTA:
+            ok = self.seq is not None and seq == self.seq + 1
+        elif kind == KEYFRAME:
+            # a checkpoint must agree with what the deltas built
+            ok = seq == self.seq and rows == self.rows and parts == self.parts
+        else:
+            ok = True
+        self.parts.update(parts)
+        self.rows = rows
+        self.seq = seq
+        return ok
+
+
+class LoadStats:
+    def __init__(self):
+        self.latency_ns = []
+        self.frames = 0
+        self.bytes = 0
+        self.resyncs = 0
+        self.keyframes = 0
+        self.drift = 0
+        self.connected = 0
+        self.measuring = False
+        self.slow = []  # one SlowViewer each
+
+
+class SlowViewer:
+    """What one stalling viewer got: how old each frame was on arrival, and its resyncs."""
+
+    def __init__(self):
+        self.stale_ns = []
+        self.resyncs = 0
+
+
+async def recv_exactly(sock, n):
+    """`n` bytes straight from the socket, with no reader buffer in between."""
+    loop = asyncio.get_running_loop()
+    data = b""
+    while len(data) < n:
+        chunk = await loop.sock_recv(sock, n - len(data))
+        if not chunk:
+            raise asyncio.IncompleteReadError(data, n)
+        data += chunk
+    return data
+
+
+async def viewer(host, port, stats, stop, mirror, slow_s):
+    """One spectator. Slow ones sleep `slow_s` after every frame and are reported one by one.
+
+    A slow viewer reads the socket directly with a small receive buffer, so
+    its staleness is mostly what the server holds for it, not its own backlog.
+    """
+    family, kind, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    sock = socket.socket(family, kind, proto)
+    if slow_s:
+        # before connecting, so the window is small from the start
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1)  # the kernel rounds up to its minimum
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        return
+    mine = None
+    if slow_s:
+        sock.setblocking(False)
+        writer = sock
+        read = functools.partial(recv_exactly, sock)
+        mine = SlowViewer()
+        stats.slow.append(mine)
+    else:
+        reader, writer = await asyncio.open_connection(sock=sock, limit=2 ** 16)
+        read = reader.readexactly
+    stats.connected += 1
+    mirrors = {}
+    seen = set()
+    clock = time.monotonic_ns
+    try:
+        while not stop.is_set():
+            n, = LENGTH.unpack(await read(LENGTH.size))
+            frame = await read(n)
+            kind, game, seq, sent = HEADER.unpack_from(frame)
+            if stats.measuring:
+                if mine is None:
+                    stats.latency_ns.append(clock() - sent)
+                else:
+                    mine.stale_ns.append(clock() - sent)
+                stats.frames += 1
+                stats.bytes += n + LENGTH.size
+            if kind == RESYNC:
+                if game in seen:  # the first keyframe of every game is just joining
+                    stats.resyncs += 1
+                    if mine is not None and stats.measuring:
+                        mine.resyncs += 1
+                seen.add(game)
+            elif kind == KEYFRAME:
+                stats.keyframes += 1
+            if mirror:
+                m = mirrors.setdefault(game, Mirror())
+                if not m.apply(kind, seq, frame[HEADER.size:]):
+                    stats.drift += 1
+            if slow_s:
+                await asyncio.sleep(slow_s)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def load(host, port, clients, seconds, mirrors, slow, slow_ms):
+    stats = LoadStats()
+    stop = asyncio.Event()
+    tasks = []
+    for i in range(clients):
+        slow_s = slow_ms / 1000.0 if i < slow else 0.0
+        tasks.append(asyncio.ensure_future(viewer(host, port, stats, stop, i < slow + mirrors, slow_s)))
+    # connecting hundreds of viewers takes a moment; measure from when they are all in
+    for _ in range(100):
+        if stats.connected == clients:
+            break
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.5)
+    stats.measuring = True
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    elapsed = time.perf_counter() - start
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    ms = sorted(stats.latency_ns)
+    p = (lambda q: ms[min(len(ms) - 1, int(q * len(ms)))] / 1e6) if ms else (lambda q: 0.0)
+    print(f"load: {stats.connected}/{clients} viewers ({slow} slow), {stats.frames / elapsed:,.0f} frames/s, "
+          f"{stats.bytes / elapsed / 1e6:.2f} MB/s, mean frame {stats.bytes / max(1, stats.frames):.0f} B")
+    print(f"  fan-out latency (viewers keeping up) p50 {p(0.5):.2f} ms  p95 {p(0.95):.2f} ms  p99 {p(0.99):.2f} ms  max {p(1.0):.2f} ms")
+    for i, slow_viewer in enumerate(stats.slow):
+        ages = sorted(slow_viewer.stale_ns)
+        if ages:
+            print(f"  slow viewer {i} ({slow_ms:g} ms per frame): {len(ages)} frames, staleness "
+                  f"p50 {ages[len(ages) // 2] / 1e6:.0f} ms  max {ages[-1] / 1e6:.0f} ms, "
+                  f"{slow_viewer.resyncs} resync keyframes received")
+    print(f"  {stats.keyframes} periodic keyframes, {stats.resyncs} resync keyframes, "
+          f"{stats.drift} mirror mismatches in {min(clients, slow + mirrors)} mirrored viewers")
+    return stats
+
+
+async def _wait_for(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream live games to many spectators")
+    parser.add_argument("mode", choices=("serve", "load", "bench"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7100)
+    parser.add_argument("--ws-port", type=int, help="also serve WebSocket viewers on this port")
+    parser.add_argument("--games", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queue", type=int, default=32, help="ticks queued per viewer before a resync")
+    parser.add_argument("--seconds", type=float, help="stop after this long (serve: run forever)")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--mirrors", type=int, default=8, help="viewers besides the slow ones that rebuild and check the boards")
+    parser.add_argument("--slow", type=int, default=0, help="viewers that stall after every frame")
+    parser.add_argument("--slow-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    engines.headless()
+
+    if args.mode == "serve":
+        asyncio.run(serve(args.host, args.port, args.ws_port, args.games, args.seed, args.queue, args.seconds))
+        return
+    seconds = args.seconds or 10.0
+    if args.mode == "load":
+        asyncio.run(load(args.host, args.port, args.clients, seconds, args.mirrors, args.slow, args.slow_ms))
+        return
+
+    cmd = [sys.executable, __file__, "serve", "--host", args.host, "--port", str(args.port),
+           "--games", str(args.games), "--seed", str(args.seed), "--queue", str(args.queue),
+           "--seconds", str(seconds + 3)]
+    server = subprocess.Popen(cmd)
+    try:
+        asyncio.run(_wait_for(args.host, args.port))
+        asyncio.run(load(args.host, args.port, args.clients, seconds, args.mirrors, args.slow, args.slow_ms))
+        server.wait(timeout=30)
+    finally:
+        if server.poll() is None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Seed sweep: many autoplayed games across all cores.
+
+Seeds ``start .. start + games`` are split into chunks of `chunk` seeds and
+handed to a ``ProcessPoolExecutor``. Each finished chunk is appended to the
+checkpoint file (one JSON line per chunk, flushed and fsynced) as soon as
+it comes back, with at most two chunks per worker in flight. Running the
+same command again skips every chunk already in the file, so an
+interrupted sweep resumes where it stopped. The first line records the
+sweep parameters and a resume with different ones is refused.
+
+    python tetris/tools/sweep.py --games 10000 --checkpoint sweep.jsonl
+    python tetris/tools/sweep.py --games 200 --scaling 1,2,4,8
+
+Each game runs ``autoplay.play_game`` until it tops out or reaches
+--max-pieces, without the bot's time budget, so a seed always plays the
+same game and resumed results match an uninterrupted run. The bot waits
+--delay frames of gravity before each placement (30 by default, two
+pieces a second), since the bot's own decision time is not charged here:
+that would make results depend on machine load. --randomizer deals the
+pieces with one of ``randomizer.py``'s strategies instead of the engine's
+own bags, to compare how the bot fares under each. The report aggregates
+lines, score, pieces and survival time (frames / FPS).
+--scaling times the same seeds at several worker counts and reports
+speedup and parallel efficiency.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import engines
+import randomizer
+
+FIELDS = ("lines", "score", "pieces", "survival_s")
+
+
+def _init_worker():
+    engines.headless()
+
+
+def run_chunk(start, stop, max_pieces, gravity, delay, strategy=None):
+    """Play seeds start..stop-1 and return one result dict per game."""
+    import autoplay
+
+    out = []
+    for seed in range(start, stop):
+        # no time budget: the result depends on the seed, not on machine load
+        bot = autoplay.AutoPlayer(budget_ms=None)
+        game, frames = autoplay.play_game(seed, max_pieces, gravity, delay, bot, strategy)
+        out.append({
+            "seed": seed,
+            "lines": game.lines,
+            "score": game.score,
+            "pieces": game.pieces,
+            "level": game.level,
+            "survival_s": frames / autoplay.engine.FPS,
+            "topped_out": game.game_over,
+        })
+    return out
+
+
+# -------------------- Checkpoint --------------------
+def load_checkpoint(path, params):
+    """Finished chunks as {chunk start: results}, and the byte length of the intact records.
+
+    Checks the parameters match. Anything after the last newline, or from
+    the first line that does not parse, is a torn write; its chunk reruns.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done, 0
+    with open(path, "rb") as f:
+        data = f.read()
+    intact = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            record = json.loads(line)
+        except ValueError:
+            break
+        if intact == 0:
+            if record.get("params") != params:
+                raise SystemExit(f"{path} was written with {record.get('params')}, not {params}")
+        else:
+            done[record["chunk"]] = record["results"]
+        intact += len(line)
+    return done, intact
+
+
+class Checkpoint:
+    def __init__(self, path, params, intact):
+        """Append after the first `intact` bytes of `path`, cutting off a torn tail first."""
+        if os.path.exists(path):
+            os.truncate(path, intact)
+        self.f = open(path, "a")
+        if not intact:
+            self.write({"params": params})
+
+    def write(self, record):
+        self.f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+# -------------------- Sweep --------------------
+def sweep(start, games, chunk, workers, max_pieces, gravity=None, delay=30, checkpoint=None, progress=True,
+          strategy=None):
+    """Run the sweep; yields each chunk's results as soon as it finishes."""
+    params = {"start": start, "games": games, "chunk": chunk, "max_pieces": max_pieces,
+              "gravity": gravity, "delay": delay}
+    if strategy is not None:
+        params["randomizer"] = strategy  # absent by default, so older checkpoints still resume
+    chunks = [(s, min(s + chunk, start + games)) for s in range(start, start + games, chunk)]
+    done, intact = load_checkpoint(checkpoint, params) if checkpoint else ({}, 0)
+    for results in done.values():
+        yield results
+    todo = [c for c in chunks if c[0] not in done]
+    ckpt = Checkpoint(checkpoint, params, intact) if checkpoint else None
+
+    finished = len(chunks) - len(todo)
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = set()
+            queue = iter(todo)
+            while True:
+                # keep two chunks per worker in flight so nobody idles
+                while len(pending) < 2 * workers:
+                    c = next(queue, None)
+                    if c is None:
+                        break
+                    fut = pool.submit(run_chunk, c[0], c[1], max_pieces, gravity, delay, strategy)
+                    fut.chunk = c[0]
+                    pending.add(fut)
+                if not pending:
+                    break
+                ready, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in ready:
+                    results = fut.result()
+                    if ckpt:
+                        ckpt.write({"chunk": fut.chunk, "results": results})
+                    finished += 1
+                    if progress:
+                        rate = (finished - (len(chunks) - len(todo))) * chunk / (time.perf_counter() - t0)
+                        print(f"\r{finished}/{len(chunks)} chunks, {rate:.1f} games/s", end="", flush=True)
+                    yield results
+    finally:
+        if ckpt:
+            ckpt.close()
+        if progress and todo:
+            print()
+
+
+def summarize(results):
+    out = {"games": len(results), "topped_out": sum(r["topped_out"] for r in results)}
+    for field in FIELDS:
+        values = sorted(r[field] for r in results)
+        out[field] = {
+            "mean": statistics.fmean(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(0.95 * len(values)))],
+            "max": values[-1],
+        }
+    return out
+
+
+def print_summary(summary):
+    print(f"{summary['games']} games, {summary['topped_out']} topped out")
+    print(f"{'':12} {'mean':>12} {'stdev':>12} {'p50':>12} {'p95':>12} {'max':>12}")
+    for field in FIELDS:
+        s = summary[field]
+        print(f"{field:12} " + " ".join(f"{s[k]:12.1f}" for k in ("mean", "stdev", "p50", "p95", "max")))
+
+
+def scaling(counts, start, games, chunk, max_pieces, gravity, delay, strategy=None):
+    """Wall time of the same sweep at each worker count."""
+    base = None
+    print(f"{'workers':>7} {'wall s':>8} {'games/s':>9} {'speedup':>8} {'efficiency':>10}")
+    for n in counts:
+        t0 = time.perf_counter()
+        for _ in sweep(start, games, chunk, n, max_pieces, gravity, delay, progress=False, strategy=strategy):
+            pass
+        wall = time.perf_counter() - t0
+        base = base or wall * counts[0]
+        speedup = base / wall
+        print(f"{n:7d} {wall:8.2f} {games / wall:9.1f} {speedup:8.2f} {speedup / n:10.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Autoplayed seed sweep across processes")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--start", type=int, default=0, help="first seed")
+    parser.add_argument("--chunk", type=int, default=25, help="seeds per task")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-pieces", type=int, default=500)
+    parser.add_argument("--gravity", type=float)
+    parser.add_argument("--delay", type=int, default=30, help="frames of gravity before each placement")
+    parser.add_argument("--randomizer", choices=sorted(randomizer.STRATEGIES),
+                        help="deal pieces with this strategy instead of the engine's bags")
+    parser.add_argument("--checkpoint", help="JSON-lines file to append results to and resume from")
+    parser.add_argument("--json", help="write the summary here")
+    parser.add_argument("--scaling", help="comma-separated worker counts to time instead")
+    args = parser.parse_args()
+
+    if args.scaling:
+        counts = [int(n) for n in args.scaling.split(",")]
+        scaling(counts, args.start, args.games, args.chunk, args.max_pieces, args.gravity, args.delay,
+                args.randomizer)
+        return
+
+    results = []
+    for chunk_results in sweep(args.start, args.games, args.chunk, args.workers, args.max_pieces,
+                               args.gravity, args.delay, args.checkpoint, strategy=args.randomizer):
+        results.extend(chunk_results)
+    summary = summarize(results)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Terminal (curses) frontend for the GPT-5.2 (thinking) engine.
+
+For playing or watching a game over SSH on a machine without a display.
+Each board cell is two characters wide. The frame is composed as a map
+from screen position to (text, style). Only the entries that differ from
+the previous frame are written, so a falling piece costs a handful of
+cells per refresh and the border and labels are drawn once. The engine's
+listeners say when anything moved. When nothing did (and the HUD numbers
+are unchanged), no frame is composed at all.
+
+The game is simulated at the engine's FPS, but the loop only wakes to
+refresh the screen (--refresh times a second) or when a key arrives. The
+frames in between are caught up in a batch.
+
+Keys: arrows move / soft drop, up or x rotates, space hard drops,
+p pauses, r restarts after game over, q quits. Terminals do not report
+key releases, so moves repeat at the terminal's key-repeat rate instead of
+the engine's DAS.
+
+    python tetris/tools/termplay.py
+    python tetris/tools/termplay.py --autoplay --pps 3 --refresh 15
+    python tetris/tools/termplay.py --bench 10
+
+--bench runs the autoplayer in a pseudo-terminal for that many seconds,
+once with diffed updates and once repainting every frame. It reports the
+bytes the terminal received and the CPU time spent.
+"""
+import argparse
+import curses
+import os
+import pty
+import sys
+import time
+
+import engines
+
+engine = engines.load(engines.DEFAULT)
+ROWS, COLS, FPS = engine.ROWS, engine.COLS, engine.FPS
+CODES = {None: 0, **engine.CELL_CODES}
+KIND_CODES = {kind: CODES[engine.COLORS[kind]] for kind in engine.SHAPES}
+
+# styles: 0 empty, 1-7 kinds, 8 garbage, then these
+GHOST, TEXT, DIM = 9, 10, 11
+# curses colour per kind code (SHAPES order: I O T S Z J L), then garbage
+CURSES_COLORS = ("CYAN", "YELLOW", "MAGENTA", "GREEN", "RED", "BLUE", "WHITE", "WHITE")
+
+TOP, LEFT = 1, 2  # top-left cell of the board on screen
+HUD_X = LEFT + 2 * COLS + 4
+
+
+def compose(game):
+    """{(row, col): (text, style)} for everything that changes during play."""
+    frame = {}
+    for y, row in enumerate(game.grid):
+        sy = TOP + y
+        for x, cell in enumerate(row):
+            code = CODES[cell]
+            frame[sy, LEFT + 2 * x] = ("[]", code) if code else (" .", DIM)
+    if not game.game_over:
+        cur = game.current
+        code = KIND_CODES[cur.kind]
+        for bx, by in cur.blocks(y=game.ghost_y()):
+            if by >= 0:
+                frame[TOP + by, LEFT + 2 * bx] = ("::", GHOST)
+        for bx, by in cur.blocks():
+            if by >= 0:
+                frame[TOP + by, LEFT + 2 * bx] = ("[]", code)
+
+    nxt = game.next_piece
+    blocks = set(nxt.blocks(x=0, y=0))
+    for y in range(4):
+        for x in range(4):
+            frame[TOP + 9 + y, HUD_X + 2 * x] = ("[]", KIND_CODES[nxt.kind]) if (x, y) in blocks else ("  ", 0)
+
+    frame[TOP + 1, HUD_X + 7] = (f"{game.score:>9}", TEXT)
+    frame[TOP + 2, HUD_X + 7] = (f"{game.lines:>9}", TEXT)
+    frame[TOP + 3, HUD_X + 7] = (f"{game.level:>9}", TEXT)
+    status = "GAME OVER  r: restart" if game.game_over else ("PAUSED" if game.paused else "")
+    frame[TOP + 5, HUD_X] = (f"{status:<22}", TEXT)
+    return frame
+
+
+STATIC = [
+    ((TOP + 1, HUD_X), "Score"),
+    ((TOP + 2, HUD_X), "Lines"),
+    ((TOP + 3, HUD_X), "Level"),
+    ((TOP + 8, HUD_X), "Next"),
+    ((TOP + 15, HUD_X), "arrows move, up/x rotate"),
+    ((TOP + 16, HUD_X), "space drop, p pause, q quit"),
+]
+
+
+class TermView:
+    """Writes frames to a curses window, touching only what changed."""
+
+    def __init__(self, stdscr, full=False):
+        self.scr = stdscr
+        self.full = full
+        self.prev = {}
+        self.frames = self.cells = 0
+        curses.curs_set(0)
+        self.attrs = [curses.A_NORMAL] * (DIM + 1)
+        if curses.has_colors():
+            curses.start_color()
+            curses.use_default_colors()
+            for code, name in enumerate(CURSES_COLORS, 1):
+                curses.init_pair(code, getattr(curses, "COLOR_" + name), -1)
+                self.attrs[code] = curses.color_pair(code) | curses.A_BOLD
+            self.attrs[8] = curses.color_pair(8) | curses.A_DIM
+        self.attrs[GHOST] = curses.A_DIM
+        self.attrs[DIM] = curses.A_DIM
+        self.draw_static()
+
+    def draw_static(self):
+        scr = self.scr
+        scr.erase()
+        for y in range(ROWS):
+            self._put(TOP + y, LEFT - 1, "|", curses.A_NORMAL)
+            self._put(TOP + y, LEFT + 2 * COLS, "|", curses.A_NORMAL)
+        self._put(TOP + ROWS, LEFT - 1, "+" + "-" * (2 * COLS) + "+", curses.A_NORMAL)
+        for (y, x), text in STATIC:
+            self._put(y, x, text, curses.A_NORMAL)
+        self.prev = {}
+
+    def _put(self, y, x, text, attr):
+        try:
+            self.scr.addstr(y, x, text, attr)
+        except curses.error:
+            pass  # off a small terminal; keep playing
+
+    def show(self, frame):
+        if self.full:
+            self.draw_static()
+            self.scr.clearok(True)
+        prev, attrs = self.prev, self.attrs
+        for pos, cell in frame.items():
+            if prev.get(pos) != cell:
+                self._put(pos[0], pos[1], cell[0], attrs[cell[1]])
+                self.cells += 1
+        self.prev = frame
+        self.frames += 1
+        self.scr.noutrefresh()
+        curses.doupdate()
+
+
+# -------------------- Loop --------------------
+def run(stdscr, seed, refresh, autoplay_pps, seconds, full):
+    view = TermView(stdscr, full)
+    game = engine.Tetris(seed=seed)
+    changed = [True]
+
+    def watch(g):
+        g.listeners.append(lambda _g, _event: changed.__setitem__(0, True))
+
+    watch(game)
+    bot = None
+    if autoplay_pps:
+        import autoplay
+        bot = autoplay.AutoPlayer()
+    dt = 1.0 / FPS
+    period = 1.0 / refresh
+    start = last_sim = next_draw = next_bot = time.monotonic()
+    hud = None
+    while seconds is None or time.monotonic() - start < seconds:
+        stdscr.timeout(max(0, int((next_draw - time.monotonic()) * 1000)))
+        key = stdscr.getch()
+        if key != -1:
+            if key in (ord("q"), 27):
+                break
+            if game.game_over and key == ord("r"):
+                game = engine.Tetris(seed=game.rng.getrandbits(32))
+                watch(game)
+            elif key == ord("p"):
+                game.paused = not game.paused
+            elif not game.paused and not game.game_over:
+                if key == curses.KEY_LEFT:
+                    game.move(-1)
+                elif key == curses.KEY_RIGHT:
+                    game.move(1)
+                elif key in (curses.KEY_UP, ord("x")):
+                    game.rotate()
+                elif key == curses.KEY_DOWN:
+                    game.soft_drop_step()
+                elif key == ord(" "):
+                    game.hard_drop()
+            changed[0] = True
+            next_draw = time.monotonic()  # show the key's effect right away
+
+        now = time.monotonic()
+        frames = int((now - last_sim) * FPS)
+        if frames:
+            last_sim += frames * dt
+            for _ in range(frames):
+                engine.advance(game, dt)
+        if bot is not None and now >= next_bot:
+            next_bot += 1.0 / autoplay_pps
+            if game.game_over:
+                game = engine.Tetris(seed=game.rng.getrandbits(32))
+                watch(game)
+                changed[0] = True
+            else:
+                bot.act(game)
+
+        if now >= next_draw:
+            next_draw = max(next_draw + period, now)
+            state = (game.score, game.lines, game.level, game.paused, game.game_over)
+            if changed[0] or state != hud or full:
+                changed[0] = False
+                hud = state
+                view.show(compose(game))
+    return view
+
+
+def bench(seconds, refresh, pps, seed):
+    """Bytes a terminal receives and CPU spent, diffed versus full repaints."""
+    results = []
+    for full in (False, True):
+        pid, fd = pty.fork()
+        if pid == 0:
+            os.environ.setdefault("TERM", "xterm-256color")
+            os.environ["LINES"], os.environ["COLUMNS"] = "30", "80"
+            curses.wrapper(run, seed, refresh, pps, seconds, full)
+            os._exit(0)
+        received = 0
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:
+                break
+            if not chunk:
+                break
+            received += len(chunk)
+        _, _, usage = os.wait4(pid, 0)
+        results.append((full, received, usage.ru_utime + usage.ru_stime))
+    for full, received, cpu in results:
+        label = "full repaint" if full else "diffed      "
+        print(f"{label}: {received / seconds / 1024:7.2f} KiB/s to the terminal, "
+              f"CPU {cpu / seconds:.1%} of a core ({seconds:.0f} s at {refresh} Hz, bot at {pps} pieces/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play or watch in a terminal")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--refresh", type=float, default=20.0, help="screen refreshes per second")
+    parser.add_argument("--autoplay", action="store_true", help="let the autoplayer play")
+    parser.add_argument("--pps", type=float, default=3.0, help="autoplayer pieces per second")
+    parser.add_argument("--full", action="store_true", help="repaint everything every refresh (for comparison)")
+    parser.add_argument("--bench", type=float, metavar="SECONDS", help="measure output bytes and CPU in a pty")
+    args = parser.parse_args()
+    engines.headless()
+    if args.bench:
+        bench(args.bench, args.refresh, args.pps, args.seed if args.seed is not None else 0)
+        return
+    if not sys.stdout.isatty():
+        raise SystemExit("needs a terminal")
+    curses.wrapper(run, args.seed, args.refresh, args.pps if args.autoplay else None, None, args.full)
+
+
+if __name__ == "__main__":
+    main()
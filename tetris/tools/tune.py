@@ -0,0 +1,177 @@
+"""Cross-entropy tuning of the autoplayer's heuristic weights.
+
+Each generation samples weight vectors from a Gaussian, plays every vector
+on the same seeded headless games in a process pool, and refits the
+Gaussian to the best `elite` fraction. Fitness is the mean number of
+lines cleared per game (``autoplay.play_game`` with the bot's time budget
+off, so a vector's fitness depends only on its games).
+
+The heuristic only compares placements, so a weight vector and any
+positive multiple of it play identically. Samples are normalized to unit
+length and rounded to 4 decimals, and that normalized vector is what gets
+played and cached.
+
+Fitness is memoized in an SQLite file keyed by (weights, seed set, game
+settings, engine version). The engine version is a hash of the engine
+source and the bot modules that decide its moves. A restarted run, or a
+second run sharing the cache, looks every candidate up before simulating
+it and stores each result as soon as it arrives.
+
+    python tetris/tools/tune.py --generations 10 --population 24 --games 8
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import engines
+
+FEATURES = ("height", "lines", "holes", "bumpiness")
+TOOLS = Path(__file__).resolve().parent
+
+
+def engine_version():
+    """Hash of everything that decides how a weight vector plays."""
+    h = hashlib.sha256()
+    for path in (engines.ROOT / engines.IMPLEMENTATIONS[engines.DEFAULT],
+                 TOOLS / "autoplay.py", TOOLS / "placements.py"):
+        h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+def normalize(vector):
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return tuple(round(v / norm, 4) for v in vector)
+
+
+# -------------------- Fitness --------------------
+def _init_worker():
+    engines.headless()
+
+
+def play(weights, seeds, max_pieces, gravity, delay):
+    """Lines cleared in each seeded game with `weights`."""
+    import autoplay
+
+    bot_weights = dict(zip(FEATURES, weights))
+    lines = []
+    for seed in seeds:
+        bot = autoplay.AutoPlayer(bot_weights, budget_ms=None)
+        game, _ = autoplay.play_game(seed, max_pieces, gravity, delay, bot)
+        lines.append(game.lines)
+    return lines
+
+
+class FitnessCache:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("CREATE TABLE IF NOT EXISTS fitness (key TEXT PRIMARY KEY, weights TEXT, "
+                        "fitness REAL, lines TEXT)")
+        self.db.commit()
+
+    @staticmethod
+    def key(weights, context):
+        return hashlib.sha256(json.dumps([weights, context], sort_keys=True).encode()).hexdigest()
+
+    def get(self, key):
+        row = self.db.execute("SELECT fitness FROM fitness WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, key, weights, fitness, lines):
+        self.db.execute("INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(weights), fitness, json.dumps(lines)))
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def evaluate(pool, cache, candidates, context):
+    """Fitness per candidate; only cache misses are simulated. Returns (fitness, hits)."""
+    fitness, hits, jobs = {}, 0, {}
+    for w in set(candidates):
+        key = cache.key(w, context)
+        cached = cache.get(key)
+        if cached is not None:
+            fitness[w] = cached
+            hits += 1
+        else:
+            fut = pool.submit(play, w, context["seeds"], context["max_pieces"],
+                              context["gravity"], context["delay"])
+            jobs[fut] = (w, key)
+    for fut in as_completed(jobs):
+        w, key = jobs[fut]
+        lines = fut.result()
+        fitness[w] = statistics.fmean(lines)
+        cache.put(key, w, fitness[w], lines)
+    return fitness, hits
+
+
+# -------------------- Cross-entropy method --------------------
+def tune(generations, population, elite, games, seed, max_pieces, gravity, delay, workers, cache_path):
+    from autoplay import WEIGHTS
+
+    rng = random.Random(seed)
+    context = {
+        "seeds": list(range(seed, seed + games)),
+        "max_pieces": max_pieces,
+        "gravity": gravity,
+        "delay": delay,
+        "engine": engine_version(),
+    }
+    mean = list(normalize([WEIGHTS[f] for f in FEATURES]))
+    std = [0.5] * len(FEATURES)
+    n_elite = max(2, int(population * elite))
+    cache = FitnessCache(cache_path)
+    best = (float("-inf"), None)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            for gen in range(generations):
+                candidates = [normalize(mean)]  # the current mean is always re-scored (a cache hit)
+                candidates += [normalize([rng.gauss(m, s) for m, s in zip(mean, std)])
+                               for _ in range(population - 1)]
+                fitness, hits = evaluate(pool, cache, candidates, context)
+                ranked = sorted(set(candidates), key=lambda w: fitness[w], reverse=True)
+                elites = ranked[:n_elite]
+                if fitness[elites[0]] > best[0]:
+                    best = (fitness[elites[0]], elites[0])
+
+                mean = [statistics.fmean(w[i] for w in elites) for i in range(len(FEATURES))]
+                # a little extra noise keeps the distribution from collapsing early
+                std = [statistics.pstdev(w[i] for w in elites) + 0.05 / (gen + 1) for i in range(len(FEATURES))]
+                print(f"gen {gen:2d}: best {fitness[elites[0]]:7.2f}  elite mean "
+                      f"{statistics.fmean(fitness[w] for w in elites):7.2f}  "
+                      f"cache hits {hits}/{len(set(candidates))}  mean {normalize(mean)}")
+    finally:
+        cache.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune autoplayer weights with the cross-entropy method")
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--population", type=int, default=24)
+    parser.add_argument("--elite", type=float, default=0.25, help="fraction kept per generation")
+    parser.add_argument("--games", type=int, default=8, help="seeded games per evaluation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-pieces", type=int, default=300)
+    parser.add_argument("--gravity", type=float)
+    parser.add_argument("--delay", type=int, default=30, help="frames of gravity before each placement")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache", default="tune_cache.sqlite")
+    args = parser.parse_args()
+
+    fitness, weights = tune(args.generations, args.population, args.elite, args.games, args.seed,
+                            args.max_pieces, args.gravity, args.delay, args.workers, args.cache)
+    print(f"best fitness {fitness:.2f} lines/game")
+    print("WEIGHTS = " + json.dumps(dict(zip(FEATURES, weights))))
+
+
+if __name__ == "__main__":
+    main()
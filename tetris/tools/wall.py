@@ -0,0 +1,269 @@
+"""Wall of autoplayed games in one pygame window.
+
+Lays out N scaled-down GPT-5.2 (thinking) boards in a grid that fills the
+window and plays them all at once. Each frame:
+
+* every game gets one frame of gravity, and a bot places a piece every
+  `--delay` frames. The bot is the ``autoplay`` heuristic over
+  ``placements.drops``, which is cheap enough for dozens of boards. The
+  drops start from where gravity has taken the piece, not from spawn.
+  Each board keeps its place in the stagger across restarts.
+* each board keeps the tile codes it has on screen. The engine's
+  listeners mark a board whose piece moved or that locked. Only such
+  boards are looked at, and for a moved piece only the cells the piece
+  left or entered. Every changed cell is one blit of a shared, pre-rendered
+  tile for its colour, batched into a single ``Surface.blits`` call.
+* ``display.update`` gets the rects of the boards that changed, not the
+  whole window.
+
+    python tetris/tools/wall.py --boards 64
+    python tetris/tools/wall.py --boards 64 --bench 600
+    python tetris/tools/wall.py --boards 64 --bench 600 --naive
+
+--bench runs that many frames uncapped under the SDL dummy driver and
+prints frame-time percentiles. With --naive it instead repaints every cell
+of every board with ``draw.rect`` and flips the whole window, as N copies
+of a per-game draw loop would.
+"""
+import argparse
+import math
+import time
+
+import autoplay
+import engines
+import placements
+
+engine = placements.engine
+pygame = engine.pygame
+ROWS, COLS, FPS = engine.ROWS, engine.COLS, engine.FPS
+CODES = {None: 0, **engine.CELL_CODES}
+KIND_CODES = {kind: CODES[engine.COLORS[kind]] for kind in engine.SHAPES}
+CODE_COLORS = [engine.GRID_BG] + [color for color, _ in sorted(engine.CELL_CODES.items(), key=lambda kv: kv[1])]
+GAP = 6
+
+
+def layout(n, width, height, label):
+    """(columns, cell size) that fits n boards plus labels in the window with the largest cells."""
+    best = (1, 1)
+    for cols in range(1, n + 1):
+        rows = math.ceil(n / cols)
+        size = min((width - GAP * (cols + 1)) // (cols * COLS),
+                   (height - GAP * (rows + 1) - rows * label) // (rows * ROWS))
+        if size > best[1]:
+            best = (cols, size)
+    return best
+
+
+def make_tiles(size):
+    """One surface per cell code, shared by every board."""
+    tiles = []
+    for color in CODE_COLORS:
+        tile = pygame.Surface((size, size))
+        tile.fill(color)
+        if size >= 5 and color != engine.GRID_BG:
+            pygame.draw.rect(tile, [c // 2 for c in color], tile.get_rect(), 1)
+        tiles.append(tile.convert() if pygame.display.get_surface() else tile)
+    return tiles
+
+
+def choose(game):
+    columns = tuple(game.columns)
+    cur = game.current
+    options = placements.drops(columns, cur.kind, (cur.x, cur.y, cur.rot))
+    if not options:
+        return None
+    return max(options, key=lambda p: autoplay.evaluate(columns, p.cells))
+
+
+class Board:
+    def __init__(self, seed, origin, size, label_font, phase=0):
+        self.origin = origin
+        self.size = size
+        self.rect = pygame.Rect(origin, (COLS * size, ROWS * size))
+        self.font = label_font
+        self.label = None
+        self.label_rect = pygame.Rect(origin[0], origin[1] + ROWS * size + 1,
+                                      COLS * size, label_font.get_height() if label_font else 0)
+        self.label_bg = pygame.Surface(self.label_rect.size)
+        self.label_bg.fill(engine.BG)
+        self.shown = [-1] * (ROWS * COLS)  # tile code on screen per cell
+        self.wait = phase  # stagger the bots so they do not all place on the same frame
+        self.start(seed)
+
+    def start(self, seed):
+        """A new game; `wait` carries on, so the board keeps its place in the stagger."""
+        self.game = engine.Tetris(seed=seed)
+        self.game.listeners.append(self._changed)
+        self.board_dirty = True
+        self.piece_dirty = True
+        self.piece_cells = {}
+
+    def _changed(self, game, event):
+        if event == "move":
+            self.piece_dirty = True
+        else:
+            self.board_dirty = True
+
+    def tick(self, delay):
+        game = self.game
+        if game.game_over:
+            self.start(game.rng.getrandbits(32))
+            game = self.game
+        if self.wait >= delay:
+            self.wait = 0
+            best = choose(game)
+            if best is None:
+                game.hard_drop()
+            else:
+                placements.play(game, best)
+        else:
+            self.wait += 1
+            engine.advance(game, 1.0 / FPS)
+
+    def draw(self, tiles, blits, rects):
+        if not (self.board_dirty or self.piece_dirty):
+            return
+        game = self.game
+        old_piece = self.piece_cells
+        piece = {}
+        if not game.game_over:
+            code = KIND_CODES[game.current.kind]
+            for bx, by in game.current.blocks():
+                if by >= 0:
+                    piece[by * COLS + bx] = code
+        self.piece_cells = piece
+
+        grid = game.grid
+        if self.board_dirty:
+            cells = range(ROWS * COLS)
+        else:
+            cells = old_piece.keys() | piece.keys()
+        shown = self.shown
+        ox, oy = self.origin
+        s = self.size
+        changed = False
+        for i in cells:
+            y, x = divmod(i, COLS)
+            want = piece.get(i)
+            if want is None:
+                want = CODES[grid[y][x]]
+            if shown[i] != want:
+                shown[i] = want
+                blits.append((tiles[want], (ox + x * s, oy + y * s)))
+                changed = True
+        if changed:
+            rects.append(self.rect)
+        self.board_dirty = self.piece_dirty = False
+
+        if self.font is not None:
+            label = f"{game.score}  {game.lines}L"
+            if label != self.label:
+                self.label = label
+                # clear the old label first; a shorter one would leave its tail on screen
+                blits.append((self.label_bg, self.label_rect.topleft))
+                blits.append((self.font.render(label, True, engine.SUBTEXT, engine.BG), self.label_rect.topleft))
+                rects.append(self.label_rect)
+
+
+def build(n, width, height, seed, delay):
+    font_h = 14
+    cols, size = layout(n, width, height, font_h + 2)
+    font = pygame.font.Font(None, font_h + 4) if size >= 8 else None
+    label_h = font.get_height() + 2 if font else 0
+    boards = []
+    for i in range(n):
+        r, c = divmod(i, cols)
+        origin = (GAP + c * (COLS * size + GAP), GAP + r * (ROWS * size + label_h + GAP))
+        boards.append(Board(seed + i, origin, size, font, i % (delay + 1)))
+    return boards, size
+
+
+def naive_draw(screen, boards):
+    """Every cell of every board, every frame."""
+    screen.fill(engine.BG)
+    for b in boards:
+        ox, oy = b.origin
+        s = b.size
+        game = b.game
+        piece = {(bx, by) for bx, by in game.current.blocks()} if not game.game_over else ()
+        for y, row in enumerate(game.grid):
+            for x, cell in enumerate(row):
+                color = game.current.color if (x, y) in piece else (cell or engine.GRID_BG)
+                pygame.draw.rect(screen, color, (ox + x * s, oy + y * s, s, s))
+        if b.font is not None:
+            screen.blit(b.font.render(f"{game.score}  {game.lines}L", True, engine.SUBTEXT), b.label_rect.topleft)
+    pygame.display.flip()
+
+
+def run(n, width, height, seed, delay, bench_frames=None, naive=False):
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(f"Tetris wall ({n} boards)")
+    boards, size = build(n, width, height, seed, delay)
+    tiles = make_tiles(size)
+    screen.fill(engine.BG)
+    pygame.display.flip()
+    clock = pygame.time.Clock()
+
+    frame_ns, update_ns = [], []
+    frames = 0
+    running = True
+    while running:
+        if bench_frames is None:
+            clock.tick(FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    running = False
+        elif frames >= bench_frames:
+            break
+        else:
+            pygame.event.pump()
+        t0 = time.perf_counter_ns()
+        for b in boards:
+            b.tick(delay)
+        t1 = time.perf_counter_ns()
+        if naive:
+            naive_draw(screen, boards)
+        else:
+            blits, rects = [], []
+            for b in boards:
+                b.draw(tiles, blits, rects)
+            if blits:
+                screen.blits(blits, doreturn=False)
+                pygame.display.update(rects)
+        t2 = time.perf_counter_ns()
+        frame_ns.append(t2 - t0)
+        update_ns.append(t1 - t0)
+        frames += 1
+    pygame.quit()
+    return frame_ns, update_ns
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Many autoplayed games in one window")
+    parser.add_argument("--boards", type=int, default=64)
+    parser.add_argument("--size", default="1280x720", help="window size WxH")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--delay", type=int, default=20, help="frames of gravity before each bot placement")
+    parser.add_argument("--bench", type=int, metavar="FRAMES", help="run uncapped under the dummy driver")
+    parser.add_argument("--naive", action="store_true", help="repaint everything every frame (with --bench)")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    if args.bench:
+        engines.headless()
+    frame_ns, update_ns = run(args.boards, width, height, args.seed, args.delay, args.bench, args.naive)
+    if args.bench:
+        draw = [f - u for f, u in zip(frame_ns, update_ns)]
+        print(f"{args.boards} boards, {'naive' if args.naive else 'dirty-board'} drawing, {len(frame_ns)} frames: "
+              f"frame p50 {_pct(frame_ns, 0.5):.2f} ms  p99 {_pct(frame_ns, 0.99):.2f} ms  "
+              f"(games+bots p50 {_pct(update_ns, 0.5):.2f} ms, drawing p50 {_pct(draw, 0.5):.2f} ms "
+              f"p99 {_pct(draw, 0.99):.2f} ms) -> {1e3 / _pct(frame_ns, 0.5):.0f} fps uncapped")
+
+
+if __name__ == "__main__":
+    main()